@@ -0,0 +1,53 @@
+from datetime import datetime, time, timedelta
+
+from django.utils import timezone
+from rest_framework.exceptions import ValidationError
+
+from core.models import Booking
+
+
+def parse_date(params, name):
+    value = params.get(name)
+    if not value:
+        return None
+    try:
+        return datetime.strptime(value, "%Y-%m-%d").date()
+    except ValueError:
+        raise ValidationError({name: "Use the YYYY-MM-DD format."})
+
+
+def filter_bookings(queryset, params):
+    """
+    Booking list filters:
+
+    ?date_from=YYYY-MM-DD / ?date_to=YYYY-MM-DD -> bookings ending within the range (inclusive)
+    ?status=pending,confirmed                   -> any of the given statuses
+    ?service=<id>                               -> bookings of one service
+    """
+    date_from = parse_date(params, "date_from")
+    if date_from:
+        queryset = queryset.filter(
+            end_datetime__gte=timezone.make_aware(datetime.combine(date_from, time.min))
+        )
+    date_to = parse_date(params, "date_to")
+    if date_to:
+        queryset = queryset.filter(
+            end_datetime__lt=timezone.make_aware(
+                datetime.combine(date_to + timedelta(days=1), time.min)
+            )
+        )
+
+    if params.get("status"):
+        statuses = params["status"].split(",")
+        valid = {value for value, _ in Booking.STATUSES}
+        if not set(statuses) <= valid:
+            raise ValidationError({"status": f"Choose from {', '.join(sorted(valid))}."})
+        queryset = queryset.filter(status__in=statuses)
+
+    if params.get("service"):
+        try:
+            queryset = queryset.filter(service_id=int(params["service"]))
+        except ValueError:
+            raise ValidationError({"service": "Must be an integer."})
+
+    return queryset
@@ -0,0 +1,146 @@
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from datetime import datetime
+
+from django.db.models import Q
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.pagination import BasePagination, CursorPagination
+from rest_framework.response import Response
+
+
+class ChatSessionCursorPagination(CursorPagination):
+    # Most recently active sessions first; `last_activity` is annotated by the view
+    page_size = 20
+    max_page_size = 100
+    page_size_query_param = "page_size"
+    ordering = ("-last_activity", "-id")
+
+
+def encode_keyset_cursor(timestamp, pk):
+    raw = f"{timestamp.isoformat()}|{pk}"
+    return urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_keyset_cursor(cursor):
+    try:
+        timestamp, pk = urlsafe_b64decode(cursor.encode()).decode().split("|")
+        return datetime.fromisoformat(timestamp), int(pk)
+    except (TypeError, ValueError, UnicodeDecodeError):
+        raise NotFound("Invalid cursor")
+
+
+class KeysetPagination(BasePagination):
+    page_size = 50
+    max_page_size = 200
+
+    def get_limit(self, request):
+        try:
+            limit = int(request.query_params.get("limit", self.page_size))
+        except ValueError:
+            raise ValidationError({"limit": "Must be an integer."})
+        return max(1, min(limit, self.max_page_size))
+
+
+class ChatHistoryKeysetPagination(KeysetPagination):
+    """
+    Keyset pagination over (timestamp, id).
+
+    No params     -> latest page
+    ?before=<c>   -> older page
+    ?after=<c>    -> newer page
+    ?since_id=<n> -> delta: messages with id > n
+
+    Pages are always returned oldest first.
+    """
+
+    def paginate_queryset(self, queryset, request, view=None):
+        params = request.query_params
+        limit = self.get_limit(request)
+        newest_first = False
+        # Echoed back on an empty page, so a client polling with `after` keeps its place
+        self.cursor = params.get("after") or params.get("before") or None
+
+        if params.get("since_id") is not None:
+            try:
+                since_id = int(params["since_id"])
+            except ValueError:
+                raise ValidationError({"since_id": "Must be an integer."})
+            queryset = queryset.filter(id__gt=since_id).order_by("timestamp", "id")
+        elif params.get("after"):
+            timestamp, pk = decode_keyset_cursor(params["after"])
+            queryset = queryset.filter(
+                Q(timestamp__gt=timestamp) | Q(timestamp=timestamp, id__gt=pk)
+            ).order_by("timestamp", "id")
+        else:
+            if params.get("before"):
+                timestamp, pk = decode_keyset_cursor(params["before"])
+                queryset = queryset.filter(
+                    Q(timestamp__lt=timestamp) | Q(timestamp=timestamp, id__lt=pk)
+                )
+            queryset = queryset.order_by("-timestamp", "-id")
+            newest_first = True
+
+        # One extra row tells us whether there is another page without a COUNT
+        rows = list(queryset[: limit + 1])
+        self.has_more = len(rows) > limit
+        rows = rows[:limit]
+        if newest_first:
+            rows.reverse()
+        self.page = rows
+        return rows
+
+    def get_paginated_response(self, data):
+        if self.page:
+            first, last = self.page[0], self.page[-1]
+            before = encode_keyset_cursor(first.timestamp, first.id)
+            after = encode_keyset_cursor(last.timestamp, last.id)
+        else:
+            before = after = self.cursor
+        return Response(
+            {
+                "results": data,
+                "has_more": self.has_more,
+                "before": before,
+                "after": after,
+            }
+        )
+
+
+class BookingKeysetPagination(KeysetPagination):
+    """
+    Keyset pagination over (end_datetime, id), latest first.
+
+    No params   -> first page
+    ?cursor=<c> -> page after the cursor (taken from `next`)
+    """
+
+    page_size = 20
+    max_page_size = 100
+
+    def paginate_queryset(self, queryset, request, view=None):
+        limit = self.get_limit(request)
+        cursor = request.query_params.get("cursor")
+        if cursor:
+            end_datetime, pk = decode_keyset_cursor(cursor)
+            queryset = queryset.filter(
+                Q(end_datetime__lt=end_datetime) | Q(end_datetime=end_datetime, id__lt=pk)
+            )
+
+        rows = list(queryset.order_by("-end_datetime", "-id")[: limit + 1])
+        self.has_more = len(rows) > limit
+        self.page = rows[:limit]
+        return self.page
+
+    def get_next_cursor(self):
+        if not self.has_more:
+            return None
+        last = self.page[-1]
+        return encode_keyset_cursor(last.end_datetime, last.id)
+
+    def get_paginated_response(self, data):
+        return Response(
+            {
+                "results": data,
+                "has_more": self.has_more,
+                "next": self.get_next_cursor(),
+            }
+        )
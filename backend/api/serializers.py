@@ -2,7 +2,8 @@ from rest_framework import serializers
 from core.models import CustomUser
 from django.contrib.auth import authenticate, get_user_model
 from rest_framework import serializers
-from core.models import Service, AvailabilitySlot, Booking, ChatMessage, ChatSession
+from core.models import Service, AvailabilitySlot, AvailabilityRule, AvailabilityRuleException, Booking, ChatMessage, ChatSession
+from django.db import transaction
 from core.utils.enums import Weekday
 
 User = get_user_model()
@@ -78,12 +79,69 @@ class AvailabilitySlotSerializer(serializers.ModelSerializer):
         read_only_fields = ['user']
 
 
+class AvailabilityRuleSerializer(serializers.ModelSerializer):
+    exceptions = serializers.ListField(child=serializers.DateField(), source='exception_dates', required=False)
+
+    class Meta:
+        fields = '__all__'
+        model = AvailabilityRule
+        read_only_fields = ['user']
+
+    def validate(self, data):
+        start_time = data.get('start_time', getattr(self.instance, 'start_time', None))
+        end_time = data.get('end_time', getattr(self.instance, 'end_time', None))
+        if start_time and end_time and end_time <= start_time:
+            raise serializers.ValidationError({'end_time': 'Must be after start_time.'})
+        start_date = data.get('start_date', getattr(self.instance, 'start_date', None))
+        end_date = data.get('end_date', getattr(self.instance, 'end_date', None))
+        if start_date and end_date and end_date < start_date:
+            raise serializers.ValidationError({'end_date': 'Must not be before start_date.'})
+        return data
+
+    def create(self, validated_data):
+        dates = validated_data.pop('exception_dates', [])
+        with transaction.atomic():
+            rule = super().create(validated_data)
+            self.set_exceptions(rule, dates)
+        return rule
+
+    def update(self, instance, validated_data):
+        dates = validated_data.pop('exception_dates', None)
+        with transaction.atomic():
+            rule = super().update(instance, validated_data)
+            if dates is not None:
+                rule.exceptions.all().delete()
+                self.set_exceptions(rule, dates)
+        return rule
+
+    def set_exceptions(self, rule, dates):
+        AvailabilityRuleException.objects.bulk_create(
+            [AvailabilityRuleException(rule=rule, date=day) for day in set(dates)]
+        )
+
+
 class BookingSerializer(serializers.ModelSerializer):
     class Meta:
         fields = '__all__'
         model = Booking
         read_only_fields = ['user']
 
+class SparseFieldsetMixin:
+    """
+    Limits the output to the fields listed in the `?fields=a,b` query param, if given.
+    Unknown names are ignored.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        request = self.context.get("request")
+        requested = request.query_params.get("fields") if request else None
+        if requested:
+            keep = set(requested.split(","))
+            for name in set(self.fields) - keep:
+                self.fields.pop(name)
+
+
 class BookingClientSerializer(serializers.ModelSerializer):
     date = serializers.DateField(write_only=True)
     service_id = serializers.CharField()
@@ -98,6 +156,22 @@ class BookingClientSerializer(serializers.ModelSerializer):
     def get_date(self, obj):
         return obj.slot.date if obj.slot else None
     
+class BookingListSerializer(SparseFieldsetMixin, BookingClientSerializer):
+    pass
+
+
+class BookingImportSerializer(serializers.Serializer):
+    rows = serializers.ListField(child=serializers.DictField(), required=False)
+    file = serializers.FileField(required=False)
+    dry_run = serializers.BooleanField(default=False)
+    send_emails = serializers.BooleanField(default=False)
+
+    def validate(self, data):
+        if ('rows' in data) == ('file' in data):
+            raise serializers.ValidationError('Send either rows or a CSV/JSON file.')
+        return data
+
+
 class UserSerializer(serializers.ModelSerializer):
 
     class Meta:
@@ -106,12 +180,22 @@ class UserSerializer(serializers.ModelSerializer):
         read_only_fields =  ['id', 'email', 'username', 'phone']
 
 class BulkAvailabilitySlotSerializer(serializers.Serializer):
-    day_of_week = serializers.ListField(child=serializers.ChoiceField(choices=Weekday.choices))
+    MAX_DAYS = 366
+
+    day_of_week = serializers.ListField(child=serializers.ChoiceField(choices=Weekday.choices), allow_empty=False)
     start_time = serializers.TimeField()
     end_time = serializers.TimeField()
     start_date = serializers.DateField()
     end_date = serializers.DateField()
-    service_id = serializers.CharField()
+
+    def validate(self, data):
+        if data['end_time'] <= data['start_time']:
+            raise serializers.ValidationError({'end_time': 'Must be after start_time.'})
+        if data['end_date'] < data['start_date']:
+            raise serializers.ValidationError({'end_date': 'Must not be before start_date.'})
+        if (data['end_date'] - data['start_date']).days >= self.MAX_DAYS:
+            raise serializers.ValidationError({'end_date': f'The range can span at most {self.MAX_DAYS} days.'})
+        return data
 
 
 
@@ -124,22 +208,19 @@ class BookingSerializer(serializers.Serializer):
 
 
 class ChatSessionsSerializer(serializers.ModelSerializer):
-    last_message = serializers.SerializerMethodField()
+    # Both fields are annotated on the queryset by GetChatSessionsAPIView
+    last_message = serializers.CharField(read_only=True, allow_null=True)
+    last_activity = serializers.DateTimeField(read_only=True)
+
     class Meta:
         model = ChatSession
-        fields = ["id", "started_at", "last_message"]
-
-    def get_last_message(self, obj):
-        last_msg = obj.messages.order_by('-timestamp').first()
-        if last_msg:
-            return last_msg.message
-        return None
+        fields = ["id", "started_at", "last_message", "last_activity"]
     
 
 class ChatMessageSerializer(serializers.ModelSerializer):
     class Meta:
         model = ChatMessage
-        fields = ["id", "message", "sender"]
+        fields = ["id", "message", "sender", "timestamp"]
 
 
 class SendMessageSerializer(serializers.Serializer):
@@ -16,10 +16,18 @@ from .views import (
     ServiceListCreateAPIView,
     ServiceRetrieveUpdateDestroyAPIVIew,
     AvailabilitySlotListCreateAPIView,
+    AvailabilitySlotBulkCreateAPIView,
+    AvailabilityRuleListCreateAPIView,
+    AvailabilityRuleRetrieveUpdateDestroyAPIView,
     AvailabilitySlotRetrieveUpdateDestroyAPIVIew,
     BookingRetrieveUpdateDestroyAPIVIew,
     DashboardAPIView,
+    CalendarFeedAPIView,
+    CalendarFeedICSView,
     BookingSlotClientListCreateAPIView,
+    BookingListAPIView,
+    BookingExportAPIView,
+    BookingImportAPIView,
     AvailableTimesView,
     BookTimeView,
     ServicesListAPIView,
@@ -27,6 +35,7 @@ from .views import (
     GetChatSessionsAPIView,
     GetChatHistoryAPIView,
     SendMessageAPIView,
+    ChatJobAPIView,
 )
 
 urlpatterns = [
@@ -51,6 +60,7 @@ urlpatterns = [
         name="get-messages-for-session",
     ),
     path("chat/<int:id>/send-msg/", SendMessageAPIView.as_view(), name="send-msg"),
+    path("chat/jobs/<str:job_id>/", ChatJobAPIView.as_view(), name="chat-job"),
     # Client
     path("client/services/", ServiceListCreateAPIView.as_view(), name="services"),
     path(
@@ -63,6 +73,21 @@ urlpatterns = [
         AvailabilitySlotListCreateAPIView.as_view(),
         name="slots",
     ),
+    path(
+        "client/availability-slots/bulk/",
+        AvailabilitySlotBulkCreateAPIView.as_view(),
+        name="slots-bulk",
+    ),
+    path(
+        "client/availability-rules/",
+        AvailabilityRuleListCreateAPIView.as_view(),
+        name="availability-rules",
+    ),
+    path(
+        "client/availability-rules/<int:id>/",
+        AvailabilityRuleRetrieveUpdateDestroyAPIView.as_view(),
+        name="availability-rule-detail",
+    ),
     path(
         "client/availability-slots/<int:id>/",
         AvailabilitySlotRetrieveUpdateDestroyAPIVIew.as_view(),
@@ -73,6 +98,21 @@ urlpatterns = [
         BookingSlotClientListCreateAPIView.as_view(),
         name="bookings",
     ),
+    path(
+        "client/bookings/list/",
+        BookingListAPIView.as_view(),
+        name="booking-list",
+    ),
+    path(
+        "client/bookings/import/",
+        BookingImportAPIView.as_view(),
+        name="booking-import",
+    ),
+    path(
+        "client/bookings/export/<str:export_format>/",
+        BookingExportAPIView.as_view(),
+        name="booking-export",
+    ),
     path(
         "bookings/<int:id>/",
         BookingRetrieveUpdateDestroyAPIVIew.as_view(),
@@ -80,6 +120,12 @@ urlpatterns = [
     ),
     # Dashboard
     path("client/me/", DashboardAPIView.as_view(), name="dashboard"),
+    path("client/calendar-feed/", CalendarFeedAPIView.as_view(), name="calendar-feed"),
+    path(
+        "calendar/<str:token>.ics",
+        CalendarFeedICSView.as_view(),
+        name="calendar-feed-ics",
+    ),
     path(
         "bookings/book/verify/<str:token>/",
         VerifyBookTimeAPIView.as_view(),
@@ -93,6 +139,7 @@ urlpatterns = [
     path(
         "bookings/<str:user_slug>/<int:service_id>/<str:date>/",
         AvailableTimesView.as_view(),
+        name="available-times",
     ),
     path(
         "bookings/<str:user_slug>/<str:date>/",
@@ -1,9 +1,9 @@
 from django.shortcuts import render, get_object_or_404
-from django.http import Http404
-from django.core.exceptions import ObjectDoesNotExist
 from django.contrib.auth import get_user_model
 from django.conf import settings
 from django.db import transaction
+from django.db.models import F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
 from django.utils import timezone
 
 from rest_framework import status
@@ -11,20 +11,31 @@ from rest_framework.response import Response
 from rest_framework.views import APIView
 from rest_framework.viewsets import generics
 from rest_framework.permissions import IsAuthenticated, AllowAny
-from rest_framework.exceptions import NotFound
+from rest_framework.exceptions import NotFound, Throttled
 from rest_framework.throttling import UserRateThrottle
 from rest_framework.pagination import PageNumberPagination
 
-from rest_framework_simplejwt.tokens import AccessToken, RefreshToken
+from rest_framework_simplejwt.tokens import AccessToken
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
 from rest_framework_simplejwt.views import TokenRefreshView
 from rest_framework_simplejwt.exceptions import TokenError, InvalidToken
 
 from rest_framework_extensions.cache.mixins import CacheResponseMixin
 from django.core.cache import cache
 from django.utils.decorators import method_decorator
-from django.views.decorators.cache import cache_page
+from django.http import Http404, HttpResponse, StreamingHttpResponse
+from django.urls import reverse
+from django.views import View
+from django.views.decorators.cache import cache_page, cache_control
+from django.views.decorators.http import condition
 from django.views.decorators.vary import vary_on_cookie
 
+from .filters import filter_bookings
+from .pagination import (
+    BookingKeysetPagination,
+    ChatSessionCursorPagination,
+    ChatHistoryKeysetPagination,
+)
 from .serializers import (
     LoginSerializer,
     RegisterSerializer,
@@ -32,8 +43,12 @@ from .serializers import (
     ResendCodeSerializer,
     BookingSerializer,
     AvailabilitySlotSerializer,
+    AvailabilityRuleSerializer,
+    BulkAvailabilitySlotSerializer,
     ServiceSerializer,
     BookingClientSerializer,
+    BookingListSerializer,
+    BookingImportSerializer,
     UserSerializer,
     ChatSessionsSerializer,
     ChatMessageSerializer,
@@ -42,29 +57,72 @@ from .serializers import (
 
 from core.models import (
     CustomUser,
-    VerificationCode,
     Booking,
     AvailabilitySlot,
+    AvailabilityRule,
     Service,
     VerificationLink,
     ChatMessage,
     ChatSession,
 )
 
+from core.tokens import RefreshToken
+from core.utils.booking_export import (
+    FORMATS as EXPORT_FORMATS,
+    bookings_for_export,
+    iter_export,
+)
+from core.utils.booking_import import BookingImportError, import_bookings, parse_rows
+from core.utils.bulk_availability import create_weekly_slots
+from core.utils.calendar_feed import (
+    feed_user_id,
+    feed_version,
+    get_cached_feed,
+    get_or_create_feed,
+    rotate_feed_token,
+    stream_feed,
+)
+from core.utils.dashboard import get_dashboard
+from core.utils.user_cache import service_list, slot_list
+from core.utils.recurring_availability import get_bookable_slot
+from core.utils.outbox import enqueue
+from core.utils.provider_cache import (
+    get_provider_profile,
+    get_provider_version,
+    get_service_duration,
+)
 from core.tasks import (
     send_registration_code,
     send_registration_success,
     send_appointment_email,
+    summarize_chat_session,
+    generate_chat_reply,
 )
 
 from core.utils.verification import create_verification_code, create_verification_link
+from core.utils import verification_store as code_store
 from core.utils.available_times import generate_available_times
-from core.utils.chatbot.ai_router import handle_user_input
+from core.utils.chatbot.ai_router import reply_to_message
+from core.utils.chatbot.memory import needs_summary
+from core.utils.chatbot import jobs
+from core.utils.principal_cache import get_cached_user
+from core.utils.rate_limit import (
+    CONCURRENCY_RETRY_AFTER,
+    acquire_chat_slot,
+    consume_chat_tokens,
+    estimate_chat_cost,
+    release_chat_slot,
+    settle_chat_tokens,
+)
+
+from kombu.exceptions import OperationalError as BrokerError
+from openai import APITimeoutError, OpenAIError
 
 from google.oauth2 import id_token
 from google.auth.transport import requests as google_requests
 
 from datetime import datetime, timedelta
+import time
 import uuid
 from core.utils.send_prompt import get_gpt_response
 
@@ -87,6 +145,15 @@ class CustomTokenRefreshView(TokenRefreshView):
             refresh_token = RefreshToken(old_refresh_token)
 
             access_token = str(refresh_token.access_token)
+
+            if jwt_settings.ROTATE_REFRESH_TOKENS:
+                if jwt_settings.BLACKLIST_AFTER_ROTATION:
+                    # Revocation is a Redis key, not a token_blacklist row
+                    refresh_token.blacklist()
+                refresh_token.set_jti()
+                refresh_token.set_exp()
+                refresh_token.set_iat()
+
             new_refresh_token = str(refresh_token)
 
             res = Response(status=status.HTTP_200_OK)
@@ -126,8 +193,9 @@ class LoginAPIView(APIView):
         serializer = self.serializer_class(data=request.data)
         if serializer.is_valid():
             user = serializer.validated_data["user"]
-            access_token = AccessToken.for_user(user)
+            # The access token is derived from the refresh token instead of minted separately
             refresh_token = RefreshToken.for_user(user)
+            access_token = refresh_token.access_token
 
             res = Response(
                 {"message": "Successfully logged in!"}, status=status.HTTP_200_OK
@@ -168,8 +236,7 @@ class RegisterAPIView(APIView):
 
             user = serializer.save()
 
-            VerificationCode.objects.filter(email=email).delete()
-
+            code_store.get_code_store().start_registration(email)
             create_verification_code(email=email)
 
             return Response(
@@ -188,31 +255,32 @@ class VerifyCodeAPIView(APIView):
         if serializer.is_valid():
             email = serializer.validated_data["email"]
             verification_code = serializer.validated_data["verification_code"]
-            try:
-                verification_code_obj = get_object_or_404(
-                    VerificationCode,
-                    email=serializer.validated_data["email"],
-                    code=verification_code,
+
+            result = code_store.get_code_store().verify(email, verification_code)
+            if result == code_store.LOCKED:
+                return Response(
+                    {"error": "Too many attempts, please request a new code."},
+                    status=status.HTTP_429_TOO_MANY_REQUESTS,
                 )
-            except Http404:
+            if result == code_store.EXPIRED:
                 return Response(
-                    {"error": "Invalid verification code!"},
+                    {"error": "Verification code has expired!"},
                     status=status.HTTP_400_BAD_REQUEST,
                 )
-
-            if verification_code_obj.is_expired():
+            if result != code_store.OK:
                 return Response(
-                    {"error": "Verification code has expired!"},
+                    {"error": "Invalid verification code!"},
                     status=status.HTTP_400_BAD_REQUEST,
                 )
 
             user = get_object_or_404(CustomUser, email=email)
             user.is_active = True
             user.save()
-            VerificationCode.objects.filter(email=user.email).delete()
-            send_registration_success(user_email=user.email)
-            access_token = AccessToken.for_user(user)
+            transaction.on_commit(
+                lambda: send_registration_success.delay(user_email=user.email)
+            )
             refresh_token = RefreshToken.for_user(user)
+            access_token = refresh_token.access_token
 
             res = Response()
 
@@ -246,24 +314,25 @@ class ResendCodeAPIView(APIView):
         serializer = self.serializer_class(data=request.data)
         if serializer.is_valid():
             email = serializer.validated_data["email"]
-            try:
-                code = VerificationCode.objects.get(email=email)
-            except ObjectDoesNotExist:
+            store = code_store.get_code_store()
+            # Only registrations still waiting for verification, never deactivated accounts
+            if not store.is_pending(email) or not CustomUser.objects.filter(
+                email=email, is_active=False
+            ).exists():
                 return Response(
                     {"detail": "No verification code found for this email."},
                     status=status.HTTP_404_NOT_FOUND,
                 )
 
-            if not code.can_resend():
-                remaining_time = code.created_at + timedelta(minutes=5) - timezone.now()
+            wait = store.resend_wait(email)
+            if wait:
                 return Response(
                     {
-                        "detail": f"You need to wait {remaining_time.seconds} seconds before requesting a new code."
+                        "detail": f"You need to wait {wait} seconds before requesting a new code."
                     },
                     status=status.HTTP_400_BAD_REQUEST,
                 )
 
-            VerificationCode.objects.filter(email=email).delete()
             create_verification_code(email=email)
 
             return Response(
@@ -308,7 +377,7 @@ class GoogleAuthAPIView(APIView):
                 user.save()
 
             refresh = RefreshToken.for_user(user)
-            access = AccessToken.for_user(user)
+            access = refresh.access_token
 
             res = Response(
                 {"message": "Successfully logged in!"}, status=status.HTTP_200_OK
@@ -373,12 +442,11 @@ class CheckAuth(APIView):
             )
 
         try:
+            # Signature and expiry are verified here, before any user lookup
             token = AccessToken(access)
             user_id = token.payload.get("user_id")
 
-            try:
-                user = User.objects.get(id=user_id)
-            except User.DoesNotExist:
+            if user_id is None or get_cached_user(user_id) is None:
                 return Response(
                     {
                         "is_authenticated": False,
@@ -387,7 +455,6 @@ class CheckAuth(APIView):
                     status=401,
                 )
 
-            token.check_exp()
             return Response({"is_authenticated": True})
 
         except TokenError as e:
@@ -401,6 +468,32 @@ class CheckAuth(APIView):
             )
 
 
+def cached_services(request):
+    return service_list.get_or_set(
+        request.user.id,
+        lambda: list(
+            ServiceSerializer(
+                Service.objects.filter(user=request.user),
+                many=True,
+                context={"request": request},
+            ).data
+        ),
+    )
+
+
+def cached_slots(request):
+    return slot_list.get_or_set(
+        request.user.id,
+        lambda: list(
+            AvailabilitySlotSerializer(
+                AvailabilitySlot.objects.filter(user=request.user),
+                many=True,
+                context={"request": request},
+            ).data
+        ),
+    )
+
+
 class ServiceListCreateAPIView(generics.ListCreateAPIView):
     serializer_class = ServiceSerializer
     permission_classes = [IsAuthenticated]
@@ -409,20 +502,10 @@ class ServiceListCreateAPIView(generics.ListCreateAPIView):
         return Service.objects.filter(user=self.request.user)
 
     def get(self, request, *args, **kwargs):
-        cache_key = f"service_list_user_{request.user.id}"
-        cached_data = cache.get(cache_key)
-        if cached_data:
-            return Response(cached_data)
-
-        queryset = self.get_queryset()
-        serializer = self.get_serializer(queryset, many=True)
-        cache.set(cache_key, serializer.data, timeout=300)
-        return Response(serializer.data)
+        return Response(cached_services(request))
 
     def perform_create(self, serializer):
         serializer.save(user=self.request.user)
-        cache_key = f"service_list_user_{self.request.user.id}"
-        cache.delete(cache_key)
 
 
 class ServiceRetrieveUpdateDestroyAPIVIew(generics.RetrieveUpdateDestroyAPIView):
@@ -442,19 +525,57 @@ class AvailabilitySlotListCreateAPIView(generics.ListCreateAPIView):
         return AvailabilitySlot.objects.filter(user=self.request.user)
 
     def get(self, request, *args, **kwargs):
-        cache_key = f"slot_list_user_{request.user.id}"
-        cached_data = cache.get(cache_key)
-        if cached_data:
-            return Response(cached_data)
-        queryset = self.get_queryset()
-        serializer = self.get_serializer(queryset, many=True)
-        cache.set(cache_key, serializer.data, timeout=300)
-        return Response(serializer.data)
+        return Response(cached_slots(request))
 
     def perform_create(self, serializer):
         serializer.save(user=self.request.user)
 
 
+class AvailabilityRuleListCreateAPIView(generics.ListCreateAPIView):
+    serializer_class = AvailabilityRuleSerializer
+    permission_classes = [IsAuthenticated]
+
+    def get_queryset(self):
+        return AvailabilityRule.objects.filter(user=self.request.user).prefetch_related(
+            "exceptions"
+        )
+
+    def perform_create(self, serializer):
+        serializer.save(user=self.request.user)
+
+
+class AvailabilityRuleRetrieveUpdateDestroyAPIView(generics.RetrieveUpdateDestroyAPIView):
+    serializer_class = AvailabilityRuleSerializer
+    permission_classes = [IsAuthenticated]
+    lookup_field = "id"
+
+    def get_queryset(self):
+        return AvailabilityRule.objects.filter(user=self.request.user).prefetch_related(
+            "exceptions"
+        )
+
+
+class AvailabilitySlotBulkCreateAPIView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request, *args, **kwargs):
+        serializer = BulkAvailabilitySlotSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+
+        created, skipped = create_weekly_slots(
+            request.user,
+            data["day_of_week"],
+            data["start_time"],
+            data["end_time"],
+            data["start_date"],
+            data["end_date"],
+        )
+        return Response(
+            {"created": created, "skipped": skipped}, status=status.HTTP_201_CREATED
+        )
+
+
 class AvailabilitySlotRetrieveUpdateDestroyAPIVIew(
     generics.RetrieveUpdateDestroyAPIView
 ):
@@ -466,16 +587,70 @@ class AvailabilitySlotRetrieveUpdateDestroyAPIVIew(
         return AvailabilitySlot.objects.filter(user=self.request.user)
 
 
-class BookingSlotListCreateAPIView(generics.ListCreateAPIView):
-    serializer_class = BookingSerializer
+class BookingListAPIView(generics.ListAPIView):
+    serializer_class = BookingListSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = BookingKeysetPagination
 
     def get_queryset(self):
-        queryset = Booking.objects.filter(user=self.request.user)
-        return queryset
+        queryset = Booking.objects.filter(user=self.request.user).select_related("service")
+        return filter_bookings(queryset, self.request.query_params)
 
-    def perform_create(self, serializer):
-        serializer.save(user=self.request.user)
+
+class BookingExportAPIView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, export_format, *args, **kwargs):
+        if export_format not in EXPORT_FORMATS:
+            raise NotFound("Unknown export format.")
+
+        # Staff can export every provider's bookings with ?scope=all
+        everyone = request.user.is_staff and request.query_params.get("scope") == "all"
+        queryset = filter_bookings(
+            bookings_for_export(None if everyone else request.user),
+            request.query_params,
+        )
+
+        response = StreamingHttpResponse(
+            iter_export(queryset, export_format, include_provider=everyone),
+            content_type=EXPORT_FORMATS[export_format],
+        )
+        filename = f"bookings-{timezone.localdate():%Y%m%d}.{export_format}"
+        response["Content-Disposition"] = f'attachment; filename="{filename}"'
+        return response
+
+
+class BookingImportAPIView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request, *args, **kwargs):
+        serializer = BookingImportSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+
+        try:
+            if "file" in data:
+                upload = data["file"]
+                try:
+                    content = upload.read().decode("utf-8-sig")
+                except UnicodeDecodeError:
+                    raise BookingImportError("The file must be UTF-8 encoded.")
+                rows = parse_rows(content, upload.name)
+            else:
+                rows = data["rows"]
+            report = import_bookings(
+                request.user,
+                rows,
+                dry_run=data["dry_run"],
+                send_emails=data["send_emails"],
+            )
+        except BookingImportError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        created = report["created"] and not report["dry_run"]
+        return Response(
+            report, status=status.HTTP_201_CREATED if created else status.HTTP_200_OK
+        )
 
 
 # CLIENT
@@ -485,28 +660,21 @@ class BookingSlotClientListCreateAPIView(APIView):
     permission_classes = [IsAuthenticated]
 
     def get(self, request, *args, **kwargs):
-        services = ServiceSerializer(
-            Service.objects.filter(user=request.user), many=True
-        )
-        slots = AvailabilitySlotSerializer(
-            AvailabilitySlot.objects.filter(user=request.user), many=True
+        # Only the bookings page; services and slots have their own endpoints
+        bookings_qs = filter_bookings(
+            Booking.objects.filter(user=request.user).select_related("service"),
+            request.query_params,
         )
-        # bookings = BookingClientSerializer(Booking.objects.filter(user=request.user).order_by('-end_datetime'), many=True)
 
-        bookings_qs = Booking.objects.filter(user=request.user).order_by(
-            "-end_datetime"
-        )
-
-        paginator = PageNumberPagination()
-        paginator.page_size = 20
+        paginator = BookingKeysetPagination()
         result_page = paginator.paginate_queryset(bookings_qs, request)
-        bookings = BookingClientSerializer(result_page, many=True)
+        bookings = BookingListSerializer(result_page, many=True, context={"request": request})
 
         return Response(
             {
-                "Services": services.data,
-                "Slots": slots.data,
                 "Bookings": bookings.data,
+                "has_more": paginator.has_more,
+                "next": paginator.get_next_cursor(),
             }
         )
 
@@ -539,15 +707,8 @@ class BookingSlotClientListCreateAPIView(APIView):
         if overlapping_bookings.exists():
             return Response({"error": "Time slot already booked."}, status=400)
 
-        try:
-            slot = AvailabilitySlot.objects.get(
-                user=user,
-                date=date_obj,
-                start_time__lte=start_time,
-                end_time__gte=end_time,
-                is_active=True,
-            )
-        except AvailabilitySlot.DoesNotExist:
+        slot = get_bookable_slot(user.id, date_obj, start_time, end_time)
+        if slot is None:
             return Response({"error": "No matching available slot found."}, status=400)
 
         # Create booking
@@ -564,7 +725,9 @@ class BookingSlotClientListCreateAPIView(APIView):
         )
 
         if email_sent:
-            send_appointment_email.delay(
+            enqueue(
+                send_appointment_email,
+                f"appointment-email-{booking.id}",
                 customer_name=customer_name,
                 service_name=service.name,
                 appointment_date=date_obj,
@@ -614,15 +777,8 @@ class BookingRetrieveUpdateDestroyAPIVIew(generics.RetrieveUpdateDestroyAPIView)
         if overlapping_bookings.exists() and booking not in overlapping_bookings:
             return Response({"error": "Time slot already booked."}, status=400)
 
-        try:
-            slot = AvailabilitySlot.objects.get(
-                user=user,
-                date=date_obj,
-                start_time__lte=start_time,
-                end_time__gte=end_time,
-                is_active=True,
-            )
-        except AvailabilitySlot.DoesNotExist:
+        slot = get_bookable_slot(user.id, date_obj, start_time, end_time)
+        if slot is None:
             return Response({"error": "No matching available slot found."}, status=400)
 
         booking.service = service
@@ -637,7 +793,10 @@ class BookingRetrieveUpdateDestroyAPIVIew(generics.RetrieveUpdateDestroyAPIView)
         booking.save()
 
         if should_send_email:
-            send_appointment_email.delay(
+            enqueue(
+                send_appointment_email,
+                # The email can be switched off and on again, each time is a new message
+                f"appointment-email-{booking.id}-{booking.updated_at.timestamp()}",
                 customer_name=customer_name,
                 service_name=service.name,
                 appointment_date=date_obj,
@@ -654,28 +813,7 @@ class BookingRetrieveUpdateDestroyAPIVIew(generics.RetrieveUpdateDestroyAPIView)
 
 class DashboardAPIView(APIView):
     def get(self, request, *args, **kwargs):
-        last_services = Service.objects.filter(user=request.user).order_by(
-            "-created_at"
-        )[:3]
-        last_slots = AvailabilitySlot.objects.filter(user=request.user).order_by(
-            "-date"
-        )[:3]
-        last_bookings = Booking.objects.filter(user=request.user).order_by(
-            "-end_datetime"
-        )[:3]
-        services = ServiceSerializer(last_services, many=True)
-        slots = AvailabilitySlotSerializer(last_slots, many=True)
-        bookings = BookingClientSerializer(last_bookings, many=True)
-        user = UserSerializer(self.request.user)
-
-        return Response(
-            {
-                "User": user.data,
-                "Services": services.data,
-                "Slots": slots.data,
-                "Bookings": bookings.data,
-            }
-        )
+        return Response(get_dashboard(request.user))
 
     def put(self, request, *args, **kwargs):
         user = request.user
@@ -688,22 +826,108 @@ class DashboardAPIView(APIView):
         return Response(serializer.data)
 
 
+class CalendarFeedAPIView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, *args, **kwargs):
+        return Response(self.feed_data(request, get_or_create_feed(request.user)))
+
+    def post(self, request, *args, **kwargs):
+        # Rotates the token, e.g. after the URL was shared by mistake
+        return Response(self.feed_data(request, rotate_feed_token(request.user)))
+
+    def feed_data(self, request, feed):
+        url = request.build_absolute_uri(
+            reverse("calendar-feed-ics", kwargs={"token": feed.token})
+        )
+        # webcal:// makes browsers hand the URL to the calendar app as a subscription
+        return {"token": feed.token, "url": "webcal://" + url.split("://", 1)[1]}
+
+
+def calendar_feed_etag(request, token):
+    user_id = feed_user_id(token)
+    if user_id is None:
+        return None
+    return f'W/"{feed_version(user_id)}"'
+
+
+@method_decorator(
+    cache_control(private=True, max_age=settings.CALENDAR_FEED_MAX_AGE), name="get"
+)
+@method_decorator(condition(etag_func=calendar_feed_etag), name="get")
+class CalendarFeedICSView(View):
+    # Plain Django view: calendar clients authenticate with the token in the URL and
+    # don't negotiate JSON
+    content_type = "text/calendar; charset=utf-8"
+
+    def get(self, request, token):
+        user_id = feed_user_id(token)
+        if user_id is None:
+            raise Http404("Unknown calendar feed.")
+
+        version = feed_version(user_id)
+        body = get_cached_feed(user_id, version)
+        if body is not None:
+            response = HttpResponse(body, content_type=self.content_type)
+        else:
+            response = StreamingHttpResponse(
+                stream_feed(user_id, version), content_type=self.content_type
+            )
+        response["Content-Disposition"] = 'inline; filename="clockly.ics"'
+        return response
+
+
+def get_public_profile(user_slug):
+    profile = get_provider_profile(user_slug)
+    if profile is None or not profile["is_active"]:
+        raise NotFound("Provider not found.")
+    return profile
+
+
+def public_data_version(user_slug, date=None):
+    profile = get_provider_profile(user_slug)
+    if profile is None or not profile["is_active"]:
+        return None
+    version = get_provider_version(profile["user_id"])
+    if date is not None and date == timezone.localdate().isoformat():
+        # Today's times also expire as the clock passes them
+        bucket = settings.PUBLIC_TIMES_TODAY_BUCKET
+        version = max(version, int(time.time() // bucket * bucket * 1_000_000))
+    return version
+
+
+def public_etag(request, user_slug, date=None, *args, **kwargs):
+    version = public_data_version(user_slug, date)
+    if version is None:
+        return None
+    return f'W/"{version}"'
+
+
+public_cache_control = cache_control(
+    public=True, max_age=settings.PUBLIC_BOOKING_MAX_AGE, must_revalidate=True
+)
+public_condition = condition(etag_func=public_etag)
+
+
+@method_decorator(public_cache_control, name="get")
+@method_decorator(public_condition, name="get")
 class AvailableTimesView(APIView):
     permission_classes = [AllowAny]
 
     def get(self, request, user_slug, date, service_id=None):
-        user = get_user_model().objects.get(user_slug=user_slug)
+        profile = get_public_profile(user_slug)
         date_obj = datetime.strptime(date, "%Y-%m-%d").date()
 
         service_id = service_id or request.GET.get("service_id")
 
         if service_id is not None:
-            service = Service.objects.get(id=service_id)
-            duration = service.duration
+            duration = get_service_duration(profile, service_id)
+            if duration is None:
+                raise NotFound("Service not found.")
         else:
             duration = timedelta(minutes=60)
 
-        available = generate_available_times(user, date_obj, duration)
+        available = generate_available_times(profile["user_id"], date_obj, duration)
         return Response(available)
 
 
@@ -715,9 +939,13 @@ class BookTimeView(APIView):
         if not serializer.is_valid():
             return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
+        profile = get_public_profile(user_slug)
+        duration = get_service_duration(profile, service_id)
+        if duration is None:
+            raise NotFound("Service not found.")
+        user_id = profile["user_id"]
+
         with transaction.atomic():
-            user = get_user_model().objects.get(user_slug=user_slug)
-            service = get_object_or_404(Service, id=service_id)
             date_obj = datetime.strptime(date, "%Y-%m-%d").date()
 
             status = serializer.validated_data["status"]
@@ -727,11 +955,11 @@ class BookTimeView(APIView):
             customer_phone = serializer.validated_data["customer_phone"]
 
             start_dt = datetime.combine(date_obj, start_time)
-            end_dt = start_dt + service.duration
+            end_dt = start_dt + duration
             end_time = end_dt.time()
 
             overlapping_bookings = Booking.objects.select_for_update().filter(
-                user=user,
+                user_id=user_id,
                 start_time__lt=end_time,
                 end_time__gt=start_time,
                 slot__date=date_obj,
@@ -740,23 +968,18 @@ class BookTimeView(APIView):
             if overlapping_bookings.exists():
                 return Response({"error": "Time slot already booked."}, status=400)
 
-            try:
-                slot = AvailabilitySlot.objects.select_for_update().get(
-                    user=user,
-                    date=date_obj,
-                    start_time__lte=start_time,
-                    end_time__gte=end_time,
-                    is_active=True,
-                )
-            except AvailabilitySlot.DoesNotExist:
+            slot = get_bookable_slot(
+                user_id, date_obj, start_time, end_time, for_update=True
+            )
+            if slot is None:
                 return Response(
                     {"error": "No matching available slot found."}, status=400
                 )
 
             # Create booking
             booking = Booking.objects.create(
-                user=user,
-                service=service,
+                user_id=user_id,
+                service_id=service_id,
                 slot=slot,
                 customer_name=customer_name,
                 customer_email=customer_email,
@@ -815,7 +1038,9 @@ class VerifyBookTimeAPIView(APIView):
             verification_link.verified = False
             verification_link.save()
 
-            send_appointment_email.delay(
+            enqueue(
+                send_appointment_email,
+                f"appointment-email-{booking.id}",
                 customer_name=booking.customer_name,
                 service_name=booking.service.name,
                 appointment_date=booking.slot.date,
@@ -830,17 +1055,26 @@ class VerifyBookTimeAPIView(APIView):
         )
 
 
-class ServicesListAPIView(generics.ListAPIView):
-    serializer_class = ServiceSerializer
+@method_decorator(public_cache_control, name="get")
+@method_decorator(public_condition, name="get")
+class ServicesListAPIView(APIView):
+    permission_classes = [AllowAny]
 
-    def get_queryset(self):
-        user_slug = self.kwargs["user_slug"]
-        queryset = Service.objects.select_related("user").filter(
-            user__user_slug=user_slug
-        )
-        if not queryset.exists():
+    def get(self, request, user_slug, *args, **kwargs):
+        profile = get_public_profile(user_slug)
+        if not profile["services"]:
             raise NotFound("No services found for this user.")
-        return queryset
+
+        services = []
+        for service in profile["services"]:
+            # Cached without a request, so image URLs are made absolute here
+            if service["featured_img"]:
+                service = {
+                    **service,
+                    "featured_img": request.build_absolute_uri(service["featured_img"]),
+                }
+            services.append(service)
+        return Response(services)
 
 
 # ChatBot
@@ -849,11 +1083,23 @@ class ServicesListAPIView(generics.ListAPIView):
 class GetChatSessionsAPIView(APIView):
     permission_classes = [IsAuthenticated]
 
-    def get(self, reqeust, *args, **kwargs):
+    def get(self, request, *args, **kwargs):
         user = self.request.user
-        sessions = ChatSession.objects.filter(user=user).order_by("-started_at")
-        serializer = ChatSessionsSerializer(sessions, many=True)
-        return Response(serializer.data)
+        latest = ChatMessage.objects.filter(session=OuterRef("pk")).order_by(
+            "-timestamp", "-id"
+        )
+        # Last message is annotated in the same query instead of one query per session
+        sessions = ChatSession.objects.filter(user=user).annotate(
+            last_message=Subquery(latest.values("message")[:1]),
+            last_activity=Coalesce(
+                Subquery(latest.values("timestamp")[:1]), F("started_at")
+            ),
+        )
+
+        paginator = ChatSessionCursorPagination()
+        page = paginator.paginate_queryset(sessions, request, view=self)
+        serializer = ChatSessionsSerializer(page, many=True)
+        return paginator.get_paginated_response(serializer.data)
 
     def post(self, request, *args, **kwargs):
         user = self.request.user
@@ -875,9 +1121,12 @@ class GetChatHistoryAPIView(APIView):
         except ChatSession.DoesNotExist:
             raise NotFound("Chat session not found or you do not have permission.")
 
-        messages = ChatMessage.objects.filter(session=session).order_by("timestamp")
+        paginator = ChatHistoryKeysetPagination()
+        messages = paginator.paginate_queryset(
+            ChatMessage.objects.filter(session=session), request, view=self
+        )
         serializer = ChatMessageSerializer(messages, many=True)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        return paginator.get_paginated_response(serializer.data)
 
     def delete(self, request, *args, **kwargs):
         session_id = self.kwargs.get("id")
@@ -910,19 +1159,88 @@ class SendMessageAPIView(APIView):
             except ChatSession.DoesNotExist:
                 raise NotFound("Chat session not found or you do not have permission.")
 
-            ChatMessage.objects.create(session=session, sender="user", message=user_msg)
+            # Limits are checked before anything is stored or enqueued
+            slot_id = str(uuid.uuid4())
+            if not acquire_chat_slot(user.id, slot_id):
+                raise Throttled(
+                    wait=CONCURRENCY_RETRY_AFTER,
+                    detail="Too many chat requests in progress.",
+                )
+            retry_after = consume_chat_tokens(user.id, estimate_chat_cost(user_msg))
+            if retry_after:
+                release_chat_slot(user.id, slot_id)
+                raise Throttled(wait=retry_after, detail="Chat token limit exceeded.")
 
-            # Use the new AI router logic: pass only the user's message
             try:
-                response_msg = handle_user_input(user_msg, user=user)
-            except Exception as e:
-                return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+                user_chat_msg = ChatMessage.objects.create(
+                    session=session, sender="user", message=user_msg
+                )
+            except Exception:
+                # Nothing will run for this request, give back what it took
+                release_chat_slot(user.id, slot_id)
+                settle_chat_tokens(user.id, estimate_chat_cost(user_msg), 0)
+                raise
+
+            if settings.CHAT_ASYNC_REPLIES:
+                job_id = jobs.create_chat_job(
+                    user.id, session.id, user_chat_msg.id, job_id=slot_id
+                )
+                try:
+                    generate_chat_reply.apply_async(
+                        args=[job_id, user.id, session.id, user_chat_msg.id],
+                        task_id=job_id,
+                    )
+                except BrokerError:
+                    release_chat_slot(user.id, slot_id)
+                    jobs.update_chat_job(job_id, status=jobs.FAILED, error="Queue unavailable")
+                    return Response(
+                        {"error": "Chat is temporarily unavailable, try again later."},
+                        status=status.HTTP_503_SERVICE_UNAVAILABLE,
+                    )
+                return Response(
+                    {
+                        "job_id": job_id,
+                        "message_id": user_chat_msg.id,
+                        "status": jobs.PENDING,
+                    },
+                    status=status.HTTP_202_ACCEPTED,
+                )
 
-            ChatMessage.objects.create(
-                session=session, sender="bot", message=response_msg
-            )
+            try:
+                reply = reply_to_message(session, user_chat_msg)
+            except APITimeoutError as e:
+                return Response({"error": str(e)}, status=status.HTTP_504_GATEWAY_TIMEOUT)
+            except OpenAIError as e:
+                return Response({"error": str(e)}, status=status.HTTP_502_BAD_GATEWAY)
+            finally:
+                release_chat_slot(user.id, slot_id)
 
-            return Response({"response_msg": response_msg}, status=status.HTTP_200_OK)
+            if needs_summary(session):
+                summarize_chat_session.delay(session.id)
+
+            return Response({"response_msg": reply.message}, status=status.HTTP_200_OK)
 
         else:
             return Response(serializer.errors)
+
+
+class ChatJobAPIView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, *args, **kwargs):
+        job = jobs.get_chat_job(self.kwargs.get("job_id"))
+        if job is None or job["user_id"] != request.user.id:
+            raise NotFound("Chat job not found or you do not have permission.")
+
+        data = {"status": job["status"], "message_id": job["message_id"]}
+        if job["status"] == jobs.DONE:
+            try:
+                reply = ChatMessage.objects.get(id=job["reply_id"])
+            except ChatMessage.DoesNotExist:
+                # The session was deleted after the reply was generated
+                raise NotFound("Chat reply no longer exists.")
+            data["reply"] = ChatMessageSerializer(reply).data
+        elif job["status"] == jobs.FAILED:
+            data["error"] = job["error"]
+
+        return Response(data, status=status.HTTP_200_OK)
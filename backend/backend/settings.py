@@ -3,6 +3,7 @@ from datetime import timedelta
 from dotenv import load_dotenv
 from pathlib import Path
 from corsheaders.defaults import default_headers
+from kombu import Exchange, Queue
 
 load_dotenv()
 
@@ -13,6 +14,21 @@ SECRET_KEY = os.getenv("SECRET_KEY")
 
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 
+# Chat memory: how many recent turns a summary always leaves verbatim and how many tokens of
+# older unsummarized messages a session may accumulate before it gets summarized
+CHAT_MEMORY_RECENT_TURNS = 6
+CHAT_MEMORY_SUMMARY_TRIGGER_TOKENS = 1500
+
+# Generate chat replies on the dedicated `chat` Celery queue instead of inside the request
+CHAT_ASYNC_REPLIES = True
+CHAT_REPLY_TIME_LIMIT = 90
+
+# Per-user chat limits (see core/utils/rate_limit.py); a request is charged
+# CHAT_RATE_LIMIT_REQUEST_TOKENS plus an estimate for the message itself
+CHAT_RATE_LIMIT_TOKENS_PER_MINUTE = 20000
+CHAT_RATE_LIMIT_REQUEST_TOKENS = 2000
+CHAT_RATE_LIMIT_MAX_CONCURRENT = 2
+
 DEBUG = os.getenv("DEBUG")
 
 ALLOWED_HOSTS = ['localhost', '127.0.0.1', "backend.local"]
@@ -36,6 +52,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # First, so the timings cover every other middleware
+    'core.middleware.ProfilingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
@@ -46,6 +64,28 @@ MIDDLEWARE = [
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
+# Request profiling (core.middleware.ProfilingMiddleware): Server-Timing headers and
+# per-view histograms, see the request_stats command
+PROFILING_ENABLED = os.getenv("PROFILING_ENABLED", "False") == "True"
+PROFILING_HISTOGRAMS = True
+# Most DB queries a single request to the view may run, enforced in tests by core.testing
+# (`pytest --query-report` lists the current counts). Streaming responses run their queries
+# after the middleware returns and aren't counted.
+QUERY_BUDGETS = {
+    'available-times': 7,
+    'available-times-no-service': 7,
+    'services': 3,
+    'book-appointment': 17,
+    'bookings': 3,
+    'booking-list': 1,
+    'booking-import': 11,
+    'calendar-feed-ics': 1,
+    'dashboard': 4,
+    'slots': 2,
+    'get-all-sessions': 1,
+    'get-messages-for-session': 2,
+}
+
 ROOT_URLCONF = 'backend.urls'
 
 TEMPLATES = [
@@ -95,6 +135,42 @@ AUTH_PASSWORD_VALIDATORS = [
     },
 ]
 
+# Registration verification codes (see core/utils/verification_store.py)
+VERIFICATION_CODE_STORE = "core.utils.verification_store.RedisCodeStore"
+VERIFICATION_CODE_TTL = 10 * 60
+VERIFICATION_RESEND_COOLDOWN = 5 * 60
+VERIFICATION_MAX_ATTEMPTS = 5
+# How long after registering an unverified account can still get and use codes
+VERIFICATION_PENDING_TTL = 7 * 24 * 60 * 60
+
+# Public booking pages (services list, available times): browsers and nginx may reuse a response
+# for this many seconds, then revalidate with the ETag. Today's times change as the clock passes
+# them, so their version also moves every PUBLIC_TIMES_TODAY_BUCKET seconds.
+PUBLIC_BOOKING_MAX_AGE = 15
+PUBLIC_TIMES_TODAY_BUCKET = 5 * 60
+
+# The dashboard snapshot is invalidated on every change, the TTL only bounds how stale the
+# time-based counters (upcoming today / this week) can get
+DASHBOARD_CACHE_TTL = 60
+
+# Calendar apps may reuse the iCalendar feed this long before revalidating with its ETag
+CALENDAR_FEED_MAX_AGE = 5 * 60
+
+BOOKING_IMPORT_MAX_ROWS = 5000
+
+# Preferred password hasher; compare them on the target hardware with `manage.py benchmark_auth`.
+# The rest stay listed so existing hashes still verify and get upgraded on the next login.
+PASSWORD_HASHER = os.getenv("PASSWORD_HASHER", "pbkdf2")
+PASSWORD_HASHER_CHOICES = {
+    "pbkdf2": "django.contrib.auth.hashers.PBKDF2PasswordHasher",
+    "scrypt": "django.contrib.auth.hashers.ScryptPasswordHasher",
+    "argon2": "django.contrib.auth.hashers.Argon2PasswordHasher",
+    "bcrypt": "django.contrib.auth.hashers.BCryptSHA256PasswordHasher",
+}
+PASSWORD_HASHERS = [PASSWORD_HASHER_CHOICES[PASSWORD_HASHER]] + [
+    hasher for name, hasher in PASSWORD_HASHER_CHOICES.items() if name != PASSWORD_HASHER
+]
+
 LANGUAGE_CODE = 'en-us'
 
 TIME_ZONE = 'UTC'
@@ -206,11 +282,94 @@ EMAIL_USE_TLS = True
 EMAIL_HOST_USER = os.getenv("EMAIL_HOST_USER")
 EMAIL_HOST_PASSWORD = os.getenv("EMAIL_HOST_PASSWORD")
 DEFAULT_FROM_EMAIL = os.getenv("EMAIL_HOST_USER")
+# Seconds before a hung SMTP call fails (and the task retries)
+EMAIL_TIMEOUT = 10
+
+# Shared per-worker mail connection (core.utils.mailer): checked with NOOP after this many
+# idle seconds and reopened after this many messages
+MAIL_CONNECTION_CHECK_AFTER = 30
+MAIL_CONNECTION_MAX_MESSAGES = 100
+# How long a sent message's idempotency key is remembered
+MAIL_IDEMPOTENCY_TTL = 2 * 24 * 60 * 60
+# How long a key stays claimed by a send in progress; longer than a send can take, short enough
+# that a crashed worker doesn't hold it for long
+MAIL_IN_FLIGHT_TTL = 60
 
 
 CELERY_BROKER_URL = 'redis://localhost:6379/0'
 CELERY_ACCEPT_CONTENT = ['json']
 CELERY_TASK_SERIALIZER = 'json'
+# Queues, each served by its own worker (see docker-compose.yml) so a slow or bursty
+# queue can't hold up another one:
+#   interactive_mail  emails a user is waiting for right now (concurrency 4, prefetch 1)
+#   bulk_mail         reminder runs and imported booking emails (concurrency 2, prefetch 4)
+#   maintenance       periodic cleanup (concurrency 1)
+#   llm               chat replies and summaries (concurrency 4, prefetch 1)
+CELERY_TASK_QUEUES = tuple(
+    # Own exchange and routing key, otherwise every queue binds to the default ones
+    Queue(name, Exchange(name), routing_key=name)
+    for name in ('interactive_mail', 'bulk_mail', 'maintenance', 'llm')
+)
+CELERY_TASK_DEFAULT_QUEUE = 'maintenance'
+CELERY_TASK_ROUTES = {
+    'core.tasks.send_registration_code': {'queue': 'interactive_mail'},
+    'core.tasks.send_registration_success': {'queue': 'interactive_mail'},
+    'core.tasks.send_booking_verification': {'queue': 'interactive_mail'},
+    'core.tasks.send_appointment_email': {'queue': 'interactive_mail'},
+    # The relay publishes the booking emails, so it runs next to them
+    'core.tasks.relay_outbox': {'queue': 'interactive_mail'},
+    'core.tasks.send_booking_reminder': {'queue': 'bulk_mail'},
+    'core.tasks.send_imported_booking_emails': {'queue': 'bulk_mail'},
+    'core.tasks.delete_expired_codes': {'queue': 'maintenance'},
+    'core.tasks.delete_old_bookings': {'queue': 'maintenance'},
+    'core.tasks.delete_unconfirmed_bookings': {'queue': 'maintenance'},
+    'core.tasks.prune_expired_tokens': {'queue': 'maintenance'},
+    'core.tasks.prune_outbox': {'queue': 'maintenance'},
+    'core.tasks.generate_chat_reply': {'queue': 'llm'},
+    'core.tasks.summarize_chat_session': {'queue': 'llm'},
+}
+CELERY_BEAT_SCHEDULE = {
+    'relay-outbox': {
+        'task': 'core.tasks.relay_outbox',
+        'schedule': timedelta(seconds=5),
+    },
+    # Reminders go out up to 2 hours ahead, was_reminded prevents repeats
+    'send-booking-reminders': {
+        'task': 'core.tasks.send_booking_reminder',
+        'schedule': timedelta(minutes=5),
+    },
+    # Pending bookings expire after 15 minutes
+    'delete-unconfirmed-bookings': {
+        'task': 'core.tasks.delete_unconfirmed_bookings',
+        'schedule': timedelta(minutes=5),
+    },
+    'prune-expired-tokens': {
+        'task': 'core.tasks.prune_expired_tokens',
+        'schedule': timedelta(hours=6),
+    },
+    'delete-old-bookings': {
+        'task': 'core.tasks.delete_old_bookings',
+        'schedule': timedelta(days=1),
+    },
+    'prune-outbox': {
+        'task': 'core.tasks.prune_outbox',
+        'schedule': timedelta(days=1),
+    },
+}
+# Redis codes expire on their own, only the database store leaves rows behind
+if VERIFICATION_CODE_STORE == "core.utils.verification_store.DatabaseCodeStore":
+    CELERY_BEAT_SCHEDULE['delete-expired-codes'] = {
+        'task': 'core.tasks.delete_expired_codes',
+        'schedule': timedelta(hours=1),
+    }
+
+# Transactional outbox (core.utils.outbox)
+# Messages published per relay run
+OUTBOX_BATCH_SIZE = 100
+# A message is given up on after this many failed publish attempts
+OUTBOX_MAX_ATTEMPTS = 10
+# Published messages are kept this long for inspection
+OUTBOX_RETENTION = timedelta(days=7)
 
 # # For Docker
 # CELERY_BROKER_URL = 'redis://redis:6379/0'
@@ -271,7 +430,7 @@ LOGGING = {
 
 # CACHES = {
 #     "default": {
-#         "BACKEND": "django_redis.cache.RedisCache",
+#         "BACKEND": "core.cache.InstrumentedRedisCache",
 #         "LOCATION": "redis://redis:6379/1",
 #         "OPTIONS": {
 #             "CLIENT_CLASS": "django_redis.client.DefaultClient",
@@ -280,7 +439,7 @@ LOGGING = {
 # }
 CACHES = {
     "default": {
-        "BACKEND": "django_redis.cache.RedisCache",
+        "BACKEND": "core.cache.InstrumentedRedisCache",
         "LOCATION": "redis://localhost:6379/1",
         "OPTIONS": {
             "CLIENT_CLASS": "django_redis.client.DefaultClient",
@@ -6,4 +6,10 @@ CELERY_TASK_EAGER_PROPAGATES = True
 CELERY_BROKER_URL = 'memory://'
 CELERY_RESULT_BACKEND = None 
 
-CELERY_BEAT_SCHEDULER = None
\ No newline at end of file
+CELERY_BEAT_SCHEDULER = None
+
+PASSWORD_HASHERS = ['django.contrib.auth.hashers.MD5PasswordHasher']
+
+# Lets core.testing enforce QUERY_BUDGETS
+PROFILING_ENABLED = True
+PROFILING_HISTOGRAMS = False
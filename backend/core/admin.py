@@ -1,13 +1,17 @@
 from django.contrib import admin
-from .models import VerificationLink, VerificationCode, CustomUser, Service, AvailabilitySlot, UnavailableSlot, Booking, ChatSession, ChatMessage, MyDocument
+from .models import VerificationLink, VerificationCode, PendingRegistration, CustomUser, Service, AvailabilitySlot, AvailabilityRule, AvailabilityRuleException, UnavailableSlot, Booking, ChatSession, ChatMessage, MyDocument, OutboxMessage
 
 admin.site.register(VerificationLink)
 admin.site.register(VerificationCode)
+admin.site.register(PendingRegistration)
 admin.site.register(CustomUser)
 admin.site.register(Service)
 admin.site.register(AvailabilitySlot)
+admin.site.register(AvailabilityRule)
+admin.site.register(AvailabilityRuleException)
 admin.site.register(UnavailableSlot)
 admin.site.register(Booking)
 admin.site.register(ChatSession)
 admin.site.register(ChatMessage)
-admin.site.register(MyDocument)
\ No newline at end of file
+admin.site.register(MyDocument)
+admin.site.register(OutboxMessage)
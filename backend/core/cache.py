@@ -0,0 +1,25 @@
+import time
+from django_redis.cache import RedisCache
+from core.utils import profiling
+
+MISSING = object()
+
+
+class InstrumentedRedisCache(RedisCache):
+    """
+    RedisCache that reports reads (hits, misses and time) to the profiled request, if any.
+    """
+
+    def get(self, key, default=None, version=None, client=None):
+        start = time.perf_counter()
+        value = super().get(key, MISSING, version=version, client=client)
+        hit = value is not MISSING
+        profiling.record_cache(int(hit), int(not hit), time.perf_counter() - start)
+        return value if hit else default
+
+    def get_many(self, keys, version=None, client=None):
+        keys = list(keys)
+        start = time.perf_counter()
+        values = super().get_many(keys, version=version, client=client)
+        profiling.record_cache(len(values), len(keys) - len(values), time.perf_counter() - start)
+        return values
@@ -0,0 +1,92 @@
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import check_password, get_hashers, make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections
+from django.test import override_settings
+from rest_framework.test import APIRequestFactory
+
+from api.views import LoginAPIView
+
+PASSWORD = "BenchmarkPassword123!"
+
+
+class Command(BaseCommand):
+    help = "Benchmark password hashers and login throughput (requests/sec per worker)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--iterations", type=int, default=20, help="Hash/check rounds per hasher")
+        parser.add_argument("--requests", type=int, default=50, help="Login requests to send")
+        parser.add_argument("--concurrency", type=int, default=1, help="Parallel login threads")
+        parser.add_argument(
+            "--hasher",
+            choices=list(settings.PASSWORD_HASHER_CHOICES),
+            default=settings.PASSWORD_HASHER,
+            help="Hasher used for the login benchmark",
+        )
+
+    def handle(self, *args, **options):
+        self.benchmark_hashers(options["iterations"])
+
+        hasher = settings.PASSWORD_HASHER_CHOICES[options["hasher"]]
+        with override_settings(PASSWORD_HASHERS=[hasher]):
+            try:
+                make_password(PASSWORD)
+            except ValueError as e:
+                raise CommandError(f"{options['hasher']} is not available: {e}")
+            self.benchmark_login(options["requests"], options["concurrency"], options["hasher"])
+
+    def benchmark_hashers(self, iterations):
+        self.stdout.write(f"Password hashers ({iterations} rounds each):")
+        for hasher in get_hashers():
+            try:
+                encoded = hasher.encode(PASSWORD, hasher.salt())
+            except ValueError:
+                self.stdout.write(f"  {hasher.algorithm:<16} unavailable (library not installed)")
+                continue
+
+            start = time.perf_counter()
+            for _ in range(iterations):
+                check_password(PASSWORD, encoded)
+            per_check = (time.perf_counter() - start) / iterations
+
+            self.stdout.write(
+                f"  {hasher.algorithm:<16} {per_check * 1000:8.1f} ms/check  "
+                f"{1 / per_check:8.1f} checks/sec"
+            )
+
+    def benchmark_login(self, total, concurrency, hasher_name):
+        email = f"benchmark-{uuid.uuid4().hex}@example.invalid"
+        user = get_user_model().objects.create_user(
+            email=email, username="benchmark", password=PASSWORD, is_active=True
+        )
+        # Throttling would cut the benchmark short, everything else is the real view
+        view = LoginAPIView.as_view(throttle_classes=[])
+        factory = APIRequestFactory()
+
+        def login(_):
+            request = factory.post(
+                "/api/auth/login/", {"email": email, "password": PASSWORD}, format="json"
+            )
+            response = view(request)
+            close_old_connections()
+            return response.status_code
+
+        try:
+            start = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=concurrency) as pool:
+                statuses = list(pool.map(login, range(total)))
+            elapsed = time.perf_counter() - start
+        finally:
+            user.delete()
+
+        failed = sum(1 for code in statuses if code != 200)
+        self.stdout.write(
+            f"Login ({hasher_name}, {total} requests, concurrency {concurrency}): "
+            f"{total / elapsed:.1f} req/s total, {total / elapsed / concurrency:.1f} req/s per worker, "
+            f"{elapsed / total * 1000:.1f} ms avg, {failed} failed"
+        )
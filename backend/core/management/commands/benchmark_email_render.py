@@ -0,0 +1,58 @@
+import time
+from datetime import date, datetime, time as dt_time
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from ics import Calendar, Event
+
+from core.utils.notifications import appointment_email, appointment_ics
+
+CUSTOMER = ("Jane Doe", "jane@example.com")
+SERVICE = "Haircut"
+DAY = date(2030, 1, 15)
+START = dt_time(10, 0)
+END = dt_time(10, 45)
+
+
+def ics_library(service_name, start, end):
+    event = Event()
+    event.name = f"Appointment: {service_name}"
+    event.begin = start
+    event.end = end
+    event.location = "Your business location"
+    event.description = f"Your appointment for {service_name}."
+    calendar = Calendar()
+    calendar.events.add(event)
+    return calendar.serialize()
+
+
+class Command(BaseCommand):
+    help = "Benchmark appointment ICS generation (ics library vs. vevent) and email rendering."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--iterations", type=int, default=1000, help="Rounds per benchmark")
+
+    def handle(self, *args, **options):
+        iterations = options["iterations"]
+        start = timezone.make_aware(datetime.combine(DAY, START))
+        end = timezone.make_aware(datetime.combine(DAY, END))
+
+        self.stdout.write(f"Appointment emails ({iterations} rounds each):")
+        self.report("ics library", iterations, lambda: ics_library(SERVICE, start, end))
+        self.report("vevent", iterations, lambda: appointment_ics(CUSTOMER[1], SERVICE, start, end))
+        self.report(
+            "full message",
+            iterations,
+            lambda: appointment_email(CUSTOMER[0], SERVICE, DAY, START, END, CUSTOMER[1]).message(),
+        )
+
+    def report(self, name, iterations, func):
+        func()
+        start = time.perf_counter()
+        for _ in range(iterations):
+            func()
+        per_call = (time.perf_counter() - start) / iterations
+
+        self.stdout.write(
+            f"  {name:<16} {per_call * 1_000_000:8.1f} us/call  {1 / per_call:10.1f} calls/sec"
+        )
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from core.utils.user_cache import cache_metrics, reset_cache_metrics
+
+
+class Command(BaseCommand):
+    help = "Show hit/miss counts of the declared per-user caches."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--reset", action="store_true", help="Clear the counters after printing")
+
+    def handle(self, *args, **options):
+        for name, stats in cache_metrics().items():
+            self.stdout.write(
+                f"{name:<16} {stats['hits']:>8} hits  {stats['misses']:>8} misses  "
+                f"{stats['hit_rate'] * 100:5.1f}% hit rate"
+            )
+        if options["reset"]:
+            reset_cache_metrics()
@@ -0,0 +1,31 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from core.utils.booking_export import FORMATS, bookings_for_export, iter_export
+
+
+class Command(BaseCommand):
+    help = "Stream bookings as CSV or NDJSON, for one provider or everyone."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--format", choices=list(FORMATS), default="csv")
+        parser.add_argument("--user", help="Provider email; every provider when omitted")
+        parser.add_argument("--output", help="File to write to; stdout when omitted")
+
+    def handle(self, *args, **options):
+        user = None
+        if options["user"]:
+            try:
+                user = get_user_model().objects.get(email=options["user"])
+            except get_user_model().DoesNotExist:
+                raise CommandError(f"No user with email {options['user']}")
+
+        chunks = iter_export(
+            bookings_for_export(user), options["format"], include_provider=user is None
+        )
+        if options["output"]:
+            with open(options["output"], "w", newline="", encoding="utf-8") as f:
+                f.writelines(chunks)
+        else:
+            for chunk in chunks:
+                self.stdout.write(chunk, ending="")
@@ -0,0 +1,42 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from core.utils.booking_import import BookingImportError, import_bookings, parse_rows
+
+
+class Command(BaseCommand):
+    help = "Import bookings for a provider from a CSV or JSON file."
+
+    def add_arguments(self, parser):
+        parser.add_argument("file", help="CSV with a header row, or a JSON list of objects")
+        parser.add_argument("--user", required=True, help="Provider email")
+        parser.add_argument("--dry-run", action="store_true", help="Validate only")
+        parser.add_argument(
+            "--send-emails", action="store_true", help="Email customers their confirmations"
+        )
+
+    def handle(self, *args, **options):
+        try:
+            user = get_user_model().objects.get(email=options["user"])
+        except get_user_model().DoesNotExist:
+            raise CommandError(f"No user with email {options['user']}")
+
+        with open(options["file"], encoding="utf-8-sig") as f:
+            content = f.read()
+
+        try:
+            report = import_bookings(
+                user,
+                parse_rows(content, options["file"]),
+                dry_run=options["dry_run"],
+                send_emails=options["send_emails"],
+            )
+        except BookingImportError as e:
+            raise CommandError(str(e))
+
+        for error in report["errors"]:
+            details = "; ".join(f"{field}: {message}" for field, message in error["errors"].items())
+            self.stderr.write(f"Row {error['row']}: {details}")
+
+        verb = "Would create" if options["dry_run"] else "Created"
+        self.stdout.write(f"{verb} {report['created']} bookings, {len(report['errors'])} rows rejected")
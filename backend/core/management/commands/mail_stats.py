@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from core.utils.mailer import mail_metrics, reset_mail_metrics
+
+
+class Command(BaseCommand):
+    help = "Show delivery counts of the mail tasks."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--reset", action="store_true", help="Clear the counters after printing")
+
+    def handle(self, *args, **options):
+        metrics = mail_metrics()
+        self.stdout.write(
+            f"{metrics['sent']:>8} sent  {metrics['failed']:>8} failed  {metrics['rejected']:>8} rejected  "
+            f"{metrics['retried']:>8} retried  {metrics['duplicate']:>8} duplicates skipped  "
+            f"{metrics['avg_ms']:7.1f} ms avg"
+        )
+        if options["reset"]:
+            reset_mail_metrics()
@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from core.utils.profiling import request_metrics, reset_request_metrics
+
+
+class Command(BaseCommand):
+    help = "Show per-view latency and query count histograms recorded by ProfilingMiddleware."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--reset", action="store_true", help="Clear the histograms after printing")
+
+    def handle(self, *args, **options):
+        for view_name, stats in request_metrics().items():
+            self.stdout.write(
+                f"{view_name:<40} {stats['count']:>8} requests  "
+                f"{stats['avg_ms']:8.1f} ms avg  p50 <= {stats['p50_ms']:g} ms  "
+                f"p95 <= {stats['p95_ms']:g} ms  {stats['avg_queries']:6.1f} queries avg  "
+                f"p95 <= {stats['p95_queries']:g} queries"
+            )
+        if options["reset"]:
+            reset_request_metrics()
@@ -0,0 +1,40 @@
+from contextlib import ExitStack
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from core.utils import profiling
+
+
+class ProfilingMiddleware:
+    """
+    Measures wall time, DB queries and time, cache hits and misses and outbound HTTP time per
+    request. Adds them as a Server-Timing header and to the per-view histograms (see the
+    request_stats command). Only installed when PROFILING_ENABLED is on.
+    """
+
+    def __init__(self, get_response):
+        if not settings.PROFILING_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        profile = profiling.RequestProfile()
+        token = profiling.current_profile.set(profile)
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(profile.db_wrapper))
+                response = self.get_response(request)
+        finally:
+            profiling.current_profile.reset(token)
+        profile.finish()
+
+        response["Server-Timing"] = profile.server_timing()
+
+        match = request.resolver_match
+        view_name = match.view_name if match else "unresolved"
+        if settings.PROFILING_HISTOGRAMS:
+            profiling.record_request(view_name, profile)
+        for observer in profiling.observers:
+            observer(view_name, profile)
+        return response
@@ -0,0 +1,17 @@
+# Generated by Django 5.0.4 on 2026-10-19 11:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0004_chatsession_summarized_up_to_chatsession_summary'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='chatmessage',
+            index=models.Index(fields=['session', 'timestamp', 'id'], name='chatmessage_session_ts_idx'),
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 5.0.4 on 2026-10-19 11:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0005_chatmessage_chatmessage_session_ts_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='verificationcode',
+            name='attempts',
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name='verificationcode',
+            index=models.Index(fields=['email'], name='core_verifi_email_a5a8f0_idx'),
+        ),
+    ]
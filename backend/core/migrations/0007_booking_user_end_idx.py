@@ -0,0 +1,32 @@
+# Generated by Django 5.0.4 on 2026-10-19 11:43
+
+from datetime import datetime
+
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def backfill_end_datetime(apps, schema_editor):
+    # Keyset pagination orders by end_datetime, so older rows saved without it need a value
+    Booking = apps.get_model("core", "Booking")
+    pending = Booking.objects.filter(end_datetime__isnull=True).select_related("slot")
+    for booking in pending.iterator():
+        booking.end_datetime = timezone.make_aware(
+            datetime.combine(booking.slot.date, booking.end_time)
+        )
+        booking.save(update_fields=["end_datetime"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0006_verificationcode_attempts_and_more'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_end_datetime, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(fields=['user', '-end_datetime', '-id'], name='booking_user_end_idx'),
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 5.0.4 on 2026-10-19 12:17
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0011_chatmessage_reply_to'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PendingRegistration',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('email', models.EmailField(max_length=254, unique=True)),
+                ('started_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+        ),
+    ]
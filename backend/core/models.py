@@ -1,5 +1,7 @@
 import uuid
-from django.db import models
+from django.db import models, transaction, IntegrityError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q
 from django.utils import timezone
 from datetime import timedelta, datetime
 from django.contrib.auth.models import (
@@ -10,6 +12,7 @@ from django.contrib.auth.models import (
 from backend.settings import AUTH_USER_MODEL
 from django.utils import timezone
 from django.utils.text import slugify
+from core.utils.enums import Weekday
 
 
 # Users
@@ -53,16 +56,42 @@ class CustomUser(AbstractBaseUser, PermissionsMixin):
     def __str__(self):
         return f"{self.email} - {self.username}"
 
+    SLUG_ATTEMPTS = 5
+
+    def next_free_slug(self, base_slug):
+        # One query for the base slug and all of its numbered variants
+        taken = set(
+            CustomUser.objects.filter(
+                Q(user_slug=base_slug) | Q(user_slug__startswith=f"{base_slug}-")
+            ).values_list("user_slug", flat=True)
+        )
+        if base_slug not in taken:
+            return base_slug
+        suffixes = [
+            int(slug[len(base_slug) + 1:])
+            for slug in taken
+            if slug[len(base_slug) + 1:].isdigit()
+        ]
+        return f"{base_slug}-{max(suffixes, default=0) + 1}"
+
     def save(self, *args, **kwargs):
-        if not self.user_slug:
-            base_slug = slugify(self.username)
-            slug = base_slug
-            counter = 1
-            while CustomUser.objects.filter(user_slug=slug).exists():
-                slug = f"{base_slug}-{counter}"
-                counter += 1
-            self.user_slug = slug
-        super().save(*args, **kwargs)
+        if self.user_slug:
+            return super().save(*args, **kwargs)
+
+        base_slug = slugify(self.username)
+        for attempt in range(self.SLUG_ATTEMPTS):
+            self.user_slug = self.next_free_slug(base_slug)
+            try:
+                # Savepoint, so a lost race doesn't break the caller's transaction
+                with transaction.atomic():
+                    return super().save(*args, **kwargs)
+            except IntegrityError:
+                # Another signup took the slug first; anything else is a real error
+                if attempt == self.SLUG_ATTEMPTS - 1 or not CustomUser.objects.filter(
+                    user_slug=self.user_slug
+                ).exists():
+                    self.user_slug = ""
+                    raise
 
 
 # Clients
@@ -101,6 +130,50 @@ class AvailabilitySlot(models.Model):
         return f"{self.user.email}: {self.date} {self.start_time} - {self.end_time}"
 
 
+class AvailabilityRule(models.Model):
+    """
+    Weekly recurring availability, e.g. every Monday 09:00-17:00 from start_date on.
+    Expanded on demand; an AvailabilitySlot row is only created once a booking needs one.
+    """
+
+    user = models.ForeignKey(
+        AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="availability_rules"
+    )
+    weekday = models.CharField(max_length=3, choices=Weekday.choices)
+    start_time = models.TimeField()
+    end_time = models.TimeField()
+    start_date = models.DateField()
+    end_date = models.DateField(blank=True, null=True)
+    is_active = models.BooleanField(default=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ["weekday", "start_time"]
+        indexes = [models.Index(fields=["user", "weekday"])]
+
+    def __str__(self):
+        return f"{self.user_id}: {self.weekday} {self.start_time} - {self.end_time}"
+
+    @property
+    def exception_dates(self):
+        return sorted(exception.date for exception in self.exceptions.all())
+
+
+class AvailabilityRuleException(models.Model):
+    # A date on which the rule doesn't apply
+    rule = models.ForeignKey(
+        AvailabilityRule, on_delete=models.CASCADE, related_name="exceptions"
+    )
+    date = models.DateField()
+
+    class Meta:
+        unique_together = ("rule", "date")
+
+    def __str__(self):
+        return f"{self.rule_id}: skip {self.date}"
+
+
 class UnavailableSlot(models.Model):
     user = models.ForeignKey(
         AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="unavailable_slots"
@@ -146,6 +219,14 @@ class Booking(models.Model):
     email_sent = models.BooleanField(default=False)
     was_reminded = models.BooleanField(default=False)
 
+    class Meta:
+        indexes = [
+            # Keyset pagination of a provider's bookings, latest first
+            models.Index(
+                fields=["user", "-end_datetime", "-id"], name="booking_user_end_idx"
+            ),
+        ]
+
     def start_datetime(self):
         combined = datetime.combine(self.slot.date, self.start_time)
         return timezone.make_aware(combined)
@@ -169,9 +250,13 @@ class VerificationCode(models.Model):
     email = models.EmailField()
     code = models.CharField(max_length=6)
     is_verified = models.BooleanField(default=False)
+    attempts = models.PositiveSmallIntegerField(default=0)
     expiration_date = models.DateTimeField()
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [models.Index(fields=["email"])]
+
     def is_expired(self):
         return timezone.now() > self.expiration_date
 
@@ -183,6 +268,15 @@ class VerificationCode(models.Model):
         return f"Verification Code for - {self.email}"
 
 
+class PendingRegistration(models.Model):
+    # An account waiting for its email to be verified, see core.utils.verification_store
+    email = models.EmailField(unique=True)
+    started_at = models.DateTimeField(default=timezone.now)
+
+    def __str__(self):
+        return f"Pending registration of {self.email}"
+
+
 class VerificationLink(models.Model):
     booking = models.ForeignKey(Booking, on_delete=models.CASCADE)
     email = models.EmailField()
@@ -197,9 +291,50 @@ class VerificationLink(models.Model):
         return f"Verification link for {self.email}"
 
 
+class CalendarFeed(models.Model):
+    # Secret token in the provider's iCalendar subscription URL
+    user = models.OneToOneField(
+        AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="calendar_feed"
+    )
+    token = models.UUIDField(default=uuid.uuid4, unique=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"Calendar feed of {self.user_id}"
+
+
+class OutboxMessage(models.Model):
+    # Celery task call written in the same transaction as the data it's about,
+    # published later by core.tasks.relay_outbox
+    task = models.CharField(max_length=255)
+    kwargs = models.JSONField(default=dict, encoder=DjangoJSONEncoder)
+    idempotency_key = models.CharField(max_length=255, unique=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    available_at = models.DateTimeField(default=timezone.now)
+    sent_at = models.DateTimeField(null=True, blank=True)
+    attempts = models.PositiveIntegerField(default=0)
+    last_error = models.TextField(blank=True, default="")
+
+    class Meta:
+        indexes = [
+            # The relay only ever scans pending messages
+            models.Index(
+                fields=["available_at", "id"],
+                name="outbox_pending_idx",
+                condition=Q(sent_at__isnull=True),
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.task} ({self.idempotency_key})"
+
+
 class ChatSession(models.Model):
     user = models.ForeignKey(CustomUser, on_delete=models.CASCADE)
     started_at = models.DateTimeField(auto_now=True)
+    # Rolling summary of the conversation up to (and including) message `summarized_up_to`
+    summary = models.TextField(blank=True, default="")
+    summarized_up_to = models.BigIntegerField(default=0)
 
     def __str__(self):
         return f'Chat Session for {self.id} - {self.user.username}'
@@ -210,7 +345,16 @@ class ChatMessage(models.Model):
     sender = models.CharField(max_length=10, choices=[("user", "User"), ("bot", "Bot")])
     message = models.TextField()
     timestamp = models.DateTimeField(auto_now_add=True)
-    
+    # The user message a bot message answers; unique, so a redelivered reply task can't add a second one
+    reply_to = models.OneToOneField(
+        "self", on_delete=models.CASCADE, null=True, blank=True, related_name="reply"
+    )
+
+    class Meta:
+        indexes = [
+            # Keyset pagination of chat history walks (session, timestamp, id)
+            models.Index(fields=["session", "timestamp", "id"], name="chatmessage_session_ts_idx"),
+        ]
 
 
 class MyDocument(models.Model):
@@ -0,0 +1,91 @@
+from django.db import transaction
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+from core.models import (
+    CustomUser,
+    Service,
+    AvailabilitySlot,
+    AvailabilityRule,
+    AvailabilityRuleException,
+    UnavailableSlot,
+    Booking,
+)
+from core.utils.principal_cache import bump_auth_version, get_cached_user
+# Declared caches connect their own invalidation receivers on import
+from core.utils import user_cache  # noqa: F401
+from core.utils.provider_cache import (
+    PUBLIC_PROFILE_FIELDS,
+    invalidate_provider_profile,
+    bump_provider_version,
+)
+
+
+def drop_provider_profile(user_slug):
+    invalidate_provider_profile(user_slug)
+    # A public page read while the transaction is open would re-cache the old profile
+    transaction.on_commit(lambda: invalidate_provider_profile(user_slug))
+
+
+@receiver(post_save, sender=CustomUser)
+@receiver(post_delete, sender=CustomUser)
+def invalidate_principal(sender, instance, **kwargs):
+    user_id = instance.pk
+    bump_auth_version(user_id)
+    # Again after commit, so a request racing the transaction can't re-cache the old principal
+    transaction.on_commit(lambda: bump_auth_version(user_id))
+
+
+@receiver(pre_save, sender=CustomUser)
+def track_public_profile_changes(sender, instance, update_fields=None, **kwargs):
+    instance._public_profile_changed = True
+    if instance.pk is None:
+        return
+    fields = [
+        field for field in PUBLIC_PROFILE_FIELDS if update_fields is None or field in update_fields
+    ]
+    old = CustomUser.objects.filter(pk=instance.pk).values(*fields).first() if fields else {}
+    if old is None:
+        return
+    instance._public_profile_changed = any(
+        old[field] != getattr(instance, field) for field in fields
+    )
+    # The profile is keyed by slug, so a renamed user would stay reachable under the old one
+    if old.get("user_slug") and old["user_slug"] != instance.user_slug:
+        drop_provider_profile(old["user_slug"])
+
+
+@receiver(post_save, sender=CustomUser)
+@receiver(post_delete, sender=CustomUser)
+def invalidate_public_profile(sender, instance, signal, **kwargs):
+    if signal is post_save and not getattr(instance, "_public_profile_changed", True):
+        return
+    drop_provider_profile(instance.user_slug)
+    bump_provider_version(instance.pk)
+
+
+@receiver(post_save, sender=Service)
+@receiver(post_delete, sender=Service)
+def invalidate_provider_services(sender, instance, **kwargs):
+    user = get_cached_user(instance.user_id)
+    if user is not None:
+        drop_provider_profile(user.user_slug)
+
+
+@receiver(post_save, sender=Service)
+@receiver(post_delete, sender=Service)
+@receiver(post_save, sender=AvailabilitySlot)
+@receiver(post_delete, sender=AvailabilitySlot)
+@receiver(post_save, sender=AvailabilityRule)
+@receiver(post_delete, sender=AvailabilityRule)
+@receiver(post_save, sender=UnavailableSlot)
+@receiver(post_delete, sender=UnavailableSlot)
+@receiver(post_save, sender=Booking)
+@receiver(post_delete, sender=Booking)
+def bump_public_data_version(sender, instance, **kwargs):
+    bump_provider_version(instance.user_id)
+
+
+@receiver(post_save, sender=AvailabilityRuleException)
+@receiver(post_delete, sender=AvailabilityRuleException)
+def bump_rule_exception_version(sender, instance, **kwargs):
+    bump_provider_version(instance.rule.user_id)
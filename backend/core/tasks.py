@@ -1,158 +1,90 @@
 from celery import shared_task
-from django.core.mail import EmailMessage, send_mail
 from django.conf import settings
-from ics import Calendar, Event
-from io import BytesIO
-from core.models import VerificationCode, Booking
+from core.models import VerificationCode, PendingRegistration, Booking, ChatSession, ChatMessage
+from core.utils.chatbot import jobs
+from core.utils.rate_limit import release_chat_slot
+from core.utils.notifications import appointment_email, build_email
+from core.utils import outbox
+from core.utils.mailer import MailTask, PermanentMailError, deliver
+from rest_framework_simplejwt.token_blacklist.models import OutstandingToken
 from django.utils import timezone
-from datetime import datetime, timedelta
+from datetime import timedelta
 from django.db import transaction
 import logging
 
 logger = logging.getLogger('core')
 
-@shared_task
-def send_appointment_email(customer_name, service_name, appointment_date, start_time, end_time, customer_email):
-    start_datetime = timezone.localtime(
-        timezone.make_aware(
-            datetime.strptime(f"{appointment_date} {start_time}", "%Y-%m-%d %H:%M:%S")
-        )
+@shared_task(base=MailTask, bind=True)
+def send_appointment_email(self, customer_name, service_name, appointment_date, start_time, end_time, customer_email):
+    email = appointment_email(
+        customer_name, service_name, appointment_date, start_time, end_time, customer_email
     )
-    end_datetime = timezone.localtime(
-        timezone.make_aware(
-            datetime.strptime(f"{appointment_date} {end_time}", "%Y-%m-%d %H:%M:%S")
+    if deliver(email, self.idempotency_key()):
+        logger.info(f'Booking email was sent to {customer_email}')
+
+@shared_task(base=MailTask, bind=True)
+def send_imported_booking_emails(self, booking_ids):
+    # One task for a whole import instead of one per booking; a retry skips the
+    # bookings that were already mailed
+    bookings = Booking.objects.filter(id__in=booking_ids).select_related('service', 'slot')
+    sent = 0
+    rejected = []
+    for booking in bookings:
+        email = appointment_email(
+            booking.customer_name,
+            booking.service.name,
+            booking.slot.date,
+            booking.start_time,
+            booking.end_time,
+            booking.customer_email,
         )
-    )
-
-    event = Event()
-    event.name = f"Appointment: {service_name}"
-    event.begin = start_datetime
-    event.end = end_datetime
-    event.location = "Your business location"
-    event.description = f"Your appointment for {service_name}."
-
-    calendar = Calendar()
-    calendar.events.add(event)
-
-    ics_file = BytesIO()
-    ics_file.write(str(calendar).encode('utf-8'))
-    ics_file.seek(0)
-
-    subject = f"Your Appointment with {service_name}"
-    message = f"""
-    <p>Hello {customer_name},</p>
-
-    <p>Thank you for booking your appointment with us!</p>
-
-    <p><strong>Appointment Details:</strong></p>
-    <ul>
-    <li>Service: {service_name}</li>
-    <li>Date: {appointment_date}</li>
-    <li>Start Time: {start_time}</li>
-    <li>End Time: {end_time}</li>
-    </ul>
-
-    <p>We look forward to seeing you!</p>
-
-    <p>If you have any questions or need to reschedule, feel free to contact us.</p>
-
-    <p>Best regards,<br>Clockly Team</p>
-    """
-
-    email = EmailMessage(
-        subject,
-        message,
-        settings.EMAIL_HOST_USER,
-        [customer_email],
-    )
-    email.content_subtype = 'html'
-    filename = f"appointment-{customer_name.replace(' ', '_')}-{appointment_date}.ics"
-    email.attach(filename, ics_file.read(), 'text/calendar')
-
-    email.send(fail_silently=False)
-    logger.info(f'Booking email was sent to {customer_email}')
+        try:
+            sent += deliver(email, self.idempotency_key(booking.id))
+        except PermanentMailError as e:
+            # One bad address must not hold back (or, on retry, repeat) the rest
+            logger.warning(f'Booking email to {booking.customer_email} was rejected: {e}')
+            # Shows the provider which customers weren't notified
+            booking.email_sent = False
+            booking.save(update_fields=['email_sent'])
+            rejected.append(booking.id)
+    logger.info(f'Sent {sent} imported booking emails, {len(rejected)} rejected')
 
 def format_code(code):
     return ' '.join([code[i:i+3] for i in range(0, len(code), 3)])
 
-@shared_task
-def send_registration_code(user_email, security_code):
-    code = format_code(security_code)
+@shared_task(base=MailTask, bind=True)
+def send_registration_code(self, user_email, security_code):
     logger.info("Registration code started")
-    message =  f"""
-        Hello,
-
-        Thanks for registration at Clockly!
-
-        Your registration code is: {code}
-
-        Best regards,
-        Clockly Team
-    """
-    send_mail(
+    email = build_email(
+        'registration_code',
         "Registration Code",
-        message,
-        settings.EMAIL_HOST_USER,
+        {'code': format_code(security_code)},
         [user_email],
-        fail_silently=True,
     )
-    logger.info(f'Registration code was sent to {user_email}')
+    if deliver(email, self.idempotency_key()):
+        logger.info(f'Registration code was sent to {user_email}')
 
-@shared_task 
-def send_registration_success(user_email):
-    subject = "Welcome to Clockly!"
-    message = f"""
-    Hello,
+@shared_task(base=MailTask, bind=True)
+def send_registration_success(self, user_email):
+    email = build_email('registration_success', "Welcome to Clockly!", {}, [user_email])
+    if deliver(email, self.idempotency_key()):
+        logger.info(f"Account was verified with verification code for {user_email}")
 
-    Your account has been successfully verified and activated 🎉
-
-    You can now log in and start using Clockly!
-
-    If you didn’t create this account, please contact our support team immediately.
-
-    Best regards,  
-    The Clockly Team
-    """
-    send_mail(
-        subject,
-        message,
-        settings.EMAIL_HOST_USER,
-        [user_email],
-        fail_silently=True,
-    )
-    logger.info(f"Account was verified with verification code for {user_email}")
-
-@shared_task
-def send_booking_verification(user_email, verification_link):
+@shared_task(base=MailTask, bind=True)
+def send_booking_verification(self, user_email, verification_link):
     logger.info("Booking verification started")
 
-    message = f"""
-        Hello,
-
-        Thank you for booking with Clockly!
-
-        Please verify your booking by clicking the link below:
-
-        {verification_link}
-
-        If you did not make this booking, you can safely ignore this message.
-
-        Best regards,  
-        Clockly Team
-    """
-
-    send_mail(
+    email = build_email(
+        'booking_verification',
         "Verify Your Booking",
-        message,
-        settings.EMAIL_HOST_USER,
+        {'verification_link': verification_link},
         [user_email],
-        fail_silently=True,
     )
+    if deliver(email, self.idempotency_key()):
+        logger.info(f'Booking verification link sent to {user_email}')
 
-    logger.info(f'Booking verification link sent to {user_email}')
 
-
-@shared_task
+@shared_task(base=MailTask)
 def send_booking_reminder(booking=None):
     if not booking is None:
         send_mail_reminder(booking=booking)
@@ -186,16 +118,35 @@ def send_booking_reminder(booking=None):
     logger.info(f'{count} people received booking reminder!')
 
 def send_mail_reminder(booking):
-    subject = f"Reminder: Your booking starts soon"
-    message = f"Dear {booking.user.username},\n\nYour booking for {booking.service} is starting at {booking.start_time}. Please be prepared."
     recipient_list = [booking.user.email]
-    
-    send_mail(subject, message, settings.EMAIL_HOST_USER, recipient_list)
-    logger.info(f'Reminder sent to {recipient_list} for booking {booking.id}')
+    email = build_email(
+        'booking_reminder',
+        "Reminder: Your booking starts soon",
+        {
+            'username': booking.user.username,
+            'service_name': booking.service.name,
+            'start_time': booking.start_time,
+        },
+        recipient_list,
+    )
+    # Keyed by booking, so a retried or overlapping reminder run doesn't mail it twice
+    try:
+        sent = deliver(email, f'booking-reminder-{booking.id}')
+    except PermanentMailError as e:
+        # Retrying can't help, and the other reminders of the run still go out
+        logger.warning(f'Reminder for booking {booking.id} was rejected: {e}')
+        return
+    if sent:
+        logger.info(f'Reminder sent to {recipient_list} for booking {booking.id}')
 
 
 @shared_task
 def delete_expired_codes():
+    # Registrations never verified can't get codes any more either
+    PendingRegistration.objects.filter(
+        started_at__lt=timezone.now() - timedelta(seconds=settings.VERIFICATION_PENDING_TTL)
+    ).delete()
+
     verification_codes_to_delete = VerificationCode.objects.filter(expiration_date__lt=timezone.now())
 
     if not verification_codes_to_delete:
@@ -244,4 +195,80 @@ def delete_unconfirmed_bookings():
 
     bookings_to_delete.delete()
 
-    logger.info(f'{count} pending bookings were removed!')
\ No newline at end of file
+    logger.info(f'{count} pending bookings were removed!')
+
+
+@shared_task
+def summarize_chat_session(session_id):
+    # Imported here so mail/maintenance workers don't load the LLM stack
+    from core.utils.chatbot.memory import update_session_summary
+
+    if update_session_summary(session_id):
+        logger.info(f'Chat session {session_id} summary was updated')
+
+
+@shared_task(acks_late=True, soft_time_limit=settings.CHAT_REPLY_TIME_LIMIT)
+def generate_chat_reply(job_id, user_id, session_id, message_id):
+    # Imported here so mail/maintenance workers don't load the LLM stack
+    from core.utils.chatbot.ai_router import reply_to_message
+    from core.utils.chatbot.memory import needs_summary
+
+    # acks_late means a crashed worker's job is delivered again: reuse a reply that was
+    # already stored, and let only one run call the LLM
+    reply_id = ChatMessage.objects.filter(reply_to_id=message_id).values_list('id', flat=True).first()
+    if reply_id is not None:
+        jobs.update_chat_job(job_id, status=jobs.DONE, reply_id=reply_id)
+        release_chat_slot(user_id, job_id)
+        return
+    if not jobs.claim_chat_job(job_id):
+        logger.info(f'Chat reply for job {job_id} is already being generated')
+        return
+
+    try:
+        session = ChatSession.objects.select_related('user').get(id=session_id)
+        message = ChatMessage.objects.get(id=message_id, session=session)
+        reply = reply_to_message(session, message)
+    except Exception as e:
+        logger.exception(f'Chat reply for job {job_id} failed')
+        jobs.update_chat_job(job_id, status=jobs.FAILED, error=str(e))
+        return
+    finally:
+        # The concurrency slot was taken by SendMessageAPIView under the job id
+        release_chat_slot(user_id, job_id)
+
+    jobs.update_chat_job(job_id, status=jobs.DONE, reply_id=reply.id)
+
+    if needs_summary(session):
+        summarize_chat_session.delay(session.id)
+
+
+@shared_task
+def prune_expired_tokens(batch_size=1000):
+    # Blacklisted rows cascade with their outstanding token
+    time_now = timezone.now()
+    count = 0
+
+    while True:
+        ids = list(
+            OutstandingToken.objects.filter(expires_at__lt=time_now)
+            .values_list('id', flat=True)[:batch_size]
+        )
+        if not ids:
+            break
+        OutstandingToken.objects.filter(id__in=ids).delete()
+        count += len(ids)
+
+    logger.info(f'{count} expired tokens were pruned!')
+
+
+@shared_task
+def relay_outbox(batch_size=None):
+    count = outbox.relay_pending(batch_size)
+    if count:
+        logger.info(f'{count} outbox messages were published')
+
+
+@shared_task
+def prune_outbox():
+    count = outbox.prune_sent()
+    logger.info(f'{count} published outbox messages were removed!')
@@ -0,0 +1,71 @@
+import pytest
+
+"""
+pytest plugin (enabled in pytest.ini) that fails a test when a request it makes runs more DB
+queries than settings.QUERY_BUDGETS allows for the view. Counts come from ProfilingMiddleware, so
+the test settings must have PROFILING_ENABLED on.
+
+A single test can tighten or loosen budgets with @pytest.mark.query_budget({"view-name": n}).
+--query-report prints the most queries seen per view at the end of the run.
+"""
+
+# view name -> most queries seen in this run
+_peaks = {}
+
+
+def pytest_addoption(parser):
+    parser.addoption(
+        "--query-report",
+        action="store_true",
+        help="Print the highest DB query count per view after the run",
+    )
+
+
+def pytest_configure(config):
+    config.addinivalue_line(
+        "markers", "query_budget(budgets): per-view query budgets overriding QUERY_BUDGETS"
+    )
+
+
+def budgets_for(item):
+    from django.conf import settings
+
+    budgets = dict(getattr(settings, "QUERY_BUDGETS", {}))
+    for marker in item.iter_markers("query_budget"):
+        budgets.update(marker.args[0])
+    return budgets
+
+
+@pytest.hookimpl(wrapper=True)
+def pytest_runtest_call(item):
+    from core.utils import profiling
+
+    seen = []
+
+    def observe(view_name, profile):
+        seen.append((view_name, profile.db_queries))
+        _peaks[view_name] = max(_peaks.get(view_name, 0), profile.db_queries)
+
+    profiling.observers.append(observe)
+    try:
+        result = yield
+    finally:
+        profiling.observers.remove(observe)
+
+    budgets = budgets_for(item)
+    over = [
+        f"{view_name} ran {queries} queries, budget is {budgets[view_name]}"
+        for view_name, queries in seen
+        if view_name in budgets and queries > budgets[view_name]
+    ]
+    if over:
+        pytest.fail("Query budget exceeded:\n" + "\n".join(over), pytrace=False)
+    return result
+
+
+def pytest_terminal_summary(terminalreporter, config):
+    if not config.getoption("--query-report") or not _peaks:
+        return
+    terminalreporter.section("DB queries per view (max)")
+    for view_name, queries in sorted(_peaks.items()):
+        terminalreporter.write_line(f"{queries:>4}  {view_name}")
@@ -0,0 +1,18 @@
+from rest_framework_simplejwt import tokens
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings
+from core.utils.revoked_tokens import is_jti_revoked, revoke_jti
+
+
+class RefreshToken(tokens.RefreshToken):
+    """
+    RefreshToken whose blacklist lives in Redis (core.utils.revoked_tokens)
+    instead of the token_blacklist tables.
+    """
+
+    def check_blacklist(self):
+        if is_jti_revoked(self.payload[api_settings.JTI_CLAIM]):
+            raise TokenError("Token is blacklisted")
+
+    def blacklist(self):
+        revoke_jti(self.payload[api_settings.JTI_CLAIM], self.payload["exp"])
@@ -1,10 +1,12 @@
 from datetime import datetime, timedelta
-from core.models import AvailabilitySlot, UnavailableSlot, Booking
+from core.models import UnavailableSlot, Booking
+from core.utils.recurring_availability import availability_windows
 from django.utils import timezone
 
 def generate_available_times(user, date, service_duration):
-    # Get all availability blocks for that day
-    avail_slots = AvailabilitySlot.objects.filter(user=user, date=date, is_active=True)
+    # Get all availability blocks for that day, from slots and weekly rules
+    user_id = getattr(user, "pk", user)
+    windows = availability_windows(user_id, date)
     
     # Get all bookings for that user and day
     bookings = Booking.objects.filter(user=user, slot__date=date)
@@ -15,9 +17,9 @@ def generate_available_times(user, date, service_duration):
     available_times = []
     now = timezone.now()
 
-    for slot in avail_slots:
-        slot_start = timezone.make_aware(datetime.combine(slot.date, slot.start_time))
-        slot_end = timezone.make_aware(datetime.combine(slot.date, slot.end_time))
+    for start_time, end_time in windows:
+        slot_start = timezone.make_aware(datetime.combine(date, start_time))
+        slot_end = timezone.make_aware(datetime.combine(date, end_time))
         current = slot_start
 
         while current + service_duration <= slot_end:
@@ -0,0 +1,117 @@
+import csv
+import json
+from core.models import Booking
+
+"""
+Streaming booking export (CSV or NDJSON).
+
+Rows come from a values_list() projection read through QuerySet.iterator(), which uses a
+server-side cursor on Postgres, and are written out in small batches. Memory stays flat no matter
+how many bookings there are, and the header goes out before the first row is fetched.
+"""
+
+CHUNK_SIZE = 2000
+# Rows per yielded chunk of output
+BATCH_ROWS = 200
+
+FORMATS = {
+    "csv": "text/csv; charset=utf-8",
+    "ndjson": "application/x-ndjson",
+}
+
+# (column, lookup)
+COLUMNS = [
+    ("id", "id"),
+    ("date", "slot__date"),
+    ("start_time", "start_time"),
+    ("end_time", "end_time"),
+    ("status", "status"),
+    ("service", "service__name"),
+    ("customer_name", "customer_name"),
+    ("customer_email", "customer_email"),
+    ("customer_phone", "customer_phone"),
+    ("note", "note"),
+    ("created_at", "created_at"),
+]
+# Added for exports spanning every provider
+PROVIDER_COLUMN = ("provider", "user__email")
+
+
+# Leading characters that make a spreadsheet evaluate the cell as a formula
+FORMULA_PREFIXES = ("=", "+", "-", "@", "\t", "\r")
+
+
+class Echo:
+    # csv.writer target that hands back the formatted line instead of storing it
+    def write(self, value):
+        return value
+
+
+def export_columns(include_provider=False):
+    return [PROVIDER_COLUMN, *COLUMNS] if include_provider else list(COLUMNS)
+
+
+def export_rows(queryset, columns):
+    lookups = [lookup for _, lookup in columns]
+    return queryset.order_by("id").values_list(*lookups).iterator(chunk_size=CHUNK_SIZE)
+
+
+def batched(lines):
+    # Joins lines into larger chunks; the first line goes out on its own so the client
+    # sees data as soon as the cursor returns
+    lines = iter(lines)
+    for first in lines:
+        yield first
+        break
+
+    batch = []
+    for line in lines:
+        batch.append(line)
+        if len(batch) >= BATCH_ROWS:
+            yield "".join(batch)
+            batch = []
+    if batch:
+        yield "".join(batch)
+
+
+def neutralize(value):
+    # Customer-entered text is quoted with a leading ' so it opens as text, not a formula
+    if isinstance(value, str) and value.startswith(FORMULA_PREFIXES):
+        return "'" + value
+    return value
+
+
+def iter_csv(queryset, columns):
+    writer = csv.writer(Echo())
+    yield writer.writerow([name for name, _ in columns])
+    yield from batched(
+        writer.writerow([neutralize(value) for value in row]) for row in export_rows(queryset, columns)
+    )
+
+
+def iter_ndjson(queryset, columns):
+    names = [name for name, _ in columns]
+    yield from batched(
+        json.dumps(dict(zip(names, row)), default=str) + "\n"
+        for row in export_rows(queryset, columns)
+    )
+
+
+def iter_export(queryset, export_format, include_provider=False):
+    """
+    Yields the export of the bookings in queryset as text chunks.
+    """
+    columns = export_columns(include_provider)
+    if export_format == "csv":
+        return iter_csv(queryset, columns)
+    if export_format == "ndjson":
+        return iter_ndjson(queryset, columns)
+    raise ValueError(f"Unknown export format: {export_format}")
+
+
+def bookings_for_export(user=None):
+    # None means every provider's bookings
+    queryset = Booking.objects.all()
+    if user is not None:
+        queryset = queryset.filter(user=user)
+    return queryset
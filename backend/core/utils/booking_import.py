@@ -0,0 +1,276 @@
+import csv
+import io
+import json
+from collections import defaultdict
+from datetime import date, datetime, time
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.utils import timezone
+from core.models import AvailabilitySlot, Booking, Service
+from core.tasks import send_imported_booking_emails
+from core.utils.intervals import IntervalSet
+from core.utils.outbox import enqueue
+from core.utils.provider_cache import bump_provider_version
+from core.utils.recurring_availability import rule_windows
+from core.utils.user_cache import dashboard, slot_list
+
+"""
+Bulk booking import (e.g. when moving from another booking tool).
+
+The provider's services, slots, weekly rules and existing bookings for the whole date range are
+loaded once. Every row is then checked in memory: bookings per date live in an IntervalSet, so
+each overlap check is a binary search, and rows accepted earlier in the same file count too.
+The checks and the bulk_create of the valid rows run in one transaction holding the provider row
+and the calendar rows it read locked; invalid rows come back in a per-row error report.
+"""
+
+User = get_user_model()
+
+BATCH_SIZE = 500
+DEFAULT_STATUS = "confirmed"
+STATUSES = {value for value, _ in Booking.STATUSES}
+
+
+class BookingImportError(ValueError):
+    pass
+
+
+def parse_rows(content, filename=""):
+    """
+    Reads rows from CSV or JSON (a list of objects) text.
+    """
+    if filename.endswith(".json") or content.lstrip().startswith("["):
+        try:
+            rows = json.loads(content)
+        except ValueError as e:
+            raise BookingImportError(f"Invalid JSON: {e}")
+        if not isinstance(rows, list) or not all(isinstance(row, dict) for row in rows):
+            raise BookingImportError("JSON input must be a list of objects.")
+        return rows
+    return list(csv.DictReader(io.StringIO(content)))
+
+
+def parse_row(row, services):
+    """
+    Returns (fields, errors) for one input row.
+    """
+    errors = {}
+    fields = {}
+
+    service = None
+    service_ref = str(row.get("service_id") or row.get("service") or "").strip()
+    if not service_ref:
+        errors["service"] = "Required."
+    elif service_ref.isdigit() and int(service_ref) in services["by_id"]:
+        service = services["by_id"][int(service_ref)]
+    else:
+        service = services["by_name"].get(service_ref.lower())
+        if service is None:
+            errors["service"] = f"Unknown service {service_ref}."
+    fields["service"] = service
+
+    try:
+        fields["date"] = date.fromisoformat(str(row.get("date", "")).strip())
+    except ValueError:
+        errors["date"] = "Use the YYYY-MM-DD format."
+    try:
+        fields["start_time"] = time.fromisoformat(str(row.get("start_time", "")).strip())
+    except ValueError:
+        errors["start_time"] = "Use the HH:MM format."
+
+    for name in ("customer_name", "customer_email"):
+        fields[name] = str(row.get(name) or "").strip()
+        if not fields[name]:
+            errors[name] = "Required."
+    fields["customer_phone"] = str(row.get("customer_phone") or "").strip()
+    # bulk_create doesn't validate, a too long value would fail the whole import
+    for name in ("customer_name", "customer_email", "customer_phone"):
+        if fields[name] and name not in errors:
+            try:
+                Booking._meta.get_field(name).run_validators(fields[name])
+            except ValidationError as e:
+                errors[name] = " ".join(e.messages)
+    fields["note"] = str(row.get("note") or "").strip() or None
+
+    fields["status"] = str(row.get("status") or DEFAULT_STATUS).strip().lower()
+    if fields["status"] not in STATUSES:
+        errors["status"] = f"Choose from {', '.join(sorted(STATUSES))}."
+
+    if service and "date" in fields and "start_time" in fields:
+        start = datetime.combine(fields["date"], fields["start_time"])
+        end = start + service.duration
+        if end.date() != start.date():
+            errors["start_time"] = "The booking must end on the same day."
+        fields["end_time"] = end.time()
+
+    return fields, errors
+
+
+def load_services(user):
+    services = list(Service.objects.filter(user=user))
+    return {
+        "by_id": {service.id: service for service in services},
+        "by_name": {service.name.lower(): service for service in services},
+    }
+
+
+def load_calendar(user, start_date, end_date, for_update=False):
+    """
+    Open windows and booked intervals per date for the range, in three queries. With for_update
+    the slots and bookings read stay locked until the transaction ends.
+    """
+    slot_rows = AvailabilitySlot.objects.filter(user=user, date__range=(start_date, end_date))
+    booking_rows = Booking.objects.filter(user=user, slot__date__range=(start_date, end_date))
+    if for_update:
+        slot_rows = slot_rows.select_for_update()
+        booking_rows = booking_rows.select_for_update(of=("self",))
+
+    slots = defaultdict(list)
+    overridden = defaultdict(set)
+    for slot in slot_rows:
+        overridden[slot.date].add((slot.start_time, slot.end_time))
+        if slot.is_active:
+            slots[slot.date].append(slot)
+
+    windows = defaultdict(list)
+    for day, day_windows in rule_windows(user.id, start_date, end_date).items():
+        windows[day] = [w for w in day_windows if w not in overridden[day]]
+
+    booked = defaultdict(IntervalSet)
+    for day, start, end in booking_rows.values_list("slot__date", "start_time", "end_time"):
+        booked[day].add(start, end)
+
+    return slots, windows, booked
+
+
+def find_slot(fields, slots, windows):
+    """
+    Returns an existing slot or a (start_time, end_time) rule window covering the booking.
+    """
+    start, end = fields["start_time"], fields["end_time"]
+    for slot in slots[fields["date"]]:
+        if slot.start_time <= start and slot.end_time >= end:
+            return slot
+    for window in windows[fields["date"]]:
+        if window[0] <= start and window[1] >= end:
+            return window
+    return None
+
+
+def import_bookings(user, rows, dry_run=False, send_emails=False):
+    """
+    Validates and inserts bookings for the provider.
+
+    Returns {"created": n, "errors": [{"row": i, "errors": {...}}, ...], "dry_run": bool},
+    rows are numbered from 1.
+    """
+    if len(rows) > settings.BOOKING_IMPORT_MAX_ROWS:
+        raise BookingImportError(f"At most {settings.BOOKING_IMPORT_MAX_ROWS} rows per import.")
+
+    services = load_services(user)
+    parsed = [parse_row(row, services) for row in rows]
+    report = {"created": 0, "errors": [], "dry_run": dry_run}
+
+    with transaction.atomic():
+        if not dry_run:
+            # Concurrent imports for the provider wait here; the calendar rows read below stay
+            # locked, so nothing checked against them can change before the inserts
+            User.objects.select_for_update().only("id").get(pk=user.pk)
+        accepted = check_rows(user, parsed, report, for_update=not dry_run)
+
+        report["created"] = len(accepted)
+        if dry_run or not accepted:
+            return report
+
+        accepted = materialize_windows(user, accepted)
+        bookings = Booking.objects.bulk_create(
+            [build_booking(user, fields, slot, send_emails) for fields, slot in accepted],
+            batch_size=BATCH_SIZE,
+        )
+
+        # bulk_create skips signals
+        slot_list.invalidate(user.id)
+        dashboard.invalidate(user.id)
+        bump_provider_version(user.id)
+        if send_emails:
+            booking_ids = [booking.id for booking in bookings]
+            enqueue(
+                send_imported_booking_emails,
+                f"booking-import-{booking_ids[0]}-{booking_ids[-1]}",
+                booking_ids=booking_ids,
+            )
+
+    return report
+
+
+def check_rows(user, parsed, report, for_update=False):
+    """
+    Checks the parsed rows against the calendar and each other, adding failures to the report.
+    Returns the accepted [(fields, slot or rule window), ...].
+    """
+    dates = [fields["date"] for fields, errors in parsed if not errors]
+    if dates:
+        slots, windows, booked = load_calendar(user, min(dates), max(dates), for_update)
+
+    accepted = []
+    for number, (fields, errors) in enumerate(parsed, start=1):
+        if not errors:
+            slot = find_slot(fields, slots, windows)
+            if slot is None:
+                errors["slot"] = "No matching available slot found."
+            elif booked[fields["date"]].overlaps(fields["start_time"], fields["end_time"]):
+                errors["start_time"] = "Time slot already booked."
+        if errors:
+            report["errors"].append({"row": number, "errors": errors})
+            continue
+        booked[fields["date"]].add(fields["start_time"], fields["end_time"])
+        accepted.append((fields, slot))
+    return accepted
+
+
+def materialize_windows(user, accepted):
+    """
+    Creates the slots for the rule windows bookings landed in, and returns accepted with
+    every window replaced by its slot.
+    """
+    needed = {(fields["date"], *slot) for fields, slot in accepted if isinstance(slot, tuple)}
+    if not needed:
+        return accepted
+
+    AvailabilitySlot.objects.bulk_create(
+        [
+            AvailabilitySlot(user=user, date=day, start_time=start, end_time=end)
+            for day, start, end in needed
+        ],
+        ignore_conflicts=True,
+    )
+    created = {
+        (slot.date, slot.start_time, slot.end_time): slot
+        for slot in AvailabilitySlot.objects.filter(
+            user=user, date__in={day for day, _, _ in needed}
+        )
+    }
+    return [
+        (fields, created[(fields["date"], *slot)] if isinstance(slot, tuple) else slot)
+        for fields, slot in accepted
+    ]
+
+
+def build_booking(user, fields, slot, email_sent):
+    return Booking(
+        user=user,
+        service=fields["service"],
+        slot=slot,
+        start_time=fields["start_time"],
+        end_time=fields["end_time"],
+        # Booking.save() normally fills this in, bulk_create doesn't call it
+        end_datetime=timezone.make_aware(datetime.combine(fields["date"], fields["end_time"])),
+        customer_name=fields["customer_name"],
+        customer_email=fields["customer_email"],
+        customer_phone=fields["customer_phone"],
+        note=fields["note"],
+        status=fields["status"],
+        email_sent=email_sent,
+    )
@@ -0,0 +1,59 @@
+from datetime import timedelta
+from django.db import connection
+from core.models import AvailabilitySlot
+from core.utils.enums import Weekday
+from core.utils.provider_cache import bump_provider_version
+from core.utils.user_cache import dashboard, slot_list
+
+"""
+Creates recurring availability (same hours on chosen weekdays over a date range) in one statement.
+
+The raw insert skips model signals, so the caches that depend on slots are invalidated here, once.
+"""
+
+TABLE = AvailabilitySlot._meta.db_table
+
+# One row per date; existing (user, date, start_time, end_time) slots are left untouched
+INSERT_WEEKLY_SLOTS = f"""
+    INSERT INTO {TABLE} (user_id, date, start_time, end_time, is_active, created_at, updated_at)
+    SELECT %s, day, %s, %s, TRUE, NOW(), NOW() FROM unnest(%s::date[]) AS day
+    ON CONFLICT (user_id, date, start_time, end_time) DO NOTHING
+    RETURNING id
+"""
+
+# Weekday values in date.weekday() order (Monday = 0)
+WEEKDAY_INDEX = {value: index for index, value in enumerate(Weekday.values)}
+
+
+def expand_weekdays(days_of_week, start_date, end_date):
+    weekdays = {WEEKDAY_INDEX[day] for day in days_of_week}
+    day = start_date
+    while day <= end_date:
+        if day.weekday() in weekdays:
+            yield day
+        day += timedelta(days=1)
+
+
+def create_weekly_slots(user, days_of_week, start_time, end_time, start_date, end_date):
+    """
+    Returns (created, skipped): the number of new slots and of dates that already had this slot.
+    """
+    dates = list(expand_weekdays(days_of_week, start_date, end_date))
+    if not dates:
+        return 0, 0
+
+    # bulk_create(ignore_conflicts=True) can't tell inserted rows from skipped ones,
+    # RETURNING reports exactly the rows this statement inserted, concurrent ones included
+    with connection.cursor() as cursor:
+        cursor.execute(INSERT_WEEKLY_SLOTS, [user.id, start_time, end_time, dates])
+        created = len(cursor.fetchall())
+
+    if created:
+        invalidate_slot_caches(user.id)
+    return created, len(dates) - created
+
+
+def invalidate_slot_caches(user_id):
+    slot_list.invalidate(user_id)
+    dashboard.invalidate(user_id)
+    bump_provider_version(user_id)
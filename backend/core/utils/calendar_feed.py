@@ -0,0 +1,124 @@
+import uuid
+from datetime import datetime
+from django.core.cache import cache
+from django.utils import timezone
+from core.models import Booking, CalendarFeed
+from core.utils.ical import calendar_footer, calendar_header, vevent
+from core.utils.provider_cache import get_provider_version
+
+"""
+Per-provider iCalendar subscription feed of upcoming bookings.
+
+The body is streamed straight from a server-side cursor, and the finished document is cached
+under the provider's data version (bumped on every booking change) plus the current date, so
+finished bookings drop out once a day. The same value is the feed's ETag.
+"""
+
+FEED_TTL = 15 * 60
+TOKEN_TTL = 60 * 60
+CHUNK_SIZE = 500
+
+EVENT_STATUS = {"pending": "TENTATIVE", "confirmed": "CONFIRMED"}
+
+
+def token_key(token):
+    return f"calendar_feed_token_{token}"
+
+
+def body_key(user_id, version):
+    return f"calendar_feed_body_{user_id}_{version}"
+
+
+def get_or_create_feed(user):
+    feed, _ = CalendarFeed.objects.get_or_create(user=user)
+    return feed
+
+
+def rotate_feed_token(user):
+    """
+    Replaces the feed token, so the old subscription URL stops working.
+    """
+    feed = get_or_create_feed(user)
+    cache.delete(token_key(feed.token))
+    feed.token = uuid.uuid4()
+    feed.save(update_fields=["token"])
+    return feed
+
+
+def feed_user_id(token):
+    """
+    Returns the id of the provider owning the token, or None.
+    """
+    try:
+        token = uuid.UUID(str(token))
+    except ValueError:
+        return None
+
+    user_id = cache.get(token_key(token))
+    if user_id is None:
+        user_id = (
+            CalendarFeed.objects.filter(token=token).values_list("user_id", flat=True).first()
+        )
+        # 0 caches unknown tokens too
+        cache.set(token_key(token), user_id or 0, timeout=TOKEN_TTL)
+    return user_id or None
+
+
+def feed_version(user_id):
+    return f"{get_provider_version(user_id)}-{timezone.localdate():%Y%m%d}"
+
+
+def iter_feed(user_id):
+    now = timezone.now()
+    yield calendar_header("Clockly bookings")
+
+    bookings = (
+        Booking.objects.filter(user_id=user_id, end_datetime__gte=now)
+        .exclude(status="cancelled")
+        .order_by("end_datetime", "id")
+        .values(
+            "id",
+            "start_time",
+            "end_datetime",
+            "status",
+            "customer_name",
+            "customer_email",
+            "customer_phone",
+            "updated_at",
+            "slot__date",
+            "service__name",
+        )
+    )
+    for booking in bookings.iterator(chunk_size=CHUNK_SIZE):
+        start = timezone.make_aware(datetime.combine(booking["slot__date"], booking["start_time"]))
+        contact = ", ".join(
+            value
+            for value in (booking["customer_email"], booking["customer_phone"])
+            if value
+        )
+        yield vevent(
+            uid=f"booking-{booking['id']}@clockly",
+            start=start,
+            end=booking["end_datetime"],
+            summary=f"{booking['service__name']}: {booking['customer_name']}",
+            stamp=booking["updated_at"],
+            description=contact,
+            status=EVENT_STATUS.get(booking["status"]),
+        )
+
+    yield calendar_footer()
+
+
+def get_cached_feed(user_id, version):
+    return cache.get(body_key(user_id, version))
+
+
+def stream_feed(user_id, version):
+    """
+    Yields the feed and caches the complete body once the last chunk has been sent.
+    """
+    parts = []
+    for chunk in iter_feed(user_id):
+        parts.append(chunk)
+        yield chunk
+    cache.set(body_key(user_id, version), "".join(parts), timeout=FEED_TTL)
@@ -1,13 +1,19 @@
+from typing import Optional
+from django.db import IntegrityError, transaction
+from core.models import ChatSession, ChatMessage
 from .event_chain import process_calendar_request
 from .rag import get_relevant_chunks, send_prompt
+from .memory import build_history
+from core.utils.rate_limit import estimate_chat_cost, measure_chat_usage, settle_chat_tokens
 
 """
 Main AI router: decides whether to use event extraction or RAG for a given user input.
 """
 
-def handle_user_input(user_input: str, user: object) -> str:
+def handle_user_input(user_input: str, user: object, history: Optional[list] = None) -> str:
     """
     Routes user input to either the event extraction chain or RAG, depending on intent.
+    `history` is the session memory (summary + recent turns) from memory.build_history.
     Returns the assistant's response as a string.
     """
     # Try event extraction chain first
@@ -26,5 +32,28 @@ def handle_user_input(user_input: str, user: object) -> str:
         )
     }
     user_message = {"role": "user", "content": f"Context:\n{context}\n\nQuestion: {user_input}"}
-    answer = send_prompt([system_message, user_message])
-    return answer 
\ No newline at end of file
+    answer = send_prompt([system_message, *(history or []), user_message])
+    return answer
+
+
+def reply_to_message(session: ChatSession, message: ChatMessage) -> ChatMessage:
+    """
+    Generates the assistant's reply to a stored user message and saves it as a bot ChatMessage.
+    The user's token bucket is settled against the tokens the reply actually used.
+    """
+    history = build_history(session, exclude_id=message.id)
+    with measure_chat_usage() as usage:
+        try:
+            response_msg = handle_user_input(message.message, user=session.user, history=history)
+        finally:
+            settle_chat_tokens(
+                session.user_id, estimate_chat_cost(message.message), usage["total_tokens"]
+            )
+    try:
+        with transaction.atomic():
+            return ChatMessage.objects.create(
+                session=session, sender="bot", message=response_msg, reply_to=message
+            )
+    except IntegrityError:
+        # A concurrent run answered first, keep its reply
+        return ChatMessage.objects.get(reply_to=message)
@@ -1,7 +1,9 @@
 from typing import Optional, Literal, Union
 from datetime import datetime
 from pydantic import BaseModel, Field
-from openai import OpenAI
+from openai import DefaultHttpxClient, OpenAI
+from core.utils.profiling import TimedTransport
+from core.utils.rate_limit import record_chat_usage
 from core.models import Service, AvailabilitySlot, Booking
 from django.shortcuts import get_object_or_404
 import os
@@ -10,7 +12,11 @@ import os
 Event extraction and confirmation chain utilities for calendar/event requests.
 """
 
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+client = OpenAI(
+    api_key=os.getenv("OPENAI_API_KEY"),
+    # Times the calls for ProfilingMiddleware
+    http_client=DefaultHttpxClient(transport=TimedTransport()),
+)
 model = "gpt-4o"
 
 # --------------------------------------------------------------
@@ -174,6 +180,7 @@ def extract_event_info(user_input: str) -> EventExtraction:
         ],
         response_format=EventExtraction,
     )
+    record_chat_usage(completion.usage)
     result = completion.choices[0].message.parsed
     print(
         f"[INFO] Extraction complete - Is calendar event: {result.is_service_event}, Confidence: {result.confidence_score:.2f}"
@@ -197,6 +204,7 @@ def parse_details(description: str) -> UserAction:
         ],
         response_format=UserAction,
     )
+    record_chat_usage(completion.usage)
     result = completion.choices[0].message.parsed
     return result
 
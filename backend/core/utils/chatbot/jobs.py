@@ -0,0 +1,109 @@
+import json
+import time
+import uuid
+from typing import Optional
+from django.conf import settings
+from django_redis import get_redis_connection
+
+"""
+State for asynchronous chat replies. A job is created when the user message is stored and
+is finished by the `generate_chat_reply` task on the chat queue; clients poll it by id.
+
+Jobs are Redis hashes with JSON-encoded fields, so an update only writes the fields it changes
+and concurrent updates can't overwrite each other.
+"""
+
+JOB_TTL = 60 * 60
+
+PENDING = "pending"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+# HSET only if the job still exists, an expired job must not come back half-filled
+UPDATE_SCRIPT = """
+if redis.call('EXISTS', KEYS[1]) == 0 then
+    return 0
+end
+redis.call('HSET', KEYS[1], unpack(ARGV))
+return 1
+"""
+
+# pending -> running, or taking over a run whose worker died (claimed longer ago than the
+# task's time limit)
+CLAIM_SCRIPT = """
+local status = redis.call('HGET', KEYS[1], 'status')
+if not status then
+    return 0
+end
+local claimed_at = tonumber(redis.call('HGET', KEYS[1], 'claimed_at')) or 0
+local now = tonumber(ARGV[3])
+if status == ARGV[1] or (status == ARGV[2] and now - claimed_at > tonumber(ARGV[4])) then
+    redis.call('HSET', KEYS[1], 'status', ARGV[2], 'claimed_at', ARGV[3])
+    return 1
+end
+return 0
+"""
+
+_scripts = {}
+
+
+def _script(name, source):
+    if name not in _scripts:
+        _scripts[name] = get_redis_connection("default").register_script(source)
+    return _scripts[name]
+
+
+def job_key(job_id: str) -> str:
+    return f"chat_job_{job_id}"
+
+
+def _encode(fields: dict) -> list:
+    return [part for name, value in fields.items() for part in (name, json.dumps(value))]
+
+
+def create_chat_job(
+    user_id: int, session_id: int, message_id: int, job_id: Optional[str] = None
+) -> str:
+    job_id = job_id or str(uuid.uuid4())
+    fields = {
+        "status": PENDING,
+        "user_id": user_id,
+        "session_id": session_id,
+        "message_id": message_id,
+        "reply_id": None,
+        "error": None,
+        "claimed_at": 0,
+    }
+    pipe = get_redis_connection("default").pipeline()
+    pipe.hset(job_key(job_id), mapping={name: json.dumps(value) for name, value in fields.items()})
+    pipe.expire(job_key(job_id), JOB_TTL)
+    pipe.execute()
+    return job_id
+
+
+def get_chat_job(job_id: str) -> Optional[dict]:
+    raw = get_redis_connection("default").hgetall(job_key(job_id))
+    if not raw:
+        return None
+    return {name.decode(): json.loads(value) for name, value in raw.items()}
+
+
+def update_chat_job(job_id: str, **fields) -> None:
+    _script("update", UPDATE_SCRIPT)(keys=[job_key(job_id)], args=_encode(fields))
+
+
+def claim_chat_job(job_id: str) -> bool:
+    """
+    Marks the job running for this worker. False if another run has it (or it is finished).
+    """
+    claimed = _script("claim", CLAIM_SCRIPT)(
+        keys=[job_key(job_id)],
+        args=[
+            json.dumps(PENDING),
+            json.dumps(RUNNING),
+            time.time(),
+            settings.CHAT_REPLY_TIME_LIMIT + 30,
+        ],
+    )
+    return bool(claimed)
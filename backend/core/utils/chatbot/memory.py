@@ -0,0 +1,119 @@
+from django.conf import settings
+from django.db.models import Sum
+from django.db.models.functions import Length
+from core.models import ChatSession, ChatMessage
+from core.utils.send_prompt import get_gpt_response
+
+"""
+Session memory for the chatbot: a rolling summary stored on ChatSession plus the messages after it
+verbatim. Summary runs fold in everything but the last N turns.
+"""
+
+# Rough chars-per-token ratio for English text, good enough for budgeting
+CHARS_PER_TOKEN = 4
+
+ROLES = {"user": "user", "bot": "assistant"}
+
+
+def recent_window() -> int:
+    # A turn is one user message plus one bot reply
+    return settings.CHAT_MEMORY_RECENT_TURNS * 2
+
+
+def build_history(session: ChatSession, exclude_id: int = None) -> list:
+    """
+    Returns the conversation context for the next prompt: the rolling summary (if any)
+    followed by every unsummarized message, oldest first. Their size is bounded by the
+    summary trigger, see needs_summary.
+    """
+    qs = session.messages.filter(id__gt=session.summarized_up_to)
+    if exclude_id is not None:
+        qs = qs.exclude(id=exclude_id)
+    recent = list(qs.order_by("id").values("sender", "message"))
+
+    history = []
+    if session.summary:
+        history.append(
+            {
+                "role": "system",
+                "content": f"Summary of the earlier conversation:\n{session.summary}",
+            }
+        )
+    history.extend(
+        {"role": ROLES.get(m["sender"], "user"), "content": m["message"]}
+        for m in recent
+    )
+    return history
+
+
+def window_start_id(session: ChatSession):
+    """
+    Id of the oldest message in the recent window, or None while the session is shorter than it.
+    """
+    window = session.messages.order_by("-id").values_list("id", flat=True)
+    return window[recent_window() - 1 : recent_window()].first()
+
+
+def unsummarized_tokens(session: ChatSession) -> int:
+    # Only messages a summary run could fold in: the recent window always stays verbatim
+    start_id = window_start_id(session)
+    if start_id is None:
+        return 0
+    total = session.messages.filter(
+        id__gt=session.summarized_up_to, id__lt=start_id
+    ).aggregate(chars=Sum(Length("message")))["chars"]
+    return (total or 0) // CHARS_PER_TOKEN
+
+
+def needs_summary(session: ChatSession) -> bool:
+    return unsummarized_tokens(session) > settings.CHAT_MEMORY_SUMMARY_TRIGGER_TOKENS
+
+
+def update_session_summary(session_id: int) -> bool:
+    """
+    Folds every unsummarized message older than the recent window into the session summary.
+    Returns True if the summary was updated.
+    """
+    try:
+        session = ChatSession.objects.get(id=session_id)
+    except ChatSession.DoesNotExist:
+        return False
+
+    start_id = window_start_id(session)
+    if start_id is None:
+        return False
+
+    pending = list(
+        ChatMessage.objects.filter(
+            session=session,
+            id__gt=session.summarized_up_to,
+            id__lt=start_id,
+        )
+        .order_by("id")
+        .values("id", "sender", "message")
+    )
+    if not pending:
+        return False
+
+    transcript = "\n".join(f"{m['sender']}: {m['message']}" for m in pending)
+    messages = [
+        {
+            "role": "system",
+            "content": (
+                "You maintain a running summary of a conversation between a Clockly user and the assistant. "
+                "Merge the new messages into the current summary. Keep names, dates, times, services and any "
+                "decisions or open questions. Reply with the updated summary only, in under 200 words."
+            ),
+        },
+        {
+            "role": "user",
+            "content": f"Current summary:\n{session.summary or '(empty)'}\n\nNew messages:\n{transcript}",
+        },
+    ]
+    summary = get_gpt_response(messages)
+
+    # Guard against a concurrent run that already moved the pointer
+    updated = ChatSession.objects.filter(
+        id=session.id, summarized_up_to=session.summarized_up_to
+    ).update(summary=summary, summarized_up_to=pending[-1]["id"])
+    return bool(updated)
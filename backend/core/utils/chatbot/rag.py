@@ -9,7 +9,9 @@ import numpy as np
 from urllib.parse import urlparse, urljoin
 import requests
 import os
-from openai import OpenAI
+from openai import DefaultHttpxClient, OpenAI
+from core.utils.profiling import TimedTransport
+from core.utils.rate_limit import record_chat_usage
 from core.utils.chatbot.event_chain import tool_schemas
 
 # Add for JS rendering
@@ -23,7 +25,11 @@ except ImportError:
 RAG (Retrieval-Augmented Generation) utilities for embedding, chunking, retrieval, and prompt sending.
 """
 
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+client = OpenAI(
+    api_key=os.getenv("OPENAI_API_KEY"),
+    # Times the calls for ProfilingMiddleware
+    http_client=DefaultHttpxClient(transport=TimedTransport()),
+)
 
 class CustomWebBaseLoader(WebBaseLoader):
     def _scrape(self, url: str, parser: Union[str, None] = None, bs_kwargs: Optional[dict] = None) -> Any:
@@ -156,4 +162,5 @@ def send_prompt(messages):
         tools=tool_schemas,
         tool_choice="auto",
     )
+    record_chat_usage(response.usage)
     return response.choices[0].message.content 
\ No newline at end of file
@@ -0,0 +1,62 @@
+from datetime import datetime, time, timedelta
+from django.db.models import Count, Q
+from django.utils import timezone
+from api.serializers import (
+    AvailabilitySlotSerializer,
+    BookingClientSerializer,
+    ServiceSerializer,
+    UserSerializer,
+)
+from core.models import Service, AvailabilitySlot, Booking
+from core.utils.user_cache import dashboard
+
+"""
+Dashboard snapshot: the latest services, slots and bookings plus booking counters.
+
+Every read is bounded (top-N with the relations it serializes joined in, and one aggregate for
+all counters), so the cost doesn't grow with the account's history. The result is cached per
+user and invalidated by the `dashboard` UserCache.
+"""
+
+RECENT_ITEMS = 3
+
+
+def booking_summary(user):
+    """
+    Upcoming bookings today and this week (Monday to Sunday) and pending confirmations,
+    in a single query.
+    """
+    now = timezone.localtime()
+    today = now.date()
+    tomorrow = timezone.make_aware(datetime.combine(today + timedelta(days=1), time.min))
+    next_week = timezone.make_aware(
+        datetime.combine(today + timedelta(days=7 - today.weekday()), time.min)
+    )
+
+    upcoming = Q(end_datetime__gte=now) & ~Q(status="cancelled")
+    return Booking.objects.filter(user=user).aggregate(
+        upcoming_today=Count("id", filter=upcoming & Q(end_datetime__lt=tomorrow)),
+        upcoming_this_week=Count("id", filter=upcoming & Q(end_datetime__lt=next_week)),
+        pending_confirmations=Count("id", filter=Q(status="pending")),
+    )
+
+
+def build_dashboard(user):
+    services = Service.objects.filter(user=user).order_by("-created_at")[:RECENT_ITEMS]
+    slots = AvailabilitySlot.objects.filter(user=user).order_by("-date")[:RECENT_ITEMS]
+    bookings = (
+        Booking.objects.filter(user=user)
+        .select_related("service")
+        .order_by("-end_datetime")[:RECENT_ITEMS]
+    )
+    return {
+        "User": UserSerializer(user).data,
+        "Services": ServiceSerializer(services, many=True).data,
+        "Slots": AvailabilitySlotSerializer(slots, many=True).data,
+        "Bookings": BookingClientSerializer(bookings, many=True).data,
+        "Summary": booking_summary(user),
+    }
+
+
+def get_dashboard(user):
+    return dashboard.get_or_set(user.id, lambda: build_dashboard(user))
@@ -0,0 +1,86 @@
+from datetime import timezone as dt_timezone
+
+"""
+Minimal RFC 5545 writer that produces iCalendar text line by line, so large calendars can be
+streamed without building an ics.Calendar object graph in memory.
+"""
+
+CRLF = "\r\n"
+PRODID = "-//Clockly//Bookings//EN"
+
+
+def escape_text(value):
+    return (
+        str(value)
+        .replace("\\", "\\\\")
+        .replace(";", "\\;")
+        .replace(",", "\\,")
+        .replace("\r\n", "\\n")
+        .replace("\n", "\\n")
+    )
+
+
+def format_datetime(value):
+    # Always UTC, so the feed needs no VTIMEZONE blocks
+    return value.astimezone(dt_timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+
+
+def fold(line):
+    """
+    Folds a content line to 75 octets, continuation lines start with a space.
+    """
+    encoded = line.encode("utf-8")
+    if len(encoded) <= 75:
+        return line + CRLF
+
+    parts = []
+    limit = 75
+    while encoded:
+        cut = min(limit, len(encoded))
+        # Don't split a multi-byte character
+        while cut < len(encoded) and (encoded[cut] & 0xC0) == 0x80:
+            cut -= 1
+        parts.append(encoded[:cut].decode("utf-8"))
+        encoded = encoded[cut:]
+        limit = 74
+    return (CRLF + " ").join(parts) + CRLF
+
+
+def calendar_header(name):
+    return "".join(
+        fold(line)
+        for line in (
+            "BEGIN:VCALENDAR",
+            "VERSION:2.0",
+            f"PRODID:{PRODID}",
+            "CALSCALE:GREGORIAN",
+            "METHOD:PUBLISH",
+            f"X-WR-CALNAME:{escape_text(name)}",
+        )
+    )
+
+
+def calendar_footer():
+    return "END:VCALENDAR" + CRLF
+
+
+def vevent(uid, start, end, summary, stamp, description="", location="", status=None):
+    """
+    Serializes one VEVENT. start, end and stamp are aware datetimes.
+    """
+    lines = [
+        "BEGIN:VEVENT",
+        f"UID:{uid}",
+        f"DTSTAMP:{format_datetime(stamp)}",
+        f"DTSTART:{format_datetime(start)}",
+        f"DTEND:{format_datetime(end)}",
+        f"SUMMARY:{escape_text(summary)}",
+    ]
+    if description:
+        lines.append(f"DESCRIPTION:{escape_text(description)}")
+    if location:
+        lines.append(f"LOCATION:{escape_text(location)}")
+    if status:
+        lines.append(f"STATUS:{status}")
+    lines.append("END:VEVENT")
+    return "".join(fold(line) for line in lines)
@@ -0,0 +1,38 @@
+from bisect import bisect_left
+
+"""
+Set of half-open intervals kept as sorted, disjoint runs, with O(log n) overlap checks.
+"""
+
+
+class IntervalSet:
+    def __init__(self, intervals=()):
+        self.starts = []
+        self.ends = []
+        for start, end in sorted(intervals):
+            self.add(start, end)
+
+    def overlaps(self, start, end):
+        """
+        True if [start, end) intersects any interval in the set.
+        """
+        i = bisect_left(self.starts, end)
+        # The only candidate is the last run starting before `end`
+        return i > 0 and self.ends[i - 1] > start
+
+    def add(self, start, end):
+        """
+        Adds [start, end), merging it with the runs it touches or overlaps.
+        """
+        lo = bisect_left(self.ends, start)
+        hi = lo
+        while hi < len(self.starts) and self.starts[hi] <= end:
+            hi += 1
+        if lo < hi:
+            start = min(start, self.starts[lo])
+            end = max(end, self.ends[hi - 1])
+        self.starts[lo:hi] = [start]
+        self.ends[lo:hi] = [end]
+
+    def __len__(self):
+        return len(self.starts)
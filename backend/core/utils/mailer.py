@@ -0,0 +1,191 @@
+import os
+import smtplib
+import time
+from celery import Task
+from celery.signals import worker_process_shutdown
+from django.conf import settings
+from django.core.cache import cache
+from django.core.mail import get_connection
+from django_redis import get_redis_connection
+
+"""
+Mail delivery for Celery tasks.
+
+Each worker process keeps one mail connection open and reuses it for every message, instead of
+an SMTP handshake (and TLS negotiation) per email. A connection that sat idle is checked with
+NOOP before use and reopened if the server dropped it, and it is recycled after
+MAIL_CONNECTION_MAX_MESSAGES messages.
+
+A message sent under an idempotency key first claims the key in the cache, and the key is marked
+sent once the server accepted the message, so a redelivered, retried or concurrent task doesn't
+send it again. Only transient failures (connection errors, timeouts, 4xx replies) are retried;
+a 5xx reply or refused recipient won't change on retry and is raised as PermanentMailError.
+Delivery counts and time are kept in a Redis hash, see mail_metrics().
+"""
+
+METRICS_KEY = "mail_metrics"
+OUTCOMES = ("sent", "failed", "rejected", "duplicate", "retried")
+
+IN_FLIGHT = "in_flight"
+SENT = "sent"
+
+
+class TransientMailError(Exception):
+    pass
+
+
+class PermanentMailError(Exception):
+    pass
+
+# Process-local connection state
+_state = {"backend": None, "pid": None, "last_used": 0.0, "messages": 0}
+
+
+def sent_key(idempotency_key):
+    return f"mail_sent_{idempotency_key}"
+
+
+def close_connection():
+    backend = _state["backend"]
+    _state["backend"] = None
+    if backend is not None:
+        try:
+            backend.close()
+        except Exception:
+            pass
+
+
+def is_healthy(backend):
+    smtp = getattr(backend, "connection", None)
+    if smtp is None:
+        # Not SMTP (e.g. the locmem backend in tests), nothing can go stale
+        return True
+    try:
+        return smtp.noop()[0] == 250
+    except (smtplib.SMTPException, OSError):
+        return False
+
+
+def get_mail_connection():
+    """
+    Returns this process's open mail connection, reconnecting when needed.
+    """
+    backend = _state["backend"]
+    # A forked worker child must not share its parent's socket
+    if backend is not None and _state["pid"] != os.getpid():
+        _state["backend"] = backend = None
+    if backend is not None and _state["messages"] >= settings.MAIL_CONNECTION_MAX_MESSAGES:
+        close_connection()
+        backend = None
+    idle = time.monotonic() - _state["last_used"]
+    if backend is not None and idle > settings.MAIL_CONNECTION_CHECK_AFTER and not is_healthy(backend):
+        close_connection()
+        backend = None
+
+    if backend is None:
+        backend = get_connection(fail_silently=False)
+        backend.open()
+        _state.update(backend=backend, pid=os.getpid(), messages=0, last_used=time.monotonic())
+    return backend
+
+
+def is_transient(exc):
+    if isinstance(exc, smtplib.SMTPRecipientsRefused):
+        return all(400 <= code < 500 for code, _ in exc.recipients.values())
+    if isinstance(exc, smtplib.SMTPResponseException):
+        return 400 <= exc.smtp_code < 500
+    # Disconnects, connection errors and timeouts; other SMTPExceptions are protocol errors
+    return isinstance(exc, (smtplib.SMTPServerDisconnected, OSError))
+
+
+def deliver(message, idempotency_key=None):
+    """
+    Sends an EmailMessage over the shared connection. Returns False if the message was already
+    sent under idempotency_key. Raises TransientMailError for the calling task to retry and
+    PermanentMailError when retrying can't help.
+    """
+    key = sent_key(idempotency_key) if idempotency_key else None
+    if key and not cache.add(key, IN_FLIGHT, timeout=settings.MAIL_IN_FLIGHT_TTL):
+        if cache.get(key) == IN_FLIGHT:
+            # Another worker is sending it right now; check again once it's done
+            raise TransientMailError(f"{idempotency_key} is being sent")
+        record("duplicate")
+        return False
+
+    start = time.perf_counter()
+    try:
+        message.connection = get_mail_connection()
+        message.send()
+    except Exception as e:
+        if key:
+            cache.delete(key)
+        # The connection may be half broken, start the retry on a fresh one
+        close_connection()
+        if is_transient(e):
+            record("failed")
+            raise TransientMailError(str(e)) from e
+        record("rejected")
+        raise PermanentMailError(str(e)) from e
+    _state["last_used"] = time.monotonic()
+    _state["messages"] += 1
+
+    if key:
+        cache.set(key, SENT, timeout=settings.MAIL_IDEMPOTENCY_TTL)
+    record("sent", time.perf_counter() - start)
+    return True
+
+
+class MailTask(Task):
+    """
+    Base for tasks that send email: retries TransientMailError with exponential backoff and
+    jitter. Acked late, so a message lost with a crashed worker is
+    redelivered and the idempotency key stops it from going out twice.
+    """
+
+    autoretry_for = (TransientMailError,)
+    retry_backoff = 5
+    retry_backoff_max = 600
+    retry_jitter = True
+    max_retries = 8
+    acks_late = True
+
+    def idempotency_key(self, *parts):
+        # The task id survives retries and redelivery; outbox messages publish with their
+        # own key as the id. Direct calls have no id and aren't deduplicated.
+        if not self.request.id:
+            return None
+        return ":".join([self.name, self.request.id, *map(str, parts)])
+
+    def on_retry(self, exc, task_id, args, kwargs, einfo):
+        record("retried")
+
+
+@worker_process_shutdown.connect
+def close_on_shutdown(**kwargs):
+    close_connection()
+
+
+def record(outcome, seconds=None):
+    redis = get_redis_connection("default")
+    redis.hincrby(METRICS_KEY, outcome, 1)
+    if seconds is not None:
+        redis.hincrbyfloat(METRICS_KEY, "seconds", seconds)
+
+
+def mail_metrics():
+    """
+    Returns {"sent": n, "failed": n, "rejected": n, "duplicate": n, "retried": n,
+    "avg_ms": float}. "failed" counts transient failures, "rejected" permanent ones.
+    """
+    raw = get_redis_connection("default").hgetall(METRICS_KEY)
+    values = {k.decode(): float(v) for k, v in raw.items()}
+
+    metrics = {outcome: int(values.get(outcome, 0)) for outcome in OUTCOMES}
+    metrics["avg_ms"] = (
+        values.get("seconds", 0.0) / metrics["sent"] * 1000 if metrics["sent"] else 0.0
+    )
+    return metrics
+
+
+def reset_mail_metrics():
+    get_redis_connection("default").delete(METRICS_KEY)
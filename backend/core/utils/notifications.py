@@ -0,0 +1,105 @@
+import hashlib
+from datetime import date, datetime, time
+from functools import lru_cache
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives
+from django.template.loader import get_template
+from django.utils import timezone
+from core.utils.ical import calendar_footer, calendar_header, vevent
+
+"""
+Transactional email rendering.
+
+Every email has a plain-text and an HTML template under templates/emails/<name>.txt|.html. The
+compiled Template objects are kept per worker process, so a send only renders. Appointment
+invitations are written with the minimal VEVENT serializer from core.utils.ical instead of
+building an ics.Calendar per message.
+"""
+
+CALENDAR_NAME = "Clockly appointment"
+EVENT_LOCATION = "Your business location"
+
+
+@lru_cache(maxsize=None)
+def email_templates(name):
+    return get_template(f"emails/{name}.txt"), get_template(f"emails/{name}.html")
+
+
+def render_email(name, context):
+    """
+    Returns (text, html) bodies for the email template name.
+    """
+    text_template, html_template = email_templates(name)
+    return text_template.render(context).strip() + "\n", html_template.render(context)
+
+
+def build_email(name, subject, context, to):
+    text, html = render_email(name, context)
+    message = EmailMultiAlternatives(subject, text, settings.EMAIL_HOST_USER, to)
+    message.attach_alternative(html, "text/html")
+    return message
+
+
+def parse_date(value):
+    # Task arguments arrive as ISO strings once they went through the broker
+    return value if isinstance(value, date) else date.fromisoformat(str(value))
+
+
+def parse_time(value):
+    return value if isinstance(value, time) else time.fromisoformat(str(value))
+
+
+# The calendar wrapper is the same for every invitation
+ICS_HEADER = calendar_header(CALENDAR_NAME)
+ICS_FOOTER = calendar_footer()
+
+
+def appointment_uid(customer_email, service_name, start):
+    # Stable across resends, so calendar clients update the event instead of duplicating it
+    digest = hashlib.sha1(f"{customer_email}|{service_name}|{start.isoformat()}".encode()).hexdigest()
+    return f"appointment-{digest[:20]}@clockly"
+
+
+def appointment_ics(customer_email, service_name, start, end):
+    """
+    iCalendar invitation for one appointment, start and end are aware datetimes.
+    """
+    return (
+        ICS_HEADER
+        + vevent(
+            uid=appointment_uid(customer_email, service_name, start),
+            start=start,
+            end=end,
+            summary=f"Appointment: {service_name}",
+            stamp=timezone.now(),
+            description=f"Your appointment for {service_name}.",
+            location=EVENT_LOCATION,
+        )
+        + ICS_FOOTER
+    )
+
+
+def appointment_email(customer_name, service_name, appointment_date, start_time, end_time, customer_email):
+    appointment_date = parse_date(appointment_date)
+    start_time = parse_time(start_time)
+    end_time = parse_time(end_time)
+    start = timezone.make_aware(datetime.combine(appointment_date, start_time))
+    end = timezone.make_aware(datetime.combine(appointment_date, end_time))
+
+    message = build_email(
+        "appointment",
+        f"Your Appointment with {service_name}",
+        {
+            "customer_name": customer_name,
+            "service_name": service_name,
+            "appointment_date": appointment_date,
+            "start_time": start_time,
+            "end_time": end_time,
+        },
+        [customer_email],
+    )
+    filename = f"appointment-{customer_name.replace(' ', '_')}-{appointment_date}.ics"
+    message.attach(
+        filename, appointment_ics(customer_email, service_name, start, end), "text/calendar"
+    )
+    return message
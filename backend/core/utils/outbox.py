@@ -0,0 +1,84 @@
+from datetime import timedelta
+from celery import current_app
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from core.models import OutboxMessage
+
+"""
+Transactional outbox for Celery tasks that must only run if a request's transaction commits.
+
+enqueue() writes the task call as an OutboxMessage row in the caller's transaction: a rollback
+drops the message together with the booking, and the request never talks to the broker. The
+relay_outbox task, run by beat every few seconds, publishes pending messages in batches.
+
+Delivery is at least once. The idempotency key is unique, so enqueueing the same message twice
+is a no-op, and it is reused as the Celery task id when the message is published.
+"""
+
+# Longest wait between publish attempts of a failing message, in seconds
+MAX_BACKOFF = 300
+
+
+def enqueue(task, idempotency_key, **kwargs):
+    """
+    Schedules task(**kwargs) to be published once the current transaction commits.
+    """
+    OutboxMessage.objects.bulk_create(
+        [OutboxMessage(task=task.name, kwargs=kwargs, idempotency_key=idempotency_key)],
+        # The same key again (e.g. a retried request) keeps the first message
+        ignore_conflicts=True,
+    )
+
+
+def publish(message):
+    # Through the registered task rather than send_task(), so task_always_eager is honored
+    current_app.tasks[message.task].apply_async(
+        kwargs=message.kwargs, task_id=message.idempotency_key
+    )
+
+
+def relay_pending(batch_size=None):
+    """
+    Publishes up to batch_size pending messages and returns how many were sent.
+    """
+    batch_size = batch_size or settings.OUTBOX_BATCH_SIZE
+    now = timezone.now()
+    sent = []
+
+    with transaction.atomic():
+        # Concurrent relays each take a different batch
+        messages = list(
+            OutboxMessage.objects.select_for_update(skip_locked=True)
+            .filter(
+                sent_at__isnull=True,
+                available_at__lte=now,
+                attempts__lt=settings.OUTBOX_MAX_ATTEMPTS,
+            )
+            .order_by("available_at", "id")[:batch_size]
+        )
+        for message in messages:
+            try:
+                publish(message)
+            except Exception as e:
+                message.attempts += 1
+                message.last_error = str(e)
+                message.available_at = now + timedelta(
+                    seconds=min(2 ** message.attempts, MAX_BACKOFF)
+                )
+                message.save(update_fields=["attempts", "last_error", "available_at"])
+                continue
+            sent.append(message.id)
+
+        OutboxMessage.objects.filter(id__in=sent).update(sent_at=now)
+
+    return len(sent)
+
+
+def prune_sent(before=None):
+    """
+    Deletes messages published before `before` and returns how many were removed.
+    """
+    before = before or timezone.now() - settings.OUTBOX_RETENTION
+    count, _ = OutboxMessage.objects.filter(sent_at__lt=before).delete()
+    return count
@@ -0,0 +1,93 @@
+import threading
+from cachetools import TTLCache
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+
+"""
+Two-tier cache of the authenticated user ("principal") so JWT auth doesn't hit the users table.
+
+A short-TTL in-process LRU sits in front of Redis. Redis entries are tagged with the user's auth
+version, which is bumped whenever the user is saved (password change, deactivation, profile edit),
+so other processes see the change after at most LOCAL_TTL seconds.
+"""
+
+User = get_user_model()
+
+LOCAL_TTL = 5
+LOCAL_MAXSIZE = 2048
+REDIS_TTL = 15 * 60
+
+# Everything request.user is read for; password and last_login stay deferred
+PRINCIPAL_FIELDS = [
+    "id",
+    "email",
+    "username",
+    "phone",
+    "user_slug",
+    "is_active",
+    "is_staff",
+    "is_superuser",
+]
+
+_local = TTLCache(maxsize=LOCAL_MAXSIZE, ttl=LOCAL_TTL)
+_local_lock = threading.Lock()
+
+
+def version_key(user_id):
+    return f"auth_version_{user_id}"
+
+
+def principal_key(user_id):
+    return f"auth_principal_{user_id}"
+
+
+def _build_user(values):
+    # from_db expects values in model field order and marks the remaining fields as
+    # deferred, so save() on the result only writes these columns
+    names = [f.attname for f in User._meta.concrete_fields if f.attname in values]
+    return User.from_db("default", names, [values[name] for name in names])
+
+
+def get_cached_user(user_id):
+    """
+    Returns a CustomUser instance with PRINCIPAL_FIELDS loaded, or None if the user doesn't exist.
+    """
+    # A token without a user_id claim, e.g. one minted from a missing access cookie
+    if not user_id:
+        return None
+    user_id = int(user_id)
+    with _local_lock:
+        values = _local.get(user_id)
+    if values is not None:
+        return _build_user(values)
+
+    cached = cache.get_many([version_key(user_id), principal_key(user_id)])
+    version = cached.get(version_key(user_id), 0)
+    entry = cached.get(principal_key(user_id))
+
+    if entry is not None and entry["version"] == version:
+        values = entry["values"]
+    else:
+        values = User.objects.filter(id=user_id).values(*PRINCIPAL_FIELDS).first()
+        if values is None:
+            return None
+        cache.set(
+            principal_key(user_id),
+            {"version": version, "values": values},
+            timeout=REDIS_TTL,
+        )
+
+    with _local_lock:
+        _local[user_id] = values
+    return _build_user(values)
+
+
+def bump_auth_version(user_id):
+    """
+    Invalidates every cached principal of the user.
+    """
+    key = version_key(user_id)
+    cache.add(key, 0, timeout=None)
+    cache.incr(key)
+    with _local_lock:
+        _local.pop(int(user_id), None)
@@ -0,0 +1,156 @@
+import time
+from contextvars import ContextVar
+import httpx
+from django_redis import get_redis_connection
+
+"""
+Per-request cost accounting for ProfilingMiddleware.
+
+The middleware puts a RequestProfile in a context variable for the duration of a request. DB
+queries are counted by an execute_wrapper, cache reads by core.cache.InstrumentedRedisCache and
+outbound HTTP by TimedTransport; all of them are no-ops outside a profiled request. Finished
+profiles go into per-view histograms in a Redis hash, see request_metrics().
+"""
+
+METRICS_KEY = "request_metrics"
+# Upper bounds of the histogram buckets, the last bucket is open-ended
+MS_BUCKETS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21)
+
+current_profile = ContextVar("current_profile", default=None)
+
+# Callables receiving (view_name, profile) for every finished request, used by core.testing
+observers = []
+
+
+class RequestProfile:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.total = 0.0
+        self.db_queries = 0
+        self.db_time = 0.0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.cache_time = 0.0
+        self.http_requests = 0
+        self.http_time = 0.0
+
+    def finish(self):
+        self.total = time.perf_counter() - self.started
+
+    def db_wrapper(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_queries += 1
+            self.db_time += time.perf_counter() - start
+
+    def server_timing(self):
+        """
+        Server-Timing header value, durations in milliseconds.
+        """
+        return ", ".join(
+            (
+                f"app;dur={self.total * 1000:.1f}",
+                f'db;desc="{self.db_queries} queries";dur={self.db_time * 1000:.1f}',
+                f'cache;desc="{self.cache_hits} hits {self.cache_misses} misses";'
+                f"dur={self.cache_time * 1000:.1f}",
+                f'http;desc="{self.http_requests} requests";dur={self.http_time * 1000:.1f}',
+            )
+        )
+
+
+def record_cache(hits, misses, seconds):
+    profile = current_profile.get()
+    if profile is not None:
+        profile.cache_hits += hits
+        profile.cache_misses += misses
+        profile.cache_time += seconds
+
+
+def record_http(seconds):
+    profile = current_profile.get()
+    if profile is not None:
+        profile.http_requests += 1
+        profile.http_time += seconds
+
+
+class TimedTransport(httpx.HTTPTransport):
+    # Counts the time up to the response headers; streamed bodies are read later
+    def handle_request(self, request):
+        start = time.perf_counter()
+        try:
+            return super().handle_request(request)
+        finally:
+            record_http(time.perf_counter() - start)
+
+
+def bucket(value, bounds):
+    for bound in bounds:
+        if value <= bound:
+            return str(bound)
+    return "inf"
+
+
+def record_request(view_name, profile):
+    ms = profile.total * 1000
+    pipe = get_redis_connection("default").pipeline(transaction=False)
+    pipe.hincrby(METRICS_KEY, f"{view_name}|count", 1)
+    pipe.hincrbyfloat(METRICS_KEY, f"{view_name}|ms_sum", ms)
+    pipe.hincrby(METRICS_KEY, f"{view_name}|queries_sum", profile.db_queries)
+    pipe.hincrby(METRICS_KEY, f"{view_name}|ms_le_{bucket(ms, MS_BUCKETS)}", 1)
+    pipe.hincrby(
+        METRICS_KEY, f"{view_name}|queries_le_{bucket(profile.db_queries, QUERY_BUCKETS)}", 1
+    )
+    pipe.execute()
+
+
+def percentile(histogram, bounds, count, fraction):
+    # Upper bound of the bucket holding the given fraction of requests
+    seen = 0
+    for bound in [*map(str, bounds), "inf"]:
+        seen += histogram.get(bound, 0)
+        if seen >= count * fraction:
+            return float(bound)
+    return float("inf")
+
+
+def request_metrics():
+    """
+    Returns {view: {"count", "avg_ms", "p50_ms", "p95_ms", "avg_queries", "p95_queries", "ms",
+    "queries"}}. Percentiles are bucket upper bounds, "ms" and "queries" the raw histograms.
+    """
+    raw = get_redis_connection("default").hgetall(METRICS_KEY)
+
+    views = {}
+    for field, value in raw.items():
+        view_name, name = field.decode().rsplit("|", 1)
+        stats = views.setdefault(view_name, {"ms": {}, "queries": {}})
+        if name.startswith("ms_le_"):
+            stats["ms"][name[6:]] = int(value)
+        elif name.startswith("queries_le_"):
+            stats["queries"][name[11:]] = int(value)
+        else:
+            stats[name] = float(value)
+
+    metrics = {}
+    for view_name, stats in sorted(views.items()):
+        count = int(stats.get("count", 0))
+        if not count:
+            continue
+        metrics[view_name] = {
+            "count": count,
+            "avg_ms": stats.get("ms_sum", 0.0) / count,
+            "p50_ms": percentile(stats["ms"], MS_BUCKETS, count, 0.5),
+            "p95_ms": percentile(stats["ms"], MS_BUCKETS, count, 0.95),
+            "avg_queries": stats.get("queries_sum", 0.0) / count,
+            "p95_queries": percentile(stats["queries"], QUERY_BUCKETS, count, 0.95),
+            "ms": stats["ms"],
+            "queries": stats["queries"],
+        }
+    return metrics
+
+
+def reset_request_metrics():
+    get_redis_connection("default").delete(METRICS_KEY)
@@ -0,0 +1,109 @@
+import time
+from datetime import timedelta
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import transaction
+from core.models import Service
+
+"""
+Read-through cache of public provider profiles, keyed by user_slug.
+
+The public booking pages (services list, available times, booking) only need the provider's id,
+whether the account is active and the provider's services, so a warm profile lets them skip the
+users and services tables. Entries are dropped by signals when PUBLIC_PROFILE_FIELDS of the user
+or one of the services change.
+
+Each provider also has a data version, bumped whenever anything shown on the public pages changes
+(profile, services, slots, breaks, bookings). It is a microsecond timestamp and the ETag of
+conditional GETs; there is no Last-Modified, a second-resolution date would miss changes made
+within the same second.
+"""
+
+User = get_user_model()
+
+PROFILE_TTL = 60 * 60
+VERSION_TTL = 24 * 60 * 60
+
+# User fields the public pages depend on; saves touching only others (last_login, password)
+# leave the profile and the data version alone
+PUBLIC_PROFILE_FIELDS = ("user_slug", "is_active")
+
+
+def profile_key(user_slug):
+    return f"provider_profile_{user_slug}"
+
+
+def version_key(user_id):
+    return f"provider_version_{user_id}"
+
+
+def build_provider_profile(user_slug):
+    # Imported here, api.serializers depends on core models being loaded
+    from api.serializers import ServiceSerializer
+
+    user = User.objects.filter(user_slug=user_slug).values("id", "is_active").first()
+    if user is None:
+        return None
+
+    services = Service.objects.filter(user_id=user["id"]).order_by("id")
+    return {
+        "user_id": user["id"],
+        "is_active": user["is_active"],
+        # Serialized once so the services list can be returned as-is
+        "services": list(ServiceSerializer(services, many=True).data),
+        "durations": {
+            service.id: service.duration.total_seconds() for service in services
+        },
+    }
+
+
+def get_provider_profile(user_slug):
+    """
+    Returns the cached profile dict of the provider, or None if no user has this slug.
+    """
+    key = profile_key(user_slug)
+    profile = cache.get(key)
+    if profile is None:
+        profile = build_provider_profile(user_slug)
+        if profile is not None:
+            cache.set(key, profile, timeout=PROFILE_TTL)
+    return profile
+
+
+def get_service_duration(profile, service_id):
+    """
+    Duration of one of the provider's services, or None if the service isn't theirs.
+    """
+    try:
+        seconds = profile["durations"][int(service_id)]
+    except (KeyError, TypeError, ValueError):
+        return None
+    return timedelta(seconds=seconds)
+
+
+def invalidate_provider_profile(user_slug):
+    cache.delete(profile_key(user_slug))
+
+
+def get_provider_version(user_id):
+    """
+    Current data version of the provider. A missing version starts a new one, which only
+    costs clients a full response.
+    """
+    version = cache.get(version_key(user_id))
+    if version is None:
+        version = time.time_ns() // 1000
+        if not cache.add(version_key(user_id), version, timeout=VERSION_TTL):
+            version = cache.get(version_key(user_id), version)
+    return version
+
+
+def set_provider_version(user_id):
+    cache.set(version_key(user_id), time.time_ns() // 1000, timeout=VERSION_TTL)
+
+
+def bump_provider_version(user_id):
+    set_provider_version(user_id)
+    # Again after commit, a conditional GET racing the transaction would otherwise keep the
+    # old data under the new version
+    transaction.on_commit(lambda: set_provider_version(user_id))
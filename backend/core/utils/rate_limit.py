@@ -0,0 +1,162 @@
+import math
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from django.conf import settings
+from django_redis import get_redis_connection
+
+"""
+Per-user limits for chat, enforced atomically in Redis with Lua scripts:
+a token bucket for LLM tokens per minute and a cap on concurrent in-flight replies.
+
+A request is charged an estimate up front; once the reply is generated the bucket is settled
+against the tokens the LLM calls actually reported (see measure_chat_usage).
+"""
+
+# How long a client should wait when all of its concurrency slots are taken
+CONCURRENCY_RETRY_AFTER = 5
+
+TOKEN_BUCKET_SCRIPT = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local now = tonumber(ARGV[3])
+local cost = tonumber(ARGV[4])
+
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1]) or capacity
+local ts = tonumber(state[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+
+local wait = 0
+if tokens >= cost then
+    tokens = tokens - cost
+else
+    wait = (cost - tokens) / rate
+end
+
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', now)
+redis.call('EXPIRE', KEYS[1], math.ceil(capacity / rate) + 1)
+return tostring(wait)
+"""
+
+# Gives back (or takes) the difference between the charged estimate and the real usage. The
+# bucket may go negative, so an underestimated request delays the next ones.
+SETTLE_SCRIPT = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local now = tonumber(ARGV[3])
+local refund = tonumber(ARGV[4])
+
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1]) or capacity
+local ts = tonumber(state[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+tokens = math.max(-capacity, math.min(capacity, tokens + refund))
+
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', now)
+redis.call('EXPIRE', KEYS[1], math.ceil(2 * capacity / rate) + 1)
+return tostring(tokens)
+"""
+
+CONCURRENCY_SCRIPT = """
+local limit = tonumber(ARGV[1])
+local now = tonumber(ARGV[2])
+local ttl = tonumber(ARGV[3])
+
+-- Slots of crashed workers expire instead of leaking forever
+redis.call('ZREMRANGEBYSCORE', KEYS[1], '-inf', now - ttl)
+if redis.call('ZCARD', KEYS[1]) >= limit then
+    return 0
+end
+redis.call('ZADD', KEYS[1], now, ARGV[4])
+redis.call('EXPIRE', KEYS[1], ttl)
+return 1
+"""
+
+_scripts = {}
+
+# Token counter of the reply being generated, filled by record_chat_usage
+_chat_usage = ContextVar("chat_usage", default=None)
+
+
+def _script(name, source):
+    if name not in _scripts:
+        _scripts[name] = get_redis_connection("default").register_script(source)
+    return _scripts[name]
+
+
+def tokens_key(user_id):
+    return f"ratelimit:chat:tokens:{user_id}"
+
+
+def slots_key(user_id):
+    return f"ratelimit:chat:slots:{user_id}"
+
+
+def estimate_chat_cost(message: str) -> int:
+    # Prompt context and completion dominate the cost, the message itself is small
+    return settings.CHAT_RATE_LIMIT_REQUEST_TOKENS + len(message) // 4
+
+
+def consume_chat_tokens(user_id, cost: int) -> int:
+    """
+    Takes `cost` tokens from the user's bucket.
+    Returns 0 if allowed, otherwise the number of seconds until enough tokens are available.
+    """
+    capacity = settings.CHAT_RATE_LIMIT_TOKENS_PER_MINUTE
+    wait = _script("bucket", TOKEN_BUCKET_SCRIPT)(
+        keys=[tokens_key(user_id)],
+        args=[capacity, capacity / 60, time.time(), min(cost, capacity)],
+    )
+    return math.ceil(float(wait))
+
+
+def settle_chat_tokens(user_id, charged: int, used: int) -> None:
+    """
+    Corrects the bucket after a reply: `charged` is what consume_chat_tokens took for it,
+    `used` the total tokens the LLM reported.
+    """
+    capacity = settings.CHAT_RATE_LIMIT_TOKENS_PER_MINUTE
+    refund = min(charged, capacity) - used
+    if refund:
+        _script("settle", SETTLE_SCRIPT)(
+            keys=[tokens_key(user_id)],
+            args=[capacity, capacity / 60, time.time(), refund],
+        )
+
+
+@contextmanager
+def measure_chat_usage():
+    """
+    Sums the usage of the LLM calls made inside the block, yields {"total_tokens": n}.
+    """
+    usage = {"total_tokens": 0}
+    token = _chat_usage.set(usage)
+    try:
+        yield usage
+    finally:
+        _chat_usage.reset(token)
+
+
+def record_chat_usage(usage) -> None:
+    # `usage` is the CompletionUsage of an OpenAI response, None when the API left it out
+    counter = _chat_usage.get()
+    if counter is not None and usage is not None:
+        counter["total_tokens"] += usage.total_tokens
+
+
+def acquire_chat_slot(user_id, slot_id: str) -> bool:
+    acquired = _script("slots", CONCURRENCY_SCRIPT)(
+        keys=[slots_key(user_id)],
+        args=[
+            settings.CHAT_RATE_LIMIT_MAX_CONCURRENT,
+            time.time(),
+            settings.CHAT_REPLY_TIME_LIMIT + 30,
+            slot_id,
+        ],
+    )
+    return bool(acquired)
+
+
+def release_chat_slot(user_id, slot_id: str) -> None:
+    get_redis_connection("default").zrem(slots_key(user_id), slot_id)
@@ -0,0 +1,89 @@
+from collections import defaultdict
+from datetime import timedelta
+from django.db.models import Q
+from core.models import AvailabilityRule, AvailabilitySlot
+from core.utils.enums import Weekday
+
+"""
+Availability from weekly rules (AvailabilityRule), expanded lazily for the dates being asked about.
+
+Concrete AvailabilitySlot rows still win: a slot with the same hours on the same date replaces the
+rule's window, and an inactive one hides it. A slot is only materialized from a rule when a booking
+needs it as a foreign key.
+"""
+
+
+def rule_windows(user_id, start_date, end_date):
+    """
+    Returns {date: [(start_time, end_time), ...]} for every rule occurrence in the date range.
+    """
+    rules = list(
+        AvailabilityRule.objects.filter(user_id=user_id, is_active=True, start_date__lte=end_date)
+        .filter(Q(end_date__isnull=True) | Q(end_date__gte=start_date))
+        .prefetch_related("exceptions")
+    )
+    if not rules:
+        return {}
+
+    by_weekday = defaultdict(list)
+    for rule in rules:
+        by_weekday[Weekday.values.index(rule.weekday)].append(rule)
+
+    windows = defaultdict(list)
+    day = start_date
+    while day <= end_date:
+        for rule in by_weekday.get(day.weekday(), []):
+            if day < rule.start_date or (rule.end_date and day > rule.end_date):
+                continue
+            if any(exception.date == day for exception in rule.exceptions.all()):
+                continue
+            windows[day].append((rule.start_time, rule.end_time))
+        day += timedelta(days=1)
+    return windows
+
+
+def availability_windows(user_id, day):
+    """
+    Open (start_time, end_time) windows on the date: active slots plus rule windows that
+    no slot overrides.
+    """
+    slots = AvailabilitySlot.objects.filter(user_id=user_id, date=day).values_list(
+        "start_time", "end_time", "is_active"
+    )
+    overridden = {(start, end) for start, end, _ in slots}
+    windows = [(start, end) for start, end, is_active in slots if is_active]
+    windows += [
+        window
+        for window in rule_windows(user_id, day, day).get(day, [])
+        if window not in overridden
+    ]
+    return sorted(windows)
+
+
+def get_bookable_slot(user_id, day, start_time, end_time, for_update=False):
+    """
+    Returns an active slot containing start_time-end_time on the date, materializing it from a
+    rule if needed, or None if the provider isn't available then.
+    """
+    slots = AvailabilitySlot.objects.filter(
+        user_id=user_id,
+        date=day,
+        start_time__lte=start_time,
+        end_time__gte=end_time,
+        is_active=True,
+    )
+    if for_update:
+        slots = slots.select_for_update()
+    slot = slots.first()
+    if slot is not None:
+        return slot
+
+    for window_start, window_end in availability_windows(user_id, day):
+        if window_start <= start_time and window_end >= end_time:
+            slot, _ = AvailabilitySlot.objects.get_or_create(
+                user_id=user_id, date=day, start_time=window_start, end_time=window_end
+            )
+            if for_update:
+                slot = AvailabilitySlot.objects.select_for_update().get(pk=slot.pk)
+            return slot
+    return None
@@ -0,0 +1,51 @@
+import threading
+import time
+from django.core.cache import cache
+from django.utils import timezone
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken
+from core.utils.bloom import BloomFilter
+
+"""
+Revoked JWT store. New revocations live in Redis, one key per JTI with a TTL equal to the
+token's remaining life, so nothing has to be cleaned up and a check is a single EXISTS.
+
+Rows written to the token_blacklist tables before this store existed are no longer added to,
+so they are loaded once per process into a Bloom filter; the database is only asked about a
+JTI when the filter says it might be there.
+"""
+
+_legacy = None
+_legacy_lock = threading.Lock()
+
+
+def revoked_key(jti):
+    return f"jwt_revoked_{jti}"
+
+
+def revoke_jti(jti, exp):
+    ttl = int(exp - time.time())
+    if ttl > 0:
+        cache.set(revoked_key(jti), 1, timeout=ttl)
+
+
+def _legacy_filter():
+    global _legacy
+    if _legacy is None:
+        with _legacy_lock:
+            if _legacy is None:
+                jtis = BlacklistedToken.objects.filter(
+                    token__expires_at__gt=timezone.now()
+                ).values_list("token__jti", flat=True)
+                bloom = BloomFilter()
+                for jti in jtis.iterator():
+                    bloom.add(jti)
+                _legacy = bloom
+    return _legacy
+
+
+def is_jti_revoked(jti):
+    if cache.get(revoked_key(jti)) is not None:
+        return True
+    if jti in _legacy_filter():
+        return BlacklistedToken.objects.filter(token__jti=jti).exists()
+    return False
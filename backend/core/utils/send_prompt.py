@@ -1,8 +1,13 @@
-from openai import OpenAI
+from openai import DefaultHttpxClient, OpenAI
+from core.utils.profiling import TimedTransport
 import os
 
 
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+client = OpenAI(
+    api_key=os.getenv("OPENAI_API_KEY"),
+    # Times the calls for ProfilingMiddleware
+    http_client=DefaultHttpxClient(transport=TimedTransport()),
+)
 
 
 def get_gpt_response(messages):
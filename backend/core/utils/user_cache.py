@@ -0,0 +1,113 @@
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django_redis import get_redis_connection
+from django.conf import settings
+from core.models import CustomUser, Service, AvailabilitySlot, Booking
+
+"""
+Declarative per-user caches for list endpoints and the dashboard.
+
+A UserCache declares which models it depends on and which field of those models points at the
+owning user. Saving or deleting any dependent row bumps the owner's generation number, and values
+are stored under keys that include it, so invalidation is a single INCR and stale entries just
+age out. Empty lists and None are cached like any other value. Hits and misses are counted in a
+Redis hash, see cache_metrics().
+"""
+
+METRICS_KEY = "cache_metrics"
+
+registry = {}
+
+
+class UserCache:
+    def __init__(self, name, depends_on, timeout=300):
+        """
+        depends_on lists models whose user_id points at the owner, or (model, owner_field) pairs.
+        """
+        self.name = name
+        self.timeout = timeout
+        self.owner_fields = {}
+        registry[name] = self
+
+        for dependency in depends_on:
+            model, owner_field = dependency if isinstance(dependency, tuple) else (dependency, "user_id")
+            self.owner_fields[model] = owner_field
+            for signal in (post_save, post_delete):
+                signal.connect(
+                    self._on_change,
+                    sender=model,
+                    weak=False,
+                    dispatch_uid=f"user_cache_{name}_{model._meta.label}_{signal is post_save}",
+                )
+
+    def generation_key(self, owner_id):
+        return f"{self.name}_gen_user_{owner_id}"
+
+    def key(self, owner_id, generation):
+        return f"{self.name}_user_{owner_id}_g{generation}"
+
+    def get_or_set(self, owner_id, build):
+        """
+        Returns the cached value for the owner, calling build() and caching its result on a miss.
+        """
+        generation = cache.get(self.generation_key(owner_id), 0)
+        key = self.key(owner_id, generation)
+        # Values are wrapped, so an empty list or None is still a hit
+        entry = cache.get(key)
+        if entry is not None:
+            record(self.name, "hits")
+            return entry["value"]
+
+        record(self.name, "misses")
+        value = build()
+        cache.set(key, {"value": value}, timeout=self.timeout)
+        return value
+
+    def invalidate(self, owner_id):
+        key = self.generation_key(owner_id)
+        cache.add(key, 0, timeout=None)
+        cache.incr(key)
+
+    def _on_change(self, sender, instance, **kwargs):
+        owner_id = getattr(instance, self.owner_fields[sender])
+        self.invalidate(owner_id)
+        # Again after commit, so a read racing the transaction can't re-cache the old rows
+        transaction.on_commit(lambda: self.invalidate(owner_id))
+
+
+def record(name, outcome):
+    get_redis_connection("default").hincrby(METRICS_KEY, f"{name}:{outcome}", 1)
+
+
+def cache_metrics():
+    """
+    Returns {name: {"hits": n, "misses": n, "hit_rate": float}} for every declared cache.
+    """
+    raw = get_redis_connection("default").hgetall(METRICS_KEY)
+    counts = {k.decode(): int(v) for k, v in raw.items()}
+
+    metrics = {}
+    for name in registry:
+        hits = counts.get(f"{name}:hits", 0)
+        misses = counts.get(f"{name}:misses", 0)
+        total = hits + misses
+        metrics[name] = {
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": hits / total if total else 0.0,
+        }
+    return metrics
+
+
+def reset_cache_metrics():
+    get_redis_connection("default").delete(METRICS_KEY)
+
+
+service_list = UserCache("service_list", depends_on=[Service])
+slot_list = UserCache("slot_list", depends_on=[AvailabilitySlot])
+dashboard = UserCache(
+    "dashboard",
+    depends_on=[(CustomUser, "id"), Service, AvailabilitySlot, Booking],
+    timeout=settings.DASHBOARD_CACHE_TTL,
+)
@@ -1,8 +1,8 @@
 import random
 import string
-from django.utils import timezone
-from datetime import timedelta
-from core.models import VerificationCode
+from django.db import transaction
+from core.utils.outbox import enqueue
+from core.utils.verification_store import get_code_store
 from ..tasks import send_registration_code, send_booking_verification
 from core.models import VerificationLink
 
@@ -12,17 +12,13 @@ def generate_verification_code():
 
 def create_verification_code(email):
     code = generate_verification_code()
-    expiration_date = timezone.now() + timedelta(minutes=10)
+    get_code_store().issue(email, code)
 
-    verification_code = VerificationCode.objects.create(
-        email=email,
-        code=code,
-        expiration_date=expiration_date,
-    )
-
-    send_registration_code.delay(
-        user_email=email,
-        security_code=code,
+    transaction.on_commit(
+        lambda: send_registration_code.delay(
+            user_email=email,
+            security_code=code,
+        )
     )
 
 
@@ -34,7 +30,9 @@ def create_verification_link(email, booking):
 
     link = f'http://localhost:5173/bookings/verify-booking/{verification_link.token}'
 
-    send_booking_verification.delay(
+    enqueue(
+        send_booking_verification,
+        f'booking-verification-{verification_link.token}',
         user_email=email,
-        verification_link=link
+        verification_link=link,
     )
\ No newline at end of file
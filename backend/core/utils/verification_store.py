@@ -0,0 +1,146 @@
+import time
+from datetime import timedelta
+from django.conf import settings
+from django.db.models import F
+from django.utils import timezone
+from django.utils.module_loading import import_string
+from django_redis import get_redis_connection
+from core.models import VerificationCode, PendingRegistration
+
+"""
+Pluggable storage for registration verification codes, selected by settings.VERIFICATION_CODE_STORE.
+
+Registration marks the email as pending, and only a pending email can have a code resent or
+verified. Verifying consumes the marker, so an account that was deactivated later can't be
+reactivated through these endpoints.
+
+RedisCodeStore keeps each code in a hash next to its expiry time, counts wrong attempts atomically
+and uses separate keys for the pending marker and the resend cooldown. DatabaseCodeStore keeps the
+VerificationCode and PendingRegistration tables.
+"""
+
+OK = "ok"
+INVALID = "invalid"
+EXPIRED = "expired"
+LOCKED = "locked"
+
+
+class RedisCodeStore:
+    # KEYS: code hash, pending marker; ARGV: code, max attempts, now
+    VERIFY_SCRIPT = """
+    if redis.call('EXISTS', KEYS[2]) == 0 then
+        return 'invalid'
+    end
+    local state = redis.call('HMGET', KEYS[1], 'code', 'attempts', 'expires_at')
+    if not state[1] then
+        return 'invalid'
+    end
+    if tonumber(state[2] or '0') >= tonumber(ARGV[2]) then
+        return 'locked'
+    end
+    if state[1] ~= ARGV[1] then
+        redis.call('HINCRBY', KEYS[1], 'attempts', 1)
+        return 'invalid'
+    end
+    if tonumber(ARGV[3]) > tonumber(state[3]) then
+        return 'expired'
+    end
+    redis.call('DEL', KEYS[1], KEYS[2])
+    return 'ok'
+    """
+
+    def __init__(self):
+        self.redis = get_redis_connection("default")
+        self.verify_script = self.redis.register_script(self.VERIFY_SCRIPT)
+
+    def code_key(self, email):
+        return f"vcode:{email}"
+
+    def cooldown_key(self, email):
+        return f"vcode:cooldown:{email}"
+
+    def pending_key(self, email):
+        return f"vcode:pending:{email}"
+
+    def start_registration(self, email):
+        self.redis.set(self.pending_key(email), 1, ex=settings.VERIFICATION_PENDING_TTL)
+
+    def is_pending(self, email):
+        return bool(self.redis.exists(self.pending_key(email)))
+
+    def issue(self, email, code):
+        pipe = self.redis.pipeline()
+        pipe.delete(self.code_key(email))
+        pipe.hset(
+            self.code_key(email),
+            mapping={
+                "code": code,
+                "attempts": 0,
+                "expires_at": time.time() + settings.VERIFICATION_CODE_TTL,
+            },
+        )
+        # Kept past the code's expiry, so a late attempt gets EXPIRED rather than INVALID
+        pipe.expire(self.code_key(email), settings.VERIFICATION_PENDING_TTL)
+        if settings.VERIFICATION_RESEND_COOLDOWN > 0:
+            pipe.set(self.cooldown_key(email), 1, ex=settings.VERIFICATION_RESEND_COOLDOWN)
+        else:
+            pipe.delete(self.cooldown_key(email))
+        pipe.execute()
+
+    def verify(self, email, code):
+        result = self.verify_script(
+            keys=[self.code_key(email), self.pending_key(email)],
+            args=[code, settings.VERIFICATION_MAX_ATTEMPTS, time.time()],
+        )
+        return result.decode() if isinstance(result, bytes) else result
+
+    def resend_wait(self, email):
+        return max(self.redis.ttl(self.cooldown_key(email)), 0)
+
+
+class DatabaseCodeStore:
+
+    def start_registration(self, email):
+        PendingRegistration.objects.update_or_create(
+            email=email, defaults={"started_at": timezone.now()}
+        )
+
+    def is_pending(self, email):
+        started_after = timezone.now() - timedelta(seconds=settings.VERIFICATION_PENDING_TTL)
+        return PendingRegistration.objects.filter(email=email, started_at__gt=started_after).exists()
+
+    def issue(self, email, code):
+        VerificationCode.objects.filter(email=email).delete()
+        VerificationCode.objects.create(
+            email=email,
+            code=code,
+            expiration_date=timezone.now() + timedelta(seconds=settings.VERIFICATION_CODE_TTL),
+        )
+
+    def verify(self, email, code):
+        if not self.is_pending(email):
+            return INVALID
+        verification_code = VerificationCode.objects.filter(email=email).order_by("-created_at").first()
+        if verification_code is None:
+            return INVALID
+        if verification_code.attempts >= settings.VERIFICATION_MAX_ATTEMPTS:
+            return LOCKED
+        if verification_code.code != code:
+            VerificationCode.objects.filter(id=verification_code.id).update(attempts=F("attempts") + 1)
+            return INVALID
+        if verification_code.is_expired():
+            return EXPIRED
+        VerificationCode.objects.filter(email=email).delete()
+        PendingRegistration.objects.filter(email=email).delete()
+        return OK
+
+    def resend_wait(self, email):
+        verification_code = VerificationCode.objects.filter(email=email).order_by("-created_at").first()
+        if verification_code is None:
+            return 0
+        available_at = verification_code.created_at + timedelta(seconds=settings.VERIFICATION_RESEND_COOLDOWN)
+        return max(int((available_at - timezone.now()).total_seconds()), 0)
+
+
+def get_code_store():
+    return import_string(settings.VERIFICATION_CODE_STORE)()
@@ -0,0 +1,90 @@
+import csv
+import io
+import json
+from datetime import date, time, timedelta
+from django.core.management import call_command
+from django.urls import reverse
+from django.contrib.auth import get_user_model
+from rest_framework.test import APITestCase
+from core.models import Service, AvailabilitySlot, Booking
+
+
+class BookingExportTests(APITestCase):
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email="export@example.com", username="export", password="StrongPassword123!", is_active=True
+        )
+        other = get_user_model().objects.create_user(
+            email="other-export@example.com", username="other", password="StrongPassword123!", is_active=True
+        )
+        for owner in (self.user, other):
+            service = Service.objects.create(
+                user=owner, name="Cut", description="", duration=timedelta(minutes=30), price=10
+            )
+            slot = AvailabilitySlot.objects.create(
+                user=owner, date=date(2030, 1, 7), start_time=time(9), end_time=time(17)
+            )
+            for hour in range(9, 12):
+                Booking.objects.create(
+                    user=owner, service=service, slot=slot, start_time=time(hour), end_time=time(hour, 30),
+                    customer_name="Jane, Doe", customer_email="jane@example.com", status="confirmed",
+                )
+        self.client.force_authenticate(self.user)
+
+    def content(self, response):
+        self.assertTrue(response.streaming)
+        return b"".join(response.streaming_content).decode()
+
+    def test_csv_export_of_own_bookings(self):
+        response = self.client.get(reverse("booking-export", kwargs={"export_format": "csv"}))
+        self.assertEqual(response["Content-Type"], "text/csv; charset=utf-8")
+        rows = list(csv.DictReader(io.StringIO(self.content(response))))
+        self.assertEqual(len(rows), 3)
+        self.assertEqual(rows[0]["customer_name"], "Jane, Doe")
+        self.assertEqual(rows[0]["date"], "2030-01-07")
+        self.assertNotIn("provider", rows[0])
+
+    def test_csv_cells_are_not_formulas(self):
+        Booking.objects.filter(user=self.user).update(
+            customer_name='=HYPERLINK("http://evil.example","x")', customer_phone="+15551234", note="@SUM(A1)"
+        )
+        response = self.client.get(reverse("booking-export", kwargs={"export_format": "csv"}))
+        row = next(csv.DictReader(io.StringIO(self.content(response))))
+        self.assertEqual(row["customer_name"], "'=HYPERLINK(\"http://evil.example\",\"x\")")
+        self.assertEqual(row["customer_phone"], "'+15551234")
+        self.assertEqual(row["note"], "'@SUM(A1)")
+        self.assertEqual(row["customer_email"], "jane@example.com")
+
+        # NDJSON is not opened by spreadsheets and keeps the raw values
+        response = self.client.get(reverse("booking-export", kwargs={"export_format": "ndjson"}))
+        self.assertEqual(json.loads(self.content(response).splitlines()[0])["customer_phone"], "+15551234")
+
+    def test_ndjson_export_with_filters(self):
+        response = self.client.get(
+            reverse("booking-export", kwargs={"export_format": "ndjson"}), {"status": "pending"}
+        )
+        self.assertEqual(self.content(response), "")
+
+        response = self.client.get(reverse("booking-export", kwargs={"export_format": "ndjson"}))
+        lines = [json.loads(line) for line in self.content(response).splitlines()]
+        self.assertEqual([line["start_time"] for line in lines], ["09:00:00", "10:00:00", "11:00:00"])
+
+    def test_global_export_requires_staff(self):
+        url = reverse("booking-export", kwargs={"export_format": "csv"})
+        self.assertEqual(self.content(self.client.get(url, {"scope": "all"})).count("\n"), 4)
+
+        self.user.is_staff = True
+        self.user.save()
+        rows = list(csv.DictReader(io.StringIO(self.content(self.client.get(url, {"scope": "all"})))))
+        self.assertEqual(len(rows), 6)
+        self.assertEqual(rows[-1]["provider"], "other-export@example.com")
+
+    def test_unknown_format(self):
+        response = self.client.get(reverse("booking-export", kwargs={"export_format": "xlsx"}))
+        self.assertEqual(response.status_code, 404)
+
+    def test_management_command(self):
+        out = io.StringIO()
+        call_command("export_bookings", "--format", "ndjson", "--user", "export@example.com", stdout=out)
+        self.assertEqual(len(out.getvalue().splitlines()), 3)
@@ -0,0 +1,133 @@
+import io
+from datetime import date, time, timedelta
+from unittest.mock import patch
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection
+from django.test import SimpleTestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.contrib.auth import get_user_model
+from rest_framework.test import APITestCase
+from core.models import Service, AvailabilitySlot, AvailabilityRule, Booking, OutboxMessage
+from core.utils.intervals import IntervalSet
+
+
+class IntervalSetTests(SimpleTestCase):
+
+    def test_overlaps_and_merging(self):
+        intervals = IntervalSet([(1, 3), (5, 7), (2, 4)])
+        self.assertEqual(len(intervals), 2)
+        self.assertTrue(intervals.overlaps(3, 6))
+        self.assertFalse(intervals.overlaps(4, 5))
+        self.assertFalse(intervals.overlaps(7, 9))
+        intervals.add(4, 5)
+        self.assertEqual(len(intervals), 1)
+
+
+class BookingImportTests(APITestCase):
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email="import@example.com", username="import", password="StrongPassword123!", is_active=True
+        )
+        self.client.force_authenticate(self.user)
+        self.service = Service.objects.create(
+            user=self.user, name="Cut", description="", duration=timedelta(minutes=30), price=10
+        )
+        AvailabilitySlot.objects.create(user=self.user, date=date(2030, 1, 7), start_time=time(9), end_time=time(12))
+        # Mondays from 2030-01-14 come from a rule, without slot rows
+        AvailabilityRule.objects.create(
+            user=self.user, weekday="Mon", start_time=time(13), end_time=time(17), start_date=date(2030, 1, 14)
+        )
+        self.url = reverse("booking-import")
+
+    def row(self, day, start, **extra):
+        return {
+            "service": "cut", "date": day, "start_time": start,
+            "customer_name": "Jane", "customer_email": "jane@example.com", **extra,
+        }
+
+    def test_json_import_with_error_report(self):
+        rows = [
+            self.row("2030-01-07", "09:00"),
+            self.row("2030-01-07", "09:15"),               # overlaps the row above
+            self.row("2030-01-07", "13:00"),               # outside the slot
+            self.row("2030-01-14", "13:00", status="pending"),
+            self.row("2030-01-21", "16:00"),
+            self.row("bad", "10:00", service="Massage"),
+        ]
+        response = self.client.post(self.url, {"rows": rows}, format="json")
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data["created"], 3)
+        self.assertEqual([e["row"] for e in response.data["errors"]], [2, 3, 6])
+        self.assertEqual(set(response.data["errors"][2]["errors"]), {"date", "service"})
+
+        # Rule windows were materialized into slots for the bookings
+        self.assertEqual(AvailabilitySlot.objects.filter(user=self.user).count(), 3)
+        booking = Booking.objects.get(slot__date=date(2030, 1, 14))
+        self.assertEqual((booking.status, booking.end_time), ("pending", time(13, 30)))
+        self.assertIsNotNone(booking.end_datetime)
+
+    def test_field_validators_are_reported_per_row(self):
+        rows = [
+            self.row("2030-01-07", "09:00", customer_name="J" * 51),
+            self.row("2030-01-07", "09:30", customer_email="not-an-email"),
+            self.row("2030-01-07", "10:00", customer_phone="5" * 21),
+            self.row("2030-01-07", "10:30"),
+        ]
+        response = self.client.post(self.url, {"rows": rows}, format="json")
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data["created"], 1)
+        self.assertEqual(
+            [set(e["errors"]) for e in response.data["errors"]],
+            [{"customer_name"}, {"customer_email"}, {"customer_phone"}],
+        )
+
+    def test_import_locks_the_calendar_it_checked(self):
+        with CaptureQueriesContext(connection) as ctx:
+            self.client.post(self.url, {"rows": [self.row("2030-01-07", "09:00")]}, format="json")
+        locked = [q["sql"].split(" FROM ")[1].split()[0] for q in ctx.captured_queries if "FOR UPDATE" in q["sql"]]
+        # Provider, then the slots and bookings the rows were checked against
+        self.assertEqual(locked, ['"core_customuser"', '"core_availabilityslot"', '"core_booking"'])
+
+    def test_existing_bookings_block_import_and_dry_run_writes_nothing(self):
+        slot = AvailabilitySlot.objects.get()
+        Booking.objects.create(
+            user=self.user, service=self.service, slot=slot, start_time=time(10), end_time=time(10, 30),
+            customer_name="Existing", customer_email="e@example.com",
+        )
+        rows = [self.row("2030-01-07", "10:00"), self.row("2030-01-07", "11:00")]
+        response = self.client.post(self.url, {"rows": rows, "dry_run": True}, format="json")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["created"], 1)
+        self.assertEqual(response.data["errors"][0]["errors"], {"start_time": "Time slot already booked."})
+        self.assertEqual(Booking.objects.count(), 1)
+
+    def test_csv_upload_with_one_email_message(self):
+        content = (
+            "service_id,date,start_time,customer_name,customer_email\n"
+            f"{self.service.id},2030-01-07,09:00,Jane,jane@example.com\n"
+            f"{self.service.id},2030-01-07,10:00,John,john@example.com\n"
+        )
+        upload = SimpleUploadedFile("bookings.csv", content.encode(), content_type="text/csv")
+        response = self.client.post(self.url, {"file": upload, "send_emails": "true"}, format="multipart")
+        self.assertEqual(response.data["created"], 2)
+        message = OutboxMessage.objects.get()
+        self.assertEqual(message.task, "core.tasks.send_imported_booking_emails")
+        self.assertEqual(len(message.kwargs["booking_ids"]), 2)
+
+    def test_import_queries_do_not_grow_with_rows(self):
+        rows = [self.row("2030-01-07", f"{9 + i // 2:02d}:{30 * (i % 2):02d}") for i in range(6)]
+        # Services, then inside a savepoint: provider lock, slots, rules, bookings and one INSERT
+        with self.assertNumQueries(8):
+            response = self.client.post(self.url, {"rows": rows}, format="json")
+        self.assertEqual(response.data["created"], 6)
+
+    def test_management_command(self):
+        out, err = io.StringIO(), io.StringIO()
+        with patch("builtins.open", return_value=io.StringIO('[{"service": "Cut", "date": "2030-01-07", '
+                                                              '"start_time": "09:00", "customer_name": "J", '
+                                                              '"customer_email": "j@example.com"}]')):
+            call_command("import_bookings", "rows.json", "--user", "import@example.com", stdout=out, stderr=err)
+        self.assertIn("Created 1 bookings", out.getvalue())
@@ -0,0 +1,77 @@
+from datetime import date, time, timedelta
+from django.urls import reverse
+from django.contrib.auth import get_user_model
+from rest_framework.test import APITestCase
+from core.models import Service, AvailabilitySlot, Booking
+
+
+class BookingListTests(APITestCase):
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email="list@example.com", username="list", password="StrongPassword123!", is_active=True
+        )
+        self.client.force_authenticate(self.user)
+        self.cut = Service.objects.create(
+            user=self.user, name="Cut", description="", duration=timedelta(minutes=30), price=10
+        )
+        self.shave = Service.objects.create(
+            user=self.user, name="Shave", description="", duration=timedelta(minutes=30), price=5
+        )
+        self.bookings = []
+        for day in range(1, 6):
+            slot = AvailabilitySlot.objects.create(
+                user=self.user, date=date(2030, 1, day), start_time=time(9), end_time=time(17)
+            )
+            for hour, service, status in [(9, self.cut, "confirmed"), (10, self.shave, "pending")]:
+                self.bookings.append(Booking.objects.create(
+                    user=self.user, service=service, slot=slot, start_time=time(hour),
+                    end_time=time(hour, 30), customer_name="Jane", customer_email="jane@example.com",
+                    status=status,
+                ))
+        self.url = reverse("booking-list")
+
+    def ids(self, response):
+        return [b["id"] for b in response.data["results"]]
+
+    def test_keyset_pages_latest_first(self):
+        expected = [b.id for b in reversed(self.bookings)]
+        seen = []
+        response = self.client.get(self.url, {"limit": 4})
+        while True:
+            seen += self.ids(response)
+            if not response.data["has_more"]:
+                break
+            response = self.client.get(self.url, {"limit": 4, "cursor": response.data["next"]})
+        self.assertEqual(seen, expected)
+
+    def test_listing_is_read_only(self):
+        response = self.client.post(self.url, {}, format="json")
+        self.assertEqual(response.status_code, 405)
+
+    def test_page_uses_constant_queries(self):
+        with self.assertNumQueries(1):
+            response = self.client.get(self.url)
+        self.assertEqual(response.data["results"][0]["service_name"], "Shave")
+
+    def test_filters(self):
+        response = self.client.get(self.url, {"date_from": "2030-01-02", "date_to": "2030-01-03"})
+        self.assertEqual(len(response.data["results"]), 4)
+
+        response = self.client.get(self.url, {"status": "pending", "service": self.shave.id})
+        self.assertEqual(len(response.data["results"]), 5)
+        self.assertEqual(response.data["results"][0]["status"], "pending")
+
+        response = self.client.get(self.url, {"status": "unknown"})
+        self.assertEqual(response.status_code, 400)
+
+    def test_sparse_fieldset(self):
+        response = self.client.get(self.url, {"fields": "id,status"})
+        self.assertEqual(set(response.data["results"][0]), {"id", "status"})
+
+    def test_client_bookings_page_has_cursor(self):
+        response = self.client.get(reverse("bookings"), {"limit": 3})
+        self.assertEqual(len(response.data["Bookings"]), 3)
+        self.assertEqual(set(response.data), {"Bookings", "has_more", "next"})
+        response = self.client.get(reverse("bookings"), {"cursor": response.data["next"]})
+        self.assertEqual(len(response.data["Bookings"]), 7)
@@ -0,0 +1,64 @@
+from datetime import date, time
+from unittest import mock
+from django.urls import reverse
+from django.contrib.auth import get_user_model
+from rest_framework.test import APITestCase
+from core.models import AvailabilitySlot
+from core.utils import bulk_availability
+
+
+class BulkAvailabilityTests(APITestCase):
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email="bulk@example.com", username="bulk", password="StrongPassword123!", is_active=True
+        )
+        self.client.force_authenticate(self.user)
+        self.url = reverse("slots-bulk")
+        self.payload = {
+            "day_of_week": ["Mon", "Wed"],
+            "start_time": "09:00",
+            "end_time": "17:00",
+            # 2030-01-07 is a Monday; four weeks
+            "start_date": "2030-01-07",
+            "end_date": "2030-02-03",
+        }
+
+    def test_quarter_is_created_in_constant_statements(self):
+        payload = {**self.payload, "day_of_week": ["Mon", "Tue", "Wed", "Thu", "Fri"], "end_date": "2030-04-07"}
+        # A single INSERT ... RETURNING
+        with self.assertNumQueries(1):
+            response = self.client.post(self.url, payload, format="json")
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data["created"], 65)
+
+    def test_existing_slots_are_skipped(self):
+        AvailabilitySlot.objects.create(user=self.user, date=date(2030, 1, 9), start_time=time(9), end_time=time(17))
+        response = self.client.post(self.url, self.payload, format="json")
+        self.assertEqual(response.data, {"created": 7, "skipped": 1})
+        self.assertEqual(AvailabilitySlot.objects.filter(user=self.user).count(), 8)
+        self.assertEqual({d.weekday() for d in AvailabilitySlot.objects.values_list("date", flat=True)}, {0, 2})
+
+    def test_concurrent_conflict_is_not_counted_as_created(self):
+        expand = bulk_availability.expand_weekdays
+
+        def race(*args):
+            # Another request inserts one of the dates while this one is expanding the range
+            AvailabilitySlot.objects.create(user=self.user, date=date(2030, 1, 9), start_time=time(9), end_time=time(17))
+            return expand(*args)
+
+        with mock.patch.object(bulk_availability, "expand_weekdays", side_effect=race):
+            response = self.client.post(self.url, self.payload, format="json")
+        self.assertEqual(response.data, {"created": 7, "skipped": 1})
+        self.assertEqual(AvailabilitySlot.objects.filter(user=self.user).count(), 8)
+
+    def test_cached_slot_list_is_invalidated(self):
+        self.assertEqual(self.client.get(reverse("slots")).data, [])
+        self.client.post(self.url, self.payload, format="json")
+        self.assertEqual(len(self.client.get(reverse("slots")).data), 8)
+
+    def test_invalid_ranges(self):
+        response = self.client.post(self.url, {**self.payload, "end_time": "08:00"}, format="json")
+        self.assertEqual(response.status_code, 400)
+        response = self.client.post(self.url, {**self.payload, "end_date": "2032-01-01"}, format="json")
+        self.assertEqual(response.status_code, 400)
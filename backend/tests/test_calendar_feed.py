@@ -0,0 +1,76 @@
+from datetime import date, time, timedelta
+from django.urls import reverse
+from django.contrib.auth import get_user_model
+from rest_framework.test import APITestCase
+from core.models import Service, AvailabilitySlot, Booking
+from core.utils.ical import fold
+
+
+class CalendarFeedTests(APITestCase):
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email="ical@example.com", username="ical", password="StrongPassword123!", is_active=True
+        )
+        self.client.force_authenticate(self.user)
+        self.service = Service.objects.create(
+            user=self.user, name="Cut", description="", duration=timedelta(minutes=30), price=10
+        )
+        self.slot = AvailabilitySlot.objects.create(
+            user=self.user, date=date(2030, 1, 7), start_time=time(9), end_time=time(17)
+        )
+        self.book(time(9), "Jane, Doe")
+        feed = self.client.get(reverse("calendar-feed")).data
+        self.assertTrue(feed["url"].startswith("webcal://"))
+        self.url = reverse("calendar-feed-ics", kwargs={"token": feed["token"]})
+        self.client.force_authenticate(None)
+
+    def book(self, start, name, status="confirmed"):
+        return Booking.objects.create(
+            user=self.user, service=self.service, slot=self.slot, start_time=start,
+            end_time=time(start.hour, 30), customer_name=name, customer_email="jane@example.com",
+            status=status,
+        )
+
+    def body(self, response):
+        if response.streaming:
+            return b"".join(response.streaming_content).decode()
+        return response.content.decode()
+
+    def test_feed_lists_upcoming_bookings(self):
+        self.book(time(10), "Cancelled", status="cancelled")
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Type"], "text/calendar; charset=utf-8")
+        body = self.body(response)
+        self.assertTrue(body.startswith("BEGIN:VCALENDAR\r\n"))
+        self.assertEqual(body.count("BEGIN:VEVENT"), 1)
+        self.assertIn("SUMMARY:Cut: Jane\\, Doe\r\n", body)
+        self.assertIn("DTSTART:20300107T090000Z\r\n", body)
+
+    def test_etag_and_cached_body(self):
+        response = self.client.get(self.url)
+        self.body(response)
+        etag = response["ETag"]
+
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+            response = self.client.get(self.url)
+        self.assertFalse(response.streaming)
+
+        self.book(time(11), "John")
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.body(response).count("BEGIN:VEVENT"), 2)
+
+    def test_rotated_token_stops_working(self):
+        self.client.force_authenticate(self.user)
+        self.client.post(reverse("calendar-feed"))
+        self.assertEqual(self.client.get(self.url).status_code, 404)
+        self.assertEqual(self.client.get("/api/calendar/not-a-token.ics").status_code, 404)
+
+    def test_long_lines_are_folded(self):
+        folded = fold("DESCRIPTION:" + "é" * 100)
+        lines = folded.split("\r\n")[:-1]
+        self.assertTrue(all(len(line.encode()) <= 75 for line in lines))
+        self.assertEqual("".join(line[1:] if i else line for i, line in enumerate(lines)), "DESCRIPTION:" + "é" * 100)
@@ -0,0 +1,57 @@
+import os
+import subprocess
+import sys
+from django.conf import settings
+from django.test import SimpleTestCase
+from backend.celery import app
+import core.tasks  # noqa: F401, registers the tasks
+
+
+def queue_of(task_name):
+    return app.amqp.router.route({}, task_name)["queue"]
+
+
+class CeleryRoutingTests(SimpleTestCase):
+
+    def test_tasks_go_to_their_queues(self):
+        expected = {
+            "core.tasks.send_registration_code": "interactive_mail",
+            "core.tasks.send_booking_verification": "interactive_mail",
+            "core.tasks.send_appointment_email": "interactive_mail",
+            "core.tasks.relay_outbox": "interactive_mail",
+            "core.tasks.send_booking_reminder": "bulk_mail",
+            "core.tasks.send_imported_booking_emails": "bulk_mail",
+            "core.tasks.delete_old_bookings": "maintenance",
+            "core.tasks.prune_expired_tokens": "maintenance",
+            "core.tasks.generate_chat_reply": "llm",
+            "core.tasks.summarize_chat_session": "llm",
+        }
+        for task_name, queue in expected.items():
+            with self.subTest(task=task_name):
+                route = queue_of(task_name)
+                self.assertEqual(route.name, queue)
+                self.assertEqual(route.routing_key, queue)
+
+    def test_every_task_is_routed_explicitly(self):
+        tasks = {name for name in app.tasks if name.startswith("core.tasks.")}
+        self.assertEqual(tasks - set(settings.CELERY_TASK_ROUTES), set())
+
+    def test_beat_schedule_names_registered_tasks(self):
+        for entry in settings.CELERY_BEAT_SCHEDULE.values():
+            self.assertIn(entry["task"], app.tasks)
+
+    def test_code_cleanup_is_scheduled_only_for_database_store(self):
+        # The default Redis store expires codes by TTL
+        self.assertNotIn("delete-expired-codes", settings.CELERY_BEAT_SCHEDULE)
+
+    def test_workers_do_not_load_the_llm_stack(self):
+        # Only the chat tasks import it, so mail and maintenance workers start without an API key
+        env = {k: v for k, v in os.environ.items() if k != "OPENAI_API_KEY"}
+        code = (
+            "import sys, django; django.setup(); import core.tasks; "
+            "print(any(m.startswith(('openai', 'langchain')) for m in sys.modules))"
+        )
+        result = subprocess.run(
+            [sys.executable, "-c", code], env=env, capture_output=True, text=True, check=True
+        )
+        self.assertEqual(result.stdout.strip(), "False")
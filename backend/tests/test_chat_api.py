@@ -0,0 +1,236 @@
+from types import SimpleNamespace
+from unittest.mock import patch
+from django.test import override_settings
+from django_redis import get_redis_connection
+from rest_framework.test import APITestCase
+from django.urls import reverse
+from django.contrib.auth import get_user_model
+from core.models import ChatSession, ChatMessage
+from core.tasks import generate_chat_reply
+from core.utils.chatbot.jobs import claim_chat_job, create_chat_job, get_chat_job
+from core.utils.rate_limit import (
+    acquire_chat_slot,
+    record_chat_usage,
+    release_chat_slot,
+    slots_key,
+    tokens_key,
+)
+
+
+def answer_using(total_tokens):
+    # Stands in for handle_user_input, reporting LLM usage like the real calls do
+    def answer(*args, **kwargs):
+        record_chat_usage(SimpleNamespace(total_tokens=total_tokens))
+        return "ok"
+    return answer
+
+
+class ChatSessionsTests(APITestCase):
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email="chat@example.com", username="chat", password="StrongPassword123!"
+        )
+        self.client.force_authenticate(self.user)
+        self.sessions = [ChatSession.objects.create(user=self.user) for _ in range(25)]
+        for session in self.sessions:
+            ChatMessage.objects.create(session=session, sender="user", message=f"hi from {session.id}")
+
+    def test_sessions_are_paginated_with_constant_queries(self):
+        url = reverse("get-all-sessions")
+        with self.assertNumQueries(1):
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        results = response.data["results"]
+        self.assertEqual(len(results), 20)
+        # Most recently active first
+        self.assertEqual(results[0]["id"], self.sessions[-1].id)
+        self.assertEqual(results[0]["last_message"], f"hi from {self.sessions[-1].id}")
+
+        response = self.client.get(response.data["next"])
+        self.assertEqual(len(response.data["results"]), 5)
+        self.assertIsNone(response.data["next"])
+
+    def test_new_message_moves_session_to_top(self):
+        oldest = self.sessions[0]
+        ChatMessage.objects.create(session=oldest, sender="bot", message="latest")
+        response = self.client.get(reverse("get-all-sessions"))
+        self.assertEqual(response.data["results"][0]["id"], oldest.id)
+        self.assertEqual(response.data["results"][0]["last_message"], "latest")
+
+
+class ChatHistoryTests(APITestCase):
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email="history@example.com", username="history", password="StrongPassword123!"
+        )
+        self.client.force_authenticate(self.user)
+        self.session = ChatSession.objects.create(user=self.user)
+        self.messages = [
+            ChatMessage.objects.create(session=self.session, sender="user", message=f"msg {i}")
+            for i in range(7)
+        ]
+        self.url = reverse("get-messages-for-session", kwargs={"id": self.session.id})
+
+    def ids(self, response):
+        return [m["id"] for m in response.data["results"]]
+
+    def test_latest_page_then_older_pages(self):
+        response = self.client.get(self.url, {"limit": 3})
+        self.assertEqual(self.ids(response), [m.id for m in self.messages[4:]])
+        self.assertTrue(response.data["has_more"])
+
+        response = self.client.get(self.url, {"limit": 3, "before": response.data["before"]})
+        self.assertEqual(self.ids(response), [m.id for m in self.messages[1:4]])
+
+        response = self.client.get(self.url, {"limit": 3, "before": response.data["before"]})
+        self.assertEqual(self.ids(response), [self.messages[0].id])
+        self.assertFalse(response.data["has_more"])
+
+    def test_after_cursor_and_since_id_return_only_new_messages(self):
+        response = self.client.get(self.url)
+        after = response.data["after"]
+        new = ChatMessage.objects.create(session=self.session, sender="bot", message="new")
+
+        response = self.client.get(self.url, {"after": after})
+        self.assertEqual(self.ids(response), [new.id])
+
+        response = self.client.get(self.url, {"since_id": self.messages[-1].id})
+        self.assertEqual(self.ids(response), [new.id])
+
+    def test_empty_poll_keeps_the_cursor(self):
+        after = self.client.get(self.url).data["after"]
+        response = self.client.get(self.url, {"after": after})
+        self.assertEqual(self.ids(response), [])
+        self.assertEqual(response.data["after"], after)
+
+        new = ChatMessage.objects.create(session=self.session, sender="bot", message="new")
+        response = self.client.get(self.url, {"after": response.data["after"]})
+        self.assertEqual(self.ids(response), [new.id])
+
+    def test_invalid_cursor(self):
+        response = self.client.get(self.url, {"before": "garbage"})
+        self.assertEqual(response.status_code, 404)
+
+
+class SendMessageTests(APITestCase):
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email="send@example.com", username="send", password="StrongPassword123!"
+        )
+        self.client.force_authenticate(self.user)
+        self.session = ChatSession.objects.create(user=self.user)
+        self.url = reverse("send-msg", kwargs={"id": self.session.id})
+
+    @patch("core.utils.chatbot.ai_router.handle_user_input", return_value="Hello there")
+    def test_reply_is_generated_as_a_job(self, handle):
+        response = self.client.post(self.url, {"message": "hi"}, format="json")
+        self.assertEqual(response.status_code, 202)
+
+        # Celery runs eagerly in tests, so the job is already finished
+        job = self.client.get(reverse("chat-job", kwargs={"job_id": response.data["job_id"]}))
+        self.assertEqual(job.data["status"], "done")
+        self.assertEqual(job.data["reply"]["message"], "Hello there")
+        self.assertEqual(self.session.messages.filter(sender="bot").count(), 1)
+
+    @patch("core.utils.chatbot.ai_router.handle_user_input", side_effect=RuntimeError("boom"))
+    def test_failed_job_reports_error(self, handle):
+        response = self.client.post(self.url, {"message": "hi"}, format="json")
+        job = self.client.get(reverse("chat-job", kwargs={"job_id": response.data["job_id"]}))
+        self.assertEqual(job.data["status"], "failed")
+        self.assertEqual(job.data["error"], "boom")
+
+    @patch("core.utils.chatbot.ai_router.handle_user_input", return_value="Hello there")
+    def test_redelivered_job_reuses_stored_reply(self, handle):
+        response = self.client.post(self.url, {"message": "hi"}, format="json")
+        job_id = response.data["job_id"]
+        message = self.session.messages.get(sender="user")
+
+        generate_chat_reply.apply(args=[job_id, self.user.id, self.session.id, message.id])
+
+        self.assertEqual(handle.call_count, 1)
+        self.assertEqual(self.session.messages.filter(sender="bot").count(), 1)
+        self.assertEqual(get_chat_job(job_id)["reply_id"], message.reply.id)
+
+    @patch("core.utils.chatbot.ai_router.handle_user_input", return_value="Hello there")
+    def test_running_job_is_not_generated_twice(self, handle):
+        message = ChatMessage.objects.create(session=self.session, sender="user", message="hi")
+        job_id = create_chat_job(self.user.id, self.session.id, message.id)
+        self.assertTrue(claim_chat_job(job_id))
+
+        generate_chat_reply.apply(args=[job_id, self.user.id, self.session.id, message.id])
+
+        handle.assert_not_called()
+        self.assertEqual(get_chat_job(job_id)["status"], "running")
+
+    @patch("core.utils.chatbot.ai_router.handle_user_input", return_value="Hello there")
+    def test_job_of_deleted_session_is_not_found(self, handle):
+        response = self.client.post(self.url, {"message": "hi"}, format="json")
+        self.session.delete()
+        job = self.client.get(reverse("chat-job", kwargs={"job_id": response.data["job_id"]}))
+        self.assertEqual(job.status_code, 404)
+
+    def test_job_of_another_user_is_hidden(self):
+        other = get_user_model().objects.create_user(
+            email="other@example.com", username="other", password="StrongPassword123!"
+        )
+        job_id = create_chat_job(other.id, self.session.id, 1)
+        job = self.client.get(reverse("chat-job", kwargs={"job_id": job_id}))
+        self.assertEqual(job.status_code, 404)
+
+
+@override_settings(CHAT_RATE_LIMIT_TOKENS_PER_MINUTE=3000, CHAT_RATE_LIMIT_REQUEST_TOKENS=2000)
+class ChatRateLimitTests(APITestCase):
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email="limited@example.com", username="limited", password="StrongPassword123!"
+        )
+        self.client.force_authenticate(self.user)
+        self.session = ChatSession.objects.create(user=self.user)
+        self.url = reverse("send-msg", kwargs={"id": self.session.id})
+        get_redis_connection("default").delete(tokens_key(self.user.id), slots_key(self.user.id))
+
+    @patch("core.utils.chatbot.ai_router.handle_user_input", side_effect=answer_using(2000))
+    def test_token_bucket_returns_retry_after(self, handle):
+        self.assertEqual(self.client.post(self.url, {"message": "hi"}, format="json").status_code, 202)
+
+        response = self.client.post(self.url, {"message": "hi"}, format="json")
+        self.assertEqual(response.status_code, 429)
+        self.assertGreater(int(response["Retry-After"]), 0)
+        # Throttled requests are not stored
+        self.assertEqual(self.session.messages.filter(sender="user").count(), 1)
+
+    def bucket_tokens(self):
+        return float(get_redis_connection("default").hget(tokens_key(self.user.id), "tokens"))
+
+    @patch("core.utils.chatbot.ai_router.handle_user_input", side_effect=answer_using(500))
+    def test_unused_estimate_is_refunded(self, handle):
+        self.client.post(self.url, {"message": "hi"}, format="json")
+        self.assertGreaterEqual(self.bucket_tokens(), 2500)
+        self.assertEqual(self.client.post(self.url, {"message": "hi"}, format="json").status_code, 202)
+
+    @patch("core.utils.chatbot.ai_router.handle_user_input", side_effect=answer_using(4000))
+    def test_usage_over_the_estimate_is_debited(self, handle):
+        self.client.post(self.url, {"message": "hi"}, format="json")
+        self.assertLess(self.bucket_tokens(), 0)
+
+    def test_failed_store_gives_back_slot_and_tokens(self):
+        with patch("api.views.ChatMessage.objects.create", side_effect=RuntimeError("db down")):
+            with self.assertRaises(RuntimeError):
+                self.client.post(self.url, {"message": "hi"}, format="json")
+
+        self.assertEqual(get_redis_connection("default").zcard(slots_key(self.user.id)), 0)
+        self.assertGreaterEqual(self.bucket_tokens(), 2990)
+
+    @override_settings(CHAT_RATE_LIMIT_MAX_CONCURRENT=1)
+    def test_concurrent_requests_are_capped(self):
+        self.assertTrue(acquire_chat_slot(self.user.id, "in-flight"))
+        response = self.client.post(self.url, {"message": "hi"}, format="json")
+        self.assertEqual(response.status_code, 429)
+        self.assertIn("Retry-After", response)
+
+        release_chat_slot(self.user.id, "in-flight")
+        self.assertTrue(acquire_chat_slot(self.user.id, "next"))
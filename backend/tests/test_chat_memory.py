@@ -0,0 +1,50 @@
+from unittest.mock import patch
+from django.test import TestCase, override_settings
+from django.contrib.auth import get_user_model
+from core.models import ChatSession, ChatMessage
+from core.utils.chatbot.memory import build_history, needs_summary, update_session_summary
+
+
+@override_settings(CHAT_MEMORY_RECENT_TURNS=1, CHAT_MEMORY_SUMMARY_TRIGGER_TOKENS=10)
+class ChatMemoryTests(TestCase):
+
+    def setUp(self):
+        user = get_user_model().objects.create_user(
+            email="memory@example.com", username="memory", password="StrongPassword123!"
+        )
+        self.session = ChatSession.objects.create(user=user)
+        for i in range(3):
+            ChatMessage.objects.create(session=self.session, sender="user", message=f"question {i} " * 5)
+            ChatMessage.objects.create(session=self.session, sender="bot", message=f"answer {i} " * 5)
+
+    def test_history_keeps_messages_not_yet_summarized(self):
+        # Older than the recent window, but no summary holds them yet
+        history = build_history(self.session)
+        self.assertEqual([m["role"] for m in history], ["user", "assistant"] * 3)
+        self.assertTrue(history[0]["content"].startswith("question 0"))
+
+    @patch("core.utils.chatbot.memory.get_gpt_response", return_value="User asked three questions.")
+    def test_summary_folds_older_messages(self, gpt):
+        self.assertTrue(needs_summary(self.session))
+        self.assertTrue(update_session_summary(self.session.id))
+
+        self.session.refresh_from_db()
+        last_kept = self.session.messages.order_by("-id")[1]
+        self.assertEqual(self.session.summarized_up_to, last_kept.id - 1)
+
+        history = build_history(self.session)
+        self.assertEqual(history[0]["role"], "system")
+        self.assertIn("User asked three questions.", history[0]["content"])
+        self.assertEqual(len(history), 3)
+
+        # Nothing new to fold in
+        self.assertFalse(update_session_summary(self.session.id))
+        self.assertEqual(gpt.call_count, 1)
+
+    def test_long_recent_window_alone_does_not_trigger_a_summary(self):
+        session = ChatSession.objects.create(user=self.session.user)
+        ChatMessage.objects.create(session=session, sender="user", message="long question " * 50)
+        ChatMessage.objects.create(session=session, sender="bot", message="long answer " * 50)
+
+        # Both messages are in the recent window, a summary run would have nothing to fold
+        self.assertFalse(needs_summary(session))
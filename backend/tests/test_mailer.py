@@ -0,0 +1,127 @@
+import smtplib
+from datetime import date, time, timedelta
+from unittest.mock import patch
+from django.contrib.auth import get_user_model
+from django.core import mail
+from django.core.cache import cache
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.test import TestCase
+from core.models import AvailabilitySlot, Booking, Service
+from core.tasks import send_imported_booking_emails, send_registration_code
+from core.utils.mailer import (
+    IN_FLIGHT,
+    PermanentMailError,
+    TransientMailError,
+    close_connection,
+    deliver,
+    mail_metrics,
+    reset_mail_metrics,
+    sent_key,
+)
+from core.utils.notifications import build_email
+
+
+class MailTaskTests(TestCase):
+
+    def setUp(self):
+        close_connection()
+        reset_mail_metrics()
+
+    def test_redelivered_task_sends_once(self):
+        for _ in range(2):
+            send_registration_code.apply(args=("new@example.com", "123456"), task_id="redelivered")
+
+        self.assertEqual(len(mail.outbox), 1)
+        metrics = mail_metrics()
+        self.assertEqual((metrics["sent"], metrics["duplicate"]), (1, 1))
+
+    def test_connection_is_reused(self):
+        with patch("core.utils.mailer.get_connection", wraps=get_connection) as connect:
+            for code in ("111111", "222222", "333333"):
+                send_registration_code.delay("new@example.com", code)
+
+        self.assertEqual(len(mail.outbox), 3)
+        connect.assert_called_once()
+
+    def test_smtp_error_is_retried(self):
+        send = EmailMultiAlternatives.send
+        calls = []
+
+        def flaky(message, *args, **kwargs):
+            calls.append(message)
+            if len(calls) == 1:
+                raise smtplib.SMTPServerDisconnected("gone")
+            return send(message, *args, **kwargs)
+
+        with patch.object(EmailMultiAlternatives, "send", flaky):
+            # throw=False lets the eager run follow the retry instead of raising it
+            send_registration_code.apply(args=("new@example.com", "123456"), throw=False)
+
+        self.assertEqual(len(calls), 2)
+        self.assertEqual(len(mail.outbox), 1)
+        metrics = mail_metrics()
+        self.assertEqual((metrics["failed"], metrics["retried"], metrics["sent"]), (1, 1, 1))
+
+    def test_permanent_error_is_not_retried(self):
+        refused = smtplib.SMTPRecipientsRefused({"new@example.com": (550, b"No such user")})
+        with patch.object(EmailMultiAlternatives, "send", side_effect=refused) as send:
+            result = send_registration_code.apply(args=("new@example.com", "123456"), throw=False)
+
+        self.assertIsInstance(result.result, PermanentMailError)
+        send.assert_called_once()
+        metrics = mail_metrics()
+        self.assertEqual((metrics["rejected"], metrics["retried"]), (1, 0))
+
+    def test_in_flight_key_is_not_sent_twice(self):
+        key = send_registration_code.name + ":concurrent"
+        cache.set(sent_key(key), IN_FLIGHT)
+        with self.assertRaises(TransientMailError):
+            deliver(build_email("registration_code", "Code", {"code": "123"}, ["a@example.com"]), key)
+        self.assertEqual(len(mail.outbox), 0)
+
+        # A failed send releases its claim for the retry
+        cache.delete(sent_key(key))
+        with patch.object(EmailMultiAlternatives, "send", side_effect=smtplib.SMTPServerDisconnected):
+            with self.assertRaises(TransientMailError):
+                deliver(build_email("registration_code", "Code", {"code": "123"}, ["a@example.com"]), key)
+        self.assertIsNone(cache.get(sent_key(key)))
+
+
+class ImportedBookingEmailTests(TestCase):
+
+    def setUp(self):
+        close_connection()
+        user = get_user_model().objects.create_user(
+            email="mailer@example.com", username="mailer", password="StrongPassword123!"
+        )
+        service = Service.objects.create(
+            user=user, name="Cut", description="", duration=timedelta(minutes=30), price=10
+        )
+        slot = AvailabilitySlot.objects.create(
+            user=user, date=date(2030, 1, 7), start_time=time(9), end_time=time(12)
+        )
+        self.bookings = [
+            Booking.objects.create(
+                user=user, service=service, slot=slot, start_time=time(9 + i), end_time=time(9 + i, 30),
+                customer_name="Jane", customer_email=email, email_sent=True,
+            )
+            for i, email in enumerate(["one@example.com", "bad@example.com", "three@example.com"])
+        ]
+
+    def test_rejected_recipient_does_not_stop_the_batch(self):
+        send = EmailMultiAlternatives.send
+
+        def refuse_bad(message, *args, **kwargs):
+            if message.to == ["bad@example.com"]:
+                raise smtplib.SMTPRecipientsRefused({"bad@example.com": (550, b"No such user")})
+            return send(message, *args, **kwargs)
+
+        with patch.object(EmailMultiAlternatives, "send", refuse_bad):
+            result = send_imported_booking_emails.apply(
+                kwargs={"booking_ids": [b.id for b in self.bookings]}, task_id="import-batch"
+            )
+
+        self.assertTrue(result.successful())
+        self.assertEqual(sorted(m.to[0] for m in mail.outbox), ["one@example.com", "three@example.com"])
+        self.bookings[1].refresh_from_db()
+        self.assertFalse(self.bookings[1].email_sent)
@@ -0,0 +1,48 @@
+from django.core import mail
+from django.test import TestCase
+from core.tasks import send_appointment_email, send_registration_code
+
+
+class NotificationEmailTests(TestCase):
+
+    def test_appointment_email_has_alternatives_and_invitation(self):
+        # Arguments as they arrive from the broker
+        send_appointment_email(
+            customer_name="Tom & Jerry",
+            service_name="Cut",
+            appointment_date="2030-01-07",
+            start_time="09:00:00",
+            end_time="09:30:00",
+            customer_email="tom@example.com",
+        )
+
+        self.assertEqual(len(mail.outbox), 1)
+        email = mail.outbox[0]
+        self.assertEqual(email.subject, "Your Appointment with Cut")
+        self.assertIn("Hello Tom & Jerry,", email.body)
+        self.assertIn("- Start Time: 09:00", email.body)
+
+        html, mimetype = email.alternatives[0]
+        self.assertEqual(mimetype, "text/html")
+        self.assertIn("Tom &amp; Jerry", html)
+
+        filename, ics, _ = email.attachments[0]
+        self.assertEqual(filename, "appointment-Tom_&_Jerry-2030-01-07.ics")
+        self.assertIn("SUMMARY:Appointment: Cut\r\n", ics)
+        self.assertTrue(ics.startswith("BEGIN:VCALENDAR") and ics.endswith("END:VCALENDAR\r\n"))
+
+    def test_same_appointment_keeps_its_uid(self):
+        for _ in range(2):
+            send_appointment_email("Tom", "Cut", "2030-01-07", "09:00:00", "09:30:00", "tom@example.com")
+
+        uids = [
+            next(line for line in email.attachments[0][1].splitlines() if line.startswith("UID:"))
+            for email in mail.outbox
+        ]
+        self.assertEqual(uids[0], uids[1])
+
+    def test_registration_code_is_formatted(self):
+        send_registration_code("new@example.com", "123456")
+
+        self.assertIn("Your registration code is: 123 456", mail.outbox[0].body)
+        self.assertIn("<strong>123 456</strong>", mail.outbox[0].alternatives[0][0])
@@ -0,0 +1,86 @@
+from datetime import date, time, timedelta
+from unittest.mock import patch
+from django.core import mail
+from django.db import transaction
+from django.urls import reverse
+from django.contrib.auth import get_user_model
+from rest_framework.test import APITestCase
+from core.models import Service, AvailabilitySlot, OutboxMessage
+from core.tasks import relay_outbox, send_booking_verification
+from core.utils.outbox import enqueue
+
+
+class OutboxTests(APITestCase):
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email="outbox@example.com", username="outbox", password="StrongPassword123!", is_active=True
+        )
+        self.service = Service.objects.create(
+            user=self.user, name="Cut", description="", duration=timedelta(minutes=30), price=10
+        )
+        AvailabilitySlot.objects.create(
+            user=self.user, date=date(2030, 1, 7), start_time=time(9), end_time=time(17)
+        )
+
+    def book(self):
+        url = reverse(
+            "book-appointment",
+            kwargs={"user_slug": self.user.user_slug, "service_id": self.service.id, "date": "2030-01-07"},
+        )
+        return self.client.post(
+            url,
+            {
+                "status": "pending",
+                "start_time": "09:00",
+                "customer_name": "Jane",
+                "customer_email": "jane@example.com",
+                "customer_phone": "555-0100",
+            },
+            format="json",
+        )
+
+    def test_booking_email_goes_out_through_the_relay(self):
+        response = self.book()
+        self.assertEqual(response.status_code, 200)
+        # Nothing is published from the request itself
+        self.assertEqual(len(mail.outbox), 0)
+        message = OutboxMessage.objects.get()
+        self.assertEqual(message.task, "core.tasks.send_booking_verification")
+
+        relay_outbox()
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].subject, "Verify Your Booking")
+        message.refresh_from_db()
+        self.assertIsNotNone(message.sent_at)
+
+        relay_outbox()
+        self.assertEqual(len(mail.outbox), 1)
+
+    def test_rolled_back_transaction_drops_the_message(self):
+        with self.assertRaises(RuntimeError):
+            with transaction.atomic():
+                enqueue(send_booking_verification, "rolled-back", user_email="a@example.com", verification_link="x")
+                raise RuntimeError
+
+        self.assertFalse(OutboxMessage.objects.exists())
+
+    def test_same_key_is_enqueued_once(self):
+        for _ in range(2):
+            enqueue(send_booking_verification, "once", user_email="a@example.com", verification_link="x")
+
+        self.assertEqual(OutboxMessage.objects.count(), 1)
+
+    def test_failed_publish_is_retried_later(self):
+        enqueue(send_booking_verification, "flaky", user_email="a@example.com", verification_link="x")
+
+        with patch("core.utils.outbox.publish", side_effect=ConnectionError("broker down")):
+            relay_outbox()
+
+        message = OutboxMessage.objects.get()
+        self.assertIsNone(message.sent_at)
+        self.assertEqual(message.attempts, 1)
+        self.assertEqual(message.last_error, "broker down")
+        # Backed off, so an immediate second run skips it
+        relay_outbox()
+        self.assertEqual(len(mail.outbox), 0)
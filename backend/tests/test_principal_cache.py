@@ -0,0 +1,68 @@
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.tokens import AccessToken
+from django.urls import reverse
+from django.db import transaction
+from django.contrib.auth import get_user_model
+from core.models import Service
+from django.core.cache import cache
+from core.utils.principal_cache import (
+    PRINCIPAL_FIELDS,
+    get_cached_user,
+    principal_key,
+    version_key,
+)
+
+
+class PrincipalCacheTests(APITestCase):
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email="cached@example.com", username="cached", password="StrongPassword123!", is_active=True
+        )
+        self.client.cookies["access_token"] = str(AccessToken.for_user(self.user))
+        self.client.cookies["refresh_token"] = "present"
+
+    def test_warm_requests_skip_users_table(self):
+        self.client.get(reverse("slots"))
+        # Neither the user nor the (empty, cached) slot list touch the database
+        with self.assertNumQueries(0):
+            response = self.client.get(reverse("slots"))
+        self.assertEqual(response.status_code, 200)
+
+        with self.assertNumQueries(0):
+            response = self.client.get(reverse("check-auth"))
+        self.assertTrue(response.data["is_authenticated"])
+
+    def test_deactivation_invalidates_cached_principal(self):
+        self.client.get(reverse("check-auth"))
+        self.user.is_active = False
+        self.user.save()
+        response = self.client.get(reverse("slots"))
+        self.assertEqual(response.status_code, 401)
+
+    def test_principal_cached_during_transaction_is_dropped_on_commit(self):
+        stale = {field: getattr(self.user, field) for field in PRINCIPAL_FIELDS}
+        with self.captureOnCommitCallbacks(execute=True):
+            with transaction.atomic():
+                self.user.is_active = False
+                self.user.save()
+                # A request on another connection still sees the old row and caches it
+                cache.set(
+                    principal_key(self.user.id),
+                    {"version": cache.get(version_key(self.user.id)), "values": stale},
+                )
+        self.assertFalse(get_cached_user(self.user.id).is_active)
+
+    def test_expired_access_cookie_is_unauthenticated(self):
+        # The access cookie expires after 30 minutes, the refresh cookie stays
+        del self.client.cookies["access_token"]
+        response = self.client.get(reverse("check-auth"))
+        self.assertEqual(response.status_code, 401)
+        self.assertFalse(response.data["is_authenticated"])
+
+    def test_cached_user_saves_only_loaded_fields(self):
+        self.client.put(reverse("dashboard"), {"user_slug": "renamed"}, format="json")
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.user_slug, "renamed")
+        self.assertTrue(self.user.check_password("StrongPassword123!"))
+        self.assertFalse(Service.objects.exists())
@@ -0,0 +1,50 @@
+from datetime import timedelta
+import pytest
+from django.test import override_settings
+from django.contrib.auth import get_user_model
+from rest_framework.test import APITestCase
+from core.models import Service
+from core.utils.profiling import request_metrics, reset_request_metrics
+
+
+class ProfilingMiddlewareTests(APITestCase):
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email="profile@example.com", username="profile", password="StrongPassword123!", is_active=True
+        )
+        Service.objects.create(
+            user=self.user, name="Cut", description="", duration=timedelta(minutes=30), price=10
+        )
+        self.url = f"/api/bookings/services/{self.user.user_slug}/"
+
+    def timing(self, response):
+        return dict(
+            (part.split(";")[0], part) for part in response["Server-Timing"].split(", ")
+        )
+
+    def test_server_timing_counts_queries_and_cache(self):
+        first = self.timing(self.client.get(self.url))
+        second = self.timing(self.client.get(self.url))
+
+        # Provider, then its services
+        self.assertIn('desc="2 queries"', first["db"])
+        self.assertNotIn(" 0 misses", first["cache"])
+        # The profile is cached now
+        self.assertIn('desc="0 queries"', second["db"])
+        self.assertIn(" 0 misses", second["cache"])
+
+    @override_settings(PROFILING_HISTOGRAMS=True)
+    def test_histograms_per_view(self):
+        reset_request_metrics()
+        for _ in range(3):
+            self.client.get(self.url)
+
+        stats = request_metrics()["services"]
+        self.assertEqual(stats["count"], 3)
+        self.assertEqual(sum(stats["ms"].values()), 3)
+        self.assertEqual(sum(stats["queries"].values()), 3)
+
+    @pytest.mark.query_budget({"services": 2})
+    def test_cold_services_list_stays_within_budget(self):
+        self.client.get(self.url)
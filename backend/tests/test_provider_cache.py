@@ -0,0 +1,147 @@
+from datetime import date, time, timedelta
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from django.contrib.auth import get_user_model
+from rest_framework.test import APITestCase
+from core.models import Service, AvailabilitySlot
+from core.utils.provider_cache import build_provider_profile, profile_key
+
+
+class ProviderProfileCacheTests(APITestCase):
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email="provider@example.com", username="provider", password="StrongPassword123!", is_active=True
+        )
+        self.service = Service.objects.create(
+            user=self.user, name="Haircut", description="Short", duration=timedelta(minutes=30), price=10
+        )
+        self.services_url = reverse("services", kwargs={"user_slug": self.user.user_slug})
+
+    def test_warm_services_list_skips_database(self):
+        self.client.get(self.services_url)
+        with self.assertNumQueries(0):
+            response = self.client.get(self.services_url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([s["name"] for s in response.data], ["Haircut"])
+
+    def test_available_times_skip_users_and_services_tables(self):
+        url = f"/api/bookings/{self.user.user_slug}/{self.service.id}/2030-01-01/"
+        self.client.get(url)
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        tables = " ".join(q["sql"] for q in ctx.captured_queries)
+        self.assertNotIn('"core_customuser"', tables)
+        self.assertNotIn('"core_service"', tables)
+
+    def test_service_changes_invalidate_profile(self):
+        self.client.get(self.services_url)
+        Service.objects.create(
+            user=self.user, name="Shave", description="Smooth", duration=timedelta(minutes=15), price=5
+        )
+        response = self.client.get(self.services_url)
+        self.assertEqual(len(response.data), 2)
+
+        self.service.delete()
+        response = self.client.get(self.services_url)
+        self.assertEqual([s["name"] for s in response.data], ["Shave"])
+
+    def test_profile_cached_during_transaction_is_dropped_on_commit(self):
+        stale = build_provider_profile(self.user.user_slug)
+        with self.captureOnCommitCallbacks(execute=True):
+            with transaction.atomic():
+                Service.objects.create(
+                    user=self.user, name="Shave", description="Smooth", duration=timedelta(minutes=15), price=5
+                )
+                # A public page on another connection still sees one service and caches it
+                cache.set(profile_key(self.user.user_slug), stale)
+        response = self.client.get(self.services_url)
+        self.assertEqual(len(response.data), 2)
+
+    def test_renamed_and_inactive_providers_are_not_found(self):
+        self.client.get(self.services_url)
+        self.user.user_slug = "renamed"
+        self.user.save()
+        self.assertEqual(self.client.get(self.services_url).status_code, 404)
+
+        renamed_url = reverse("services", kwargs={"user_slug": "renamed"})
+        self.assertEqual(self.client.get(renamed_url).status_code, 200)
+        self.user.is_active = False
+        self.user.save()
+        self.assertEqual(self.client.get(renamed_url).status_code, 404)
+
+    def test_service_of_another_provider_is_rejected(self):
+        other = get_user_model().objects.create_user(
+            email="other@example.com", username="other", password="StrongPassword123!", is_active=True
+        )
+        url = f"/api/bookings/{other.user_slug}/{self.service.id}/2030-01-01/"
+        self.assertEqual(self.client.get(url).status_code, 404)
+
+
+class PublicConditionalGetTests(APITestCase):
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email="etag@example.com", username="etag", password="StrongPassword123!", is_active=True
+        )
+        self.service = Service.objects.create(
+            user=self.user, name="Massage", description="Relax", duration=timedelta(minutes=60), price=50
+        )
+        self.services_url = reverse("services", kwargs={"user_slug": self.user.user_slug})
+        self.times_url = f"/api/bookings/{self.user.user_slug}/{self.service.id}/2030-01-01/"
+
+    def test_matching_etag_returns_304_without_queries(self):
+        response = self.client.get(self.services_url)
+        etag = response["ETag"]
+        self.assertTrue(etag.startswith('W/"'))
+        self.assertIn("public", response["Cache-Control"])
+        # Second-resolution dates can't tell apart changes within a second, the ETag can
+        self.assertNotIn("Last-Modified", response)
+
+        with self.assertNumQueries(0):
+            response = self.client.get(self.services_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+    def test_new_slot_changes_times_etag(self):
+        etag = self.client.get(self.times_url)["ETag"]
+        self.assertEqual(self.client.get(self.times_url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        AvailabilitySlot.objects.create(
+            user=self.user, date=date(2030, 1, 1), start_time=time(9), end_time=time(12)
+        )
+        response = self.client.get(self.times_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+        self.assertEqual(len(response.data), 5)
+
+    def test_private_user_saves_keep_etag(self):
+        etag = self.client.get(self.services_url)["ETag"]
+
+        self.user.last_login = timezone.now()
+        self.user.save(update_fields=["last_login"])
+        self.user.set_password("AnotherPassword123!")
+        self.user.save()
+        self.assertEqual(self.client.get(self.services_url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        self.user.username = "renamed"
+        self.user.save()
+        self.assertEqual(self.client.get(self.services_url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        self.user.is_active = False
+        self.user.save()
+        self.assertEqual(self.client.get(self.services_url, HTTP_IF_NONE_MATCH=etag).status_code, 404)
+
+    def test_version_read_during_transaction_is_bumped_on_commit(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            with transaction.atomic():
+                AvailabilitySlot.objects.create(
+                    user=self.user, date=date(2030, 1, 1), start_time=time(9), end_time=time(12)
+                )
+                # A conditional GET on another connection tags the old times with the new version
+                stale_etag = self.client.get(self.services_url)["ETag"]
+        response = self.client.get(self.services_url, HTTP_IF_NONE_MATCH=stale_etag)
+        self.assertEqual(response.status_code, 200)
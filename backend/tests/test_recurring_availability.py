@@ -0,0 +1,71 @@
+from datetime import date, time, timedelta
+from django.urls import reverse
+from django.contrib.auth import get_user_model
+from rest_framework.test import APITestCase
+from core.models import Service, AvailabilitySlot, AvailabilityRule, Booking
+from core.utils.recurring_availability import availability_windows, rule_windows
+
+# A Monday
+MONDAY = date(2030, 1, 7)
+
+
+class RecurringAvailabilityTests(APITestCase):
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email="rules@example.com", username="rules", password="StrongPassword123!", is_active=True
+        )
+        self.client.force_authenticate(self.user)
+        self.service = Service.objects.create(
+            user=self.user, name="Cut", description="", duration=timedelta(minutes=60), price=10
+        )
+        response = self.client.post(
+            reverse("availability-rules"),
+            {
+                "weekday": "Mon",
+                "start_time": "09:00",
+                "end_time": "11:00",
+                "start_date": "2030-01-01",
+                "exceptions": ["2030-01-14"],
+            },
+            format="json",
+        )
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data["exceptions"], ["2030-01-14"])
+
+    def test_rules_expand_without_rows(self):
+        windows = rule_windows(self.user.id, MONDAY, MONDAY + timedelta(days=27))
+        self.assertEqual(sorted(windows), [MONDAY, MONDAY + timedelta(days=14), MONDAY + timedelta(days=21)])
+        self.assertFalse(AvailabilitySlot.objects.exists())
+
+        url = f"/api/bookings/{self.user.user_slug}/{self.service.id}/2030-01-07/"
+        self.assertEqual(len(self.client.get(url).data), 3)
+        url = f"/api/bookings/{self.user.user_slug}/{self.service.id}/2030-01-14/"
+        self.assertEqual(self.client.get(url).data, [])
+
+    def test_inactive_slot_overrides_rule(self):
+        AvailabilitySlot.objects.create(
+            user=self.user, date=MONDAY, start_time=time(9), end_time=time(11), is_active=False
+        )
+        self.assertEqual(availability_windows(self.user.id, MONDAY), [])
+
+    def test_booking_materializes_slot(self):
+        response = self.client.post(
+            reverse("book-appointment", kwargs={
+                "user_slug": self.user.user_slug, "service_id": self.service.id, "date": "2030-01-07",
+            }),
+            {
+                "start_time": "09:00", "customer_name": "Jane", "customer_email": "jane@example.com",
+                "customer_phone": "123", "status": "pending", "service": self.service.id,
+                "slot": 1, "end_time": "10:00",
+            },
+            format="json",
+        )
+        self.assertEqual(response.status_code, 200, response.data)
+        slot = AvailabilitySlot.objects.get()
+        self.assertEqual((slot.date, slot.start_time, slot.end_time), (MONDAY, time(9), time(11)))
+        self.assertEqual(Booking.objects.get().slot, slot)
+
+        # The rest of the window is still offered, from the concrete slot now
+        url = f"/api/bookings/{self.user.user_slug}/{self.service.id}/2030-01-07/"
+        self.assertEqual([t["start_time"] for t in self.client.get(url).data], [time(10)])
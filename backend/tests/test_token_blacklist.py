@@ -0,0 +1,43 @@
+from datetime import timedelta
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+from django.urls import reverse
+from django.utils import timezone
+from django.contrib.auth import get_user_model
+from core.tokens import RefreshToken
+from core.tasks import prune_expired_tokens
+
+
+class TokenBlacklistTests(APITestCase):
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email="revoked@example.com", username="revoked", password="StrongPassword123!", is_active=True
+        )
+        self.refresh = str(RefreshToken.for_user(self.user))
+
+    def refresh_with(self, token):
+        self.client.cookies["refresh_token"] = token
+        return self.client.post(reverse("token-refresh"))
+
+    def test_rotation_revokes_old_refresh_token(self):
+        response = self.refresh_with(self.refresh)
+        self.assertEqual(response.status_code, 200)
+        rotated = response.cookies["refresh_token"].value
+        self.assertNotEqual(rotated, self.refresh)
+
+        self.assertEqual(self.refresh_with(self.refresh).status_code, 400)
+        self.assertEqual(self.refresh_with(rotated).status_code, 200)
+        self.assertFalse(BlacklistedToken.objects.exists())
+
+    def test_logout_revokes_refresh_token(self):
+        self.client.force_authenticate(self.user)
+        self.client.cookies["refresh_token"] = self.refresh
+        self.client.post(reverse("logout"))
+        self.assertEqual(self.refresh_with(self.refresh).status_code, 400)
+
+    def test_prune_removes_only_expired_tokens(self):
+        OutstandingToken.objects.update(expires_at=timezone.now() - timedelta(days=1))
+        RefreshToken.for_user(self.user)
+        prune_expired_tokens(batch_size=1)
+        self.assertEqual(OutstandingToken.objects.count(), 1)
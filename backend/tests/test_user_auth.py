@@ -3,7 +3,8 @@ from django.urls import reverse
 from rest_framework import status
 from django.contrib.auth import get_user_model
 from django.core import mail
-from core.models import VerificationCode
+import re
+from core.utils.verification_store import get_code_store
 
 class UserTests(APITestCase):
 
@@ -20,11 +21,14 @@ class UserTests(APITestCase):
             "password": self.password,
             "password2": self.password,
         }
-        self.client.post(register_url, data, format='json')
+        # Emails are queued on transaction commit
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(register_url, data, format='json')
 
         # Verify the user
         verify_url = reverse('verify-code')
-        code = VerificationCode.objects.get(email=self.email).code
+        # The code lives in the verification store, read it from the email instead
+        code = re.search(r"registration code is: ([\d ]+)", mail.outbox[0].body).group(1).replace(" ", "")
         verify_data = {
             "email": self.email,
             "username": self.username,
@@ -32,7 +36,8 @@ class UserTests(APITestCase):
             "password2": self.password,
             "verification_code": code
         }
-        self.verify_response = self.client.post(verify_url, verify_data, format='json')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.verify_response = self.client.post(verify_url, verify_data, format='json')
 
         # Login
         login_url = reverse('login')
@@ -77,4 +82,19 @@ class UserTests(APITestCase):
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         # Should set new access_token and refresh_token cookies
         self.assertIn('access_token', response.cookies)
-        self.assertIn('refresh_token', response.cookies)
\ No newline at end of file
+        self.assertIn('refresh_token', response.cookies)
+
+    def test_deactivated_account_cannot_reactivate(self):
+        User = get_user_model()
+        User.objects.filter(email=self.email).update(is_active=False)
+
+        response = self.client.post(reverse('resend-verify-code'), {"email": self.email}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+        # Even with a valid code in the store, the registration is over
+        get_code_store().issue(self.email, "123456")
+        response = self.client.post(
+            reverse('verify-code'), {"email": self.email, "verification_code": "123456"}, format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(User.objects.get(email=self.email).is_active)
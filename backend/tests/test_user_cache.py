@@ -0,0 +1,110 @@
+from datetime import time, timedelta
+from django.urls import reverse
+from django.utils import timezone
+from django.contrib.auth import get_user_model
+from rest_framework.test import APITestCase
+from core.models import Service, AvailabilitySlot, Booking
+from core.utils.user_cache import cache_metrics, reset_cache_metrics
+
+
+class UserCacheTests(APITestCase):
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email="lists@example.com", username="lists", password="StrongPassword123!", is_active=True
+        )
+        self.client.force_authenticate(self.user)
+        reset_cache_metrics()
+
+    def create_service(self, name):
+        return Service.objects.create(
+            user=self.user, name=name, description="", duration=timedelta(minutes=30), price=10
+        )
+
+    def test_empty_list_is_cached(self):
+        self.client.get(reverse("services"))
+        with self.assertNumQueries(0):
+            response = self.client.get(reverse("services"))
+        self.assertEqual(response.data, [])
+        self.assertEqual(cache_metrics()["service_list"], {"hits": 1, "misses": 1, "hit_rate": 0.5})
+
+    def test_service_update_and_delete_invalidate(self):
+        service = self.create_service("Cut")
+        self.client.get(reverse("services"))
+
+        url = reverse("service-detail", kwargs={"id": service.id})
+        self.client.patch(url, {"name": "Trim"}, format="json")
+        self.assertEqual([s["name"] for s in self.client.get(reverse("services")).data], ["Trim"])
+
+        self.client.delete(url)
+        self.assertEqual(self.client.get(reverse("services")).data, [])
+
+    def test_slot_changes_invalidate(self):
+        self.client.get(reverse("slots"))
+        response = self.client.post(
+            reverse("slots"), {"date": "2030-01-01", "start_time": "09:00", "end_time": "12:00"}, format="json"
+        )
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(len(self.client.get(reverse("slots")).data), 1)
+
+        self.client.delete(reverse("slot-detail", kwargs={"id": response.data["id"]}))
+        self.assertEqual(self.client.get(reverse("slots")).data, [])
+
+    def test_other_users_are_unaffected(self):
+        other = get_user_model().objects.create_user(
+            email="other-lists@example.com", username="other", password="StrongPassword123!", is_active=True
+        )
+        self.client.get(reverse("services"))
+        Service.objects.create(user=other, name="Other", description="", duration=timedelta(minutes=30), price=1)
+        with self.assertNumQueries(0):
+            self.client.get(reverse("services"))
+
+
+class DashboardTests(APITestCase):
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email="dash@example.com", username="dash", password="StrongPassword123!", is_active=True
+        )
+        self.client.force_authenticate(self.user)
+        self.service = Service.objects.create(
+            user=self.user, name="Cut", description="", duration=timedelta(minutes=30), price=10
+        )
+
+    def book(self, day, status="confirmed"):
+        slot, _ = AvailabilitySlot.objects.get_or_create(
+            user=self.user, date=day, start_time=time(8), end_time=time(23, 59)
+        )
+        # Ends late so it's still upcoming whenever the test runs
+        return Booking.objects.create(
+            user=self.user, service=self.service, slot=slot, start_time=time(23), end_time=time(23, 59),
+            customer_name="Jane", customer_email="jane@example.com", status=status,
+        )
+
+    def test_summary_counters(self):
+        today = timezone.localdate()
+        self.book(today)
+        self.book(today, status="pending")
+        self.book(today, status="cancelled")
+        self.book(today - timedelta(days=1))
+        self.book(today + timedelta(days=8))
+
+        summary = self.client.get(reverse("dashboard")).data["Summary"]
+        self.assertEqual(summary["upcoming_today"], 2)
+        self.assertGreaterEqual(summary["upcoming_this_week"], 2)
+        self.assertEqual(summary["pending_confirmations"], 1)
+
+    def test_snapshot_is_cached_until_data_changes(self):
+        for i in range(5):
+            self.book(timezone.localdate() + timedelta(days=i))
+        self.client.get(reverse("dashboard"))
+        with self.assertNumQueries(0):
+            response = self.client.get(reverse("dashboard"))
+        self.assertEqual(len(response.data["Bookings"]), 3)
+        self.assertEqual(response.data["Bookings"][0]["service_name"], "Cut")
+
+        self.book(timezone.localdate() + timedelta(days=30))
+        # Services, slots, bookings with their service, one aggregate for the counters
+        with self.assertNumQueries(4):
+            response = self.client.get(reverse("dashboard"))
+        self.assertEqual(len(response.data["Slots"]), 3)
@@ -0,0 +1,49 @@
+from unittest.mock import patch
+from django.db import IntegrityError
+from django.test import TestCase
+from django.contrib.auth import get_user_model
+from core.models import CustomUser
+
+
+class UserSlugTests(TestCase):
+
+    def create(self, n, username="john"):
+        return get_user_model().objects.create_user(
+            email=f"{username}{n}@example.com", username=username, password="StrongPassword123!"
+        )
+
+    def test_slugs_get_numbered_suffixes(self):
+        slugs = [self.create(i).user_slug for i in range(3)]
+        self.assertEqual(slugs, ["john", "john-1", "john-2"])
+        # Unrelated slugs sharing the prefix don't count
+        self.assertEqual(self.create(0, username="john-smith").user_slug, "john-smith")
+        self.assertEqual(self.create(3).user_slug, "john-3")
+
+    def test_allocation_uses_constant_queries(self):
+        for i in range(10):
+            self.create(i)
+        # Slug lookup, savepoint, insert, savepoint release
+        with self.assertNumQueries(4):
+            self.create(10)
+
+    def test_lost_race_retries_with_next_slug(self):
+        self.create(0)
+        real = CustomUser.next_free_slug
+        calls = []
+
+        def stale(user, base_slug):
+            # First call returns a slug another signup already took
+            calls.append(base_slug)
+            return base_slug if len(calls) == 1 else real(user, base_slug)
+
+        with patch.object(CustomUser, "next_free_slug", stale):
+            user = self.create(1)
+        self.assertEqual(user.user_slug, "john-1")
+        self.assertEqual(len(calls), 2)
+
+    def test_other_integrity_errors_are_raised(self):
+        self.create(0)
+        with self.assertRaises(IntegrityError):
+            get_user_model().objects.create_user(
+                email="john0@example.com", username="someone", password="StrongPassword123!"
+            )
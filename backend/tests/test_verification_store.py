@@ -0,0 +1,69 @@
+from django.test import TestCase, override_settings
+from core.utils.verification_store import (
+    RedisCodeStore,
+    DatabaseCodeStore,
+    OK,
+    INVALID,
+    EXPIRED,
+    LOCKED,
+)
+
+
+class CodeStoreTests:
+    store_class = None
+
+    def setUp(self):
+        self.store = self.store_class()
+        self.email = f"{self.store_class.__name__.lower()}@example.com"
+        self.store.start_registration(self.email)
+        self.store.issue(self.email, "123456")
+
+    def test_correct_code_is_single_use(self):
+        self.assertEqual(self.store.verify(self.email, "123456"), OK)
+        self.assertEqual(self.store.verify(self.email, "123456"), INVALID)
+
+    def test_verifying_ends_the_registration(self):
+        self.assertTrue(self.store.is_pending(self.email))
+        self.store.verify(self.email, "123456")
+        self.assertFalse(self.store.is_pending(self.email))
+
+        # A code issued afterwards, e.g. for a deactivated account, doesn't verify
+        self.store.issue(self.email, "654321")
+        self.assertEqual(self.store.verify(self.email, "654321"), INVALID)
+
+    def test_expired_code(self):
+        with override_settings(VERIFICATION_CODE_TTL=-1):
+            self.store.issue(self.email, "123456")
+        self.assertEqual(self.store.verify(self.email, "123456"), EXPIRED)
+
+    def test_wrong_attempts_lock_the_code(self):
+        self.assertEqual(self.store.verify(self.email, "000000"), INVALID)
+        self.assertEqual(self.store.verify(self.email, "000000"), INVALID)
+        self.assertEqual(self.store.verify(self.email, "123456"), LOCKED)
+
+        # A new code resets the counter
+        self.store.issue(self.email, "654321")
+        self.assertEqual(self.store.verify(self.email, "654321"), OK)
+
+    def test_resend_cooldown(self):
+        self.assertGreater(self.store.resend_wait(self.email), 0)
+        with override_settings(VERIFICATION_RESEND_COOLDOWN=0):
+            self.store.issue(self.email, "654321")
+            self.assertEqual(self.store.resend_wait(self.email), 0)
+
+
+@override_settings(VERIFICATION_MAX_ATTEMPTS=2)
+class RedisCodeStoreTests(CodeStoreTests, TestCase):
+    store_class = RedisCodeStore
+
+    def test_code_expires_with_ttl(self):
+        self.store.redis.delete(self.store.code_key(self.email))
+        self.assertEqual(self.store.verify(self.email, "123456"), INVALID)
+
+    def tearDown(self):
+        self.store.redis.delete(self.store.pending_key(self.email))
+
+
+@override_settings(VERIFICATION_MAX_ATTEMPTS=2)
+class DatabaseCodeStoreTests(CodeStoreTests, TestCase):
+    store_class = DatabaseCodeStore
@@ -2,6 +2,8 @@ import React, { useState, useRef, useEffect } from "react";
 import api from "../api/api";
 import { FaTrash } from "react-icons/fa";
 
+const REPLY_TIMEOUT_MS = 120000;
+
 export default function ChatBot() {
   const [isOpen, setIsOpen] = useState(false);
   const [sessions, setSessions] = useState([]);
@@ -20,7 +22,7 @@ export default function ChatBot() {
     if (isOpen && !activeSessionId) {
       api
         .get("/api/chat/sessions/")
-        .then((res) => setSessions(res.data))
+        .then((res) => setSessions(res.data.results))
         .catch(console.error);
     }
   }, [isOpen, activeSessionId]);
@@ -29,11 +31,24 @@ export default function ChatBot() {
     if (activeSessionId) {
       api
         .get(`/api/chat/${activeSessionId}/history/`)
-        .then((res) => setMessages(res.data))
+        .then((res) => setMessages(res.data.results))
         .catch(console.error);
     }
   }, [activeSessionId]);
 
+  const waitForReply = async (jobId) => {
+    // Replies are generated in the background; poll the job until it settles,
+    // giving up a little after the server-side time limit
+    const deadline = Date.now() + REPLY_TIMEOUT_MS;
+    while (Date.now() < deadline) {
+      await new Promise((resolve) => setTimeout(resolve, 1000));
+      const res = await api.get(`/api/chat/jobs/${jobId}/`);
+      if (res.data.status === "done") return res.data.reply.message;
+      if (res.data.status === "failed") throw new Error(res.data.error);
+    }
+    throw new Error("Timed out waiting for the reply");
+  };
+
   const sendMessage = async () => {
     if (!input.trim() || !activeSessionId) return;
 
@@ -50,7 +65,10 @@ export default function ChatBot() {
         message: userMessage,
       });
 
-      const aiReply = res.data.response_msg;
+      const aiReply =
+        res.status === 202
+          ? await waitForReply(res.data.job_id)
+          : res.data.response_msg;
 
       setMessages((prev) => [
         ...prev,
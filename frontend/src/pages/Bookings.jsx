@@ -9,6 +9,7 @@ const Bookings = () => {
   const [originalBooking, setOriginalBooking] = useState(null);
   const [noAvailableSlot, setNoAvailableSlot] = useState(false);
   const [userData, setUserData] = useState(null);
+  const [services, setServices] = useState([]);
   const [error, setError] = useState("");
   const [showForm, setShowForm] = useState(false);
   const [showEdit, setShowEdit] = useState(false);
@@ -29,8 +30,12 @@ const Bookings = () => {
   useEffect(() => {
     const fetchUserData = async () => {
       try {
-        const response = await api.get("/api/client/bookings/");
+        const [response, servicesResponse] = await Promise.all([
+          api.get("/api/client/bookings/"),
+          api.get("/api/client/services/"),
+        ]);
         setUserData(response.data);
+        setServices(servicesResponse.data);
       } catch (error) {
         setError(error.message);
         console.error(error);
@@ -273,7 +278,7 @@ const Bookings = () => {
                     required
                   >
                     <option value="">Select Service</option>
-                    {userData.Services?.map((service) => (
+                    {services.map((service) => (
                       <option key={service.id} value={service.id}>
                         {service.name}
                       </option>
@@ -443,7 +448,7 @@ const Bookings = () => {
                     required
                   >
                     <option value="">Select Service</option>
-                    {userData.Services?.map((service) => (
+                    {services.map((service) => (
                       <option key={service.id} value={service.id}>
                         {service.name}
                       </option>